@@ -0,0 +1,257 @@
+import re
+from logic_engine import BOOL_OPS
+
+FALSE = 0
+TRUE = 1
+COMMUTATIVE = {"AND", "OR", "XOR", "NAND"}
+ORDERINGS = ("circuit", "dfs", "interleave")
+
+class BDD:
+    # Reduced ordered binary decision diagrams over `count` variables. A function is an int node id:
+    # 0 and 1 are the constants, every other node a (level, low, high) triple kept unique through
+    # the unique table, so equal functions are equal ids. Results of apply() are memoized in the
+    # computed table.
+    def __init__(self, count):
+        self.count = count
+        self._level = [count, count] # Terminals sit below every variable
+        self._low = [FALSE, TRUE]
+        self._high = [FALSE, TRUE]
+        self._unique = {} # (level, low, high) -> node
+        self._computed = {} # (op, u, v) -> node
+
+    def __len__(self):
+        return len(self._level)
+
+    def node(self, level, low, high):
+        if low == high:
+            return low # Both branches agree: the variable doesn't matter
+        key = (level, low, high)
+        u = self._unique.get(key)
+        if u is None:
+            u = self._unique[key] = len(self._level)
+            self._level.append(level)
+            self._low.append(low)
+            self._high.append(high)
+        return u
+
+    def var(self, level):
+        return self.node(level, FALSE, TRUE)
+
+    def negate(self, u):
+        return self.apply("XOR", u, TRUE)
+
+    def apply(self, op, u, v):
+        # op(u, v) for an opcode of logic_engine.BOOL_OPS; NOT ignores v
+        if op == "NOT":
+            op, v = "XOR", TRUE
+        if u <= TRUE and v <= TRUE:
+            return TRUE if BOOL_OPS[op](bool(u), bool(v)) else FALSE
+        if op == "AND":
+            if u == FALSE or v == FALSE:
+                return FALSE
+            if u == TRUE or u == v:
+                return v
+            if v == TRUE:
+                return u
+        elif op == "OR":
+            if u == TRUE or v == TRUE:
+                return TRUE
+            if u == FALSE or u == v:
+                return v
+            if v == FALSE:
+                return u
+        elif op == "XOR":
+            if u == FALSE:
+                return v
+            if v == FALSE:
+                return u
+            if u == v:
+                return FALSE
+        if op in COMMUTATIVE and u > v:
+            u, v = v, u
+        key = (op, u, v)
+        result = self._computed.get(key)
+        if result is not None:
+            return result
+
+        level = min(self._level[u], self._level[v])
+        u0, u1 = (self._low[u], self._high[u]) if self._level[u] == level else (u, u)
+        v0, v1 = (self._low[v], self._high[v]) if self._level[v] == level else (v, v)
+        result = self.node(level, self.apply(op, u0, v0), self.apply(op, u1, v1))
+        self._computed[key] = result
+        return result
+
+    def count_minterms(self, u):
+        # Number of assignments of all `count` variables that make u true
+        below = {FALSE: 0, TRUE: 1} # Node -> satisfying assignments of the variables from its level down
+        stack = [u]
+        while stack:
+            w = stack[-1]
+            if w in below:
+                stack.pop()
+                continue
+            low, high = self._low[w], self._high[w]
+            missing = [x for x in (low, high) if x not in below]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            level = self._level[w]
+            below[w] = (below[low] << (self._level[low] - level - 1)) + (below[high] << (self._level[high] - level - 1))
+        return below[u] << self._level[u]
+
+    def satisfy(self, u):
+        # One satisfying assignment as {level: value} (unlisted levels are free), or None
+        if u == FALSE:
+            return None
+        assignment = {}
+        while u > TRUE:
+            # Every non-terminal node reaches TRUE on some branch, since FALSE-only nodes reduce away
+            if self._low[u] != FALSE:
+                assignment[self._level[u]] = False
+                u = self._low[u]
+            else:
+                assignment[self._level[u]] = True
+                u = self._high[u]
+        return assignment
+
+    def size(self, roots):
+        # Distinct nodes reachable from the given functions, terminals included
+        seen = set()
+        stack = list(roots)
+        while stack:
+            u = stack.pop()
+            if u not in seen:
+                seen.add(u)
+                if u > TRUE:
+                    stack.append(self._low[u])
+                    stack.append(self._high[u])
+        return len(seen)
+
+    def cubes(self, roots, level=0):
+        # Compact truth table for several functions at once: yields (inputs, outputs) with one
+        # entry per variable (False, True, or None when no function depends on it along that
+        # path) and one bool per function. The rows partition the input space.
+        if level == self.count:
+            yield (), tuple(u == TRUE for u in roots)
+            return
+        if all(self._level[u] != level for u in roots):
+            for inputs, outputs in self.cubes(roots, level + 1):
+                yield (None,) + inputs, outputs
+            return
+        for value, branch in ((False, self._low), (True, self._high)):
+            cofactors = [branch[u] if self._level[u] == level else u for u in roots]
+            for inputs, outputs in self.cubes(cofactors, level + 1):
+                yield (value,) + inputs, outputs
+
+def variable_order(compiled, order="dfs"):
+    # The compiled circuit's Switches in BDD level order. "circuit" keeps component order, "dfs"
+    # lists them as a depth-first walk back from each Bulb meets them (related inputs such as the
+    # two operand bits of an adder stage end up next to each other), and "interleave" sorts names
+    # by their trailing number, so A0, B0, A1, B1, ...
+    if order == "circuit":
+        return list(compiled.switches)
+    if order == "interleave":
+        def key(switch):
+            match = re.match(r"(.*?)(\d+)$", switch.name)
+            if match is None:
+                return (-1, switch.name)
+            return (int(match.group(2)), match.group(1))
+        return sorted(compiled.switches, key=key)
+    if order != "dfs":
+        raise ValueError(f"Unknown variable order {order!r}, expected one of {ORDERINGS}")
+
+    operands = {out: (a, b) for _, out, a, b in compiled.program}
+    switch_at = dict(zip(compiled.inputs, compiled.switches))
+    result = []
+    seen = set()
+    for root in compiled.outputs:
+        stack = [root]
+        while stack:
+            slot = stack.pop()
+            if slot in seen:
+                continue
+            seen.add(slot)
+            if slot in switch_at:
+                result.append(switch_at[slot])
+            elif slot in operands:
+                a, b = operands[slot]
+                stack.append(b)
+                stack.append(a) # First operand explored first
+    result.extend(s for slot, s in switch_at.items() if slot not in seen) # Switches no Bulb depends on
+    return result
+
+class SymbolicCircuit:
+    # The function of every Bulb of a combinational circuit as a BDD over its Switches.
+    # `order` is one of ORDERINGS or an explicit sequence of the circuit's Switches; circuits built
+    # on the same `manager` share nodes, so equal functions have equal roots.
+    def __init__(self, circuit, order="dfs", manager=None):
+        compiled = circuit.compile() # Raises ValueError for feedback loops
+        if isinstance(order, str):
+            self.switches = variable_order(compiled, order)
+        else:
+            self.switches = list(order)
+            if sorted(s.id for s in self.switches) != sorted(s.id for s in compiled.switches):
+                raise ValueError("Explicit order must list every Switch of the circuit once")
+        self.bulbs = list(compiled.bulbs)
+        self.manager = manager if manager is not None else BDD(len(self.switches))
+        if self.manager.count != len(self.switches):
+            raise ValueError(f"Manager has {self.manager.count} variables, circuit has {len(self.switches)} Switches")
+
+        level = {switch: k for k, switch in enumerate(self.switches)}
+        nodes = [TRUE if value else FALSE for value in compiled.values]
+        for slot, switch in zip(compiled.inputs, compiled.switches):
+            nodes[slot] = self.manager.var(level[switch])
+        apply = self.manager.apply
+        for op, out, a, b in compiled.program:
+            nodes[out] = apply(op, nodes[a], nodes[b])
+        self.roots = {bulb: nodes[slot] for bulb, slot in zip(self.bulbs, compiled.outputs)}
+
+    def count(self, bulb):
+        # Switch combinations that light the Bulb
+        return self.manager.count_minterms(self.roots[bulb])
+
+    def satisfy(self, bulb):
+        # {Switch: value} lighting the Bulb, or None if nothing does
+        assignment = self.manager.satisfy(self.roots[bulb])
+        if assignment is None:
+            return None
+        return {switch: assignment.get(k, False) for k, switch in enumerate(self.switches)}
+
+    def size(self):
+        return self.manager.size(self.roots.values())
+
+    def truth_table(self, bulbs=None):
+        # Compact rows (switch values in self.switches order, None for "either"; bulb values)
+        bulbs = self.bulbs if bulbs is None else bulbs
+        return self.manager.cubes([self.roots[bulb] for bulb in bulbs])
+
+def _by_name(components, kind):
+    named = {c.name: c for c in components}
+    if len(named) != len(components):
+        raise ValueError(f"{kind} names must be unique to match circuits")
+    return named
+
+def counterexample(first, second, order="dfs"):
+    # Checks that two combinational circuits compute the same Bulb functions, matching Switches and
+    # Bulbs by name. Returns None if they do, else {switch name: value} for an input where they differ.
+    a = SymbolicCircuit(first, order)
+    a_switches = _by_name(a.switches, "Switch")
+    compiled = second.compile()
+    b_switches = _by_name(compiled.switches, "Switch")
+    a_bulbs = _by_name(a.bulbs, "Bulb")
+    b_bulbs = _by_name(compiled.bulbs, "Bulb")
+    if a_switches.keys() != b_switches.keys() or a_bulbs.keys() != b_bulbs.keys():
+        raise ValueError("Circuits have different Switch or Bulb names")
+    b = SymbolicCircuit(second, [b_switches[s.name] for s in a.switches], a.manager)
+
+    manager = a.manager
+    for name, bulb in a_bulbs.items():
+        difference = manager.apply("XOR", a.roots[bulb], b.roots[b_bulbs[name]])
+        assignment = manager.satisfy(difference)
+        if assignment is not None:
+            return {s.name: assignment.get(k, False) for k, s in enumerate(a.switches)}
+    return None
+
+def equivalent(first, second, order="dfs"):
+    return counterexample(first, second, order) is None
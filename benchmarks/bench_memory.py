@@ -0,0 +1,82 @@
+import sys
+import time
+import tracemalloc
+import uuid
+from logic_engine import Circuit, AndGate, Switch, Bulb
+
+# Run from the repository root: python -m benchmarks.bench_memory [gates]
+
+# The layout before __slots__, kept as the baseline: per-instance dicts, uuid4 string ids, a dict of
+# Nodes per direction and a connections list allocated for every Node
+class OldNode:
+    def __init__(self, component, name, is_input=False):
+        self.id = str(uuid.uuid4())
+        self.component = component
+        self.name = name
+        self.is_input = is_input
+        self.value = False
+        self.connections = []
+
+class OldComponent:
+    def __init__(self, name="Component"):
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.inputs = {}
+        self.outputs = {}
+        self.position = (0, 0)
+
+    def add_input(self, name):
+        self.inputs[name] = OldNode(self, name, is_input=True)
+
+    def add_output(self, name):
+        self.outputs[name] = OldNode(self, name, is_input=False)
+
+class OldAndGate(OldComponent):
+    def __init__(self):
+        super().__init__("AND")
+        self.add_input("A")
+        self.add_input("B")
+        self.add_output("Q")
+
+def measure_gates(count, gate=AndGate):
+    # Bytes per bare gate (component + its three Nodes)
+    tracemalloc.start()
+    start = time.perf_counter()
+    gates = [gate() for _ in range(count)]
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del gates
+    return current / count, elapsed / count
+
+def measure_circuit(count):
+    # Bytes per gate for a wired chain, including the Circuit's own bookkeeping
+    tracemalloc.start()
+    start = time.perf_counter()
+    c = Circuit()
+    switch = Switch()
+    c.add_component(switch)
+    node = switch.outputs["Q"]
+    for _ in range(count):
+        gate = AndGate()
+        c.add_component(gate)
+        c.add_wire(node, gate.inputs["A"])
+        c.add_wire(node, gate.inputs["B"])
+        node = gate.outputs["Q"]
+    bulb = Bulb()
+    c.add_component(bulb)
+    c.add_wire(node, bulb.inputs["A"])
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / count, elapsed / count
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    old_bytes, old_seconds = measure_gates(count, OldAndGate)
+    print(f"Old layout:    {old_bytes:8.1f} bytes/gate  {old_seconds * 1e6:6.2f} us/gate")
+    per_gate, seconds = measure_gates(count)
+    print(f"Bare gates:    {per_gate:8.1f} bytes/gate  {seconds * 1e6:6.2f} us/gate  "
+          f"({old_bytes / per_gate:.1f}x less memory, {old_seconds / seconds:.1f}x faster than the old layout)")
+    per_gate, seconds = measure_circuit(count)
+    print(f"Wired circuit: {per_gate:8.1f} bytes/gate  {seconds * 1e6:6.2f} us/gate")
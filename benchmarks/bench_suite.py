@@ -0,0 +1,135 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from benchmarks.generators import CASES
+from truth_table import iter_truth_table
+
+# Run from the repository root:
+#   python -m benchmarks.bench_suite [--quick] [--output results.json] [--baseline baseline.json]
+# Exits with status 1 if any metric is worse than the baseline by more than --threshold.
+
+TOGGLES = 200 # Random switch flips simulated per round for the throughput figure
+ROUNDS = 3 # Throughput is the best round, which keeps the noise down
+TABLE_ROWS = 1 << 12 # Truth-table rows generated per case
+LOOP_TABLE_ROWS = 1 << 8 # Fewer for circuits with feedback loops, which simulate every row
+SETTLE_TICKS = 100
+
+# Metric -> True if larger is better
+METRICS = {
+    "build_seconds": False,
+    "peak_bytes": False,
+    "settle_seconds": False,
+    "evals_per_second": True,
+    "truth_table_seconds": False,
+}
+
+def run_case(generator, args, seed=0):
+    gc.collect()
+    start = time.perf_counter()
+    circuit, switches, bulbs = generator(*args)
+    build_seconds = time.perf_counter() - start
+    gates = len(circuit.components) - len(switches) - len(bulbs)
+
+    # Peak memory of a second, traced build (tracing slows it down too much to time it)
+    del circuit, switches, bulbs
+    gc.collect()
+    tracemalloc.start()
+    circuit, switches, bulbs = generator(*args)
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # Settle latency: everything is pending after construction
+    start = time.perf_counter()
+    circuit.simulate(SETTLE_TICKS)
+    settle_seconds = time.perf_counter() - start
+
+    # Throughput: flip one random switch at a time and resimulate
+    rng = random.Random(seed)
+    evals_per_second = 0
+    for _ in range(ROUNDS):
+        evaluations = circuit.evaluations
+        start = time.perf_counter()
+        for _ in range(TOGGLES):
+            rng.choice(switches).toggle()
+            circuit.simulate(SETTLE_TICKS)
+        seconds = time.perf_counter() - start
+        evals_per_second = max(evals_per_second, (circuit.evaluations - evaluations) / seconds)
+
+    rows = LOOP_TABLE_ROWS if circuit.loops() else TABLE_ROWS
+    start = time.perf_counter()
+    for _ in iter_truth_table(circuit, switches, bulbs, 0, rows):
+        pass
+    truth_table_seconds = time.perf_counter() - start
+
+    return {
+        "gates": gates,
+        "build_seconds": build_seconds,
+        "peak_bytes": peak_bytes,
+        "settle_seconds": settle_seconds,
+        "evals_per_second": evals_per_second,
+        "truth_table_seconds": truth_table_seconds,
+    }
+
+def run(quick=False, cases=None):
+    results = {}
+    for name, (generator, args, quick_args) in CASES.items():
+        if cases and name not in cases:
+            continue
+        results[name] = run_case(generator, quick_args if quick else args)
+    return {"python": platform.python_version(), "quick": quick, "results": results}
+
+def compare(results, baseline, threshold=0.25):
+    # Messages for every metric more than `threshold` (a fraction) worse than the baseline
+    regressions = []
+    for name, metrics in results["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in metrics or not old.get(metric):
+                continue
+            ratio = metrics[metric] / old[metric]
+            change = 1 / ratio - 1 if higher_is_better else ratio - 1
+            if change > threshold:
+                regressions.append(f"{name}.{metric}: {old[metric]:.4g} -> {metrics[metric]:.4g} ({change:+.0%} worse)")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulator benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="small circuits, for a fast check")
+    parser.add_argument("--case", action="append", choices=sorted(CASES), help="run only these cases")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction (default 0.25)")
+    options = parser.parse_args(argv)
+
+    results = run(options.quick, options.case)
+    for name, metrics in results["results"].items():
+        print(f"{name:18} {metrics['gates']:7} gates  build {metrics['build_seconds']:7.3f}s  "
+              f"peak {metrics['peak_bytes'] / 1e6:7.1f}MB  settle {metrics['settle_seconds']:7.3f}s  "
+              f"{metrics['evals_per_second'] / 1e6:6.2f}M evals/s  table {metrics['truth_table_seconds']:7.3f}s")
+    if options.output:
+        with open(options.output, "w") as out:
+            json.dump(results, out, indent=1)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != results["quick"]:
+            print("Baseline was recorded with a different --quick setting", file=sys.stderr)
+            return 2
+        regressions = compare(results, baseline, options.threshold)
+        for message in regressions:
+            print("REGRESSION " + message, file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {options.threshold:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
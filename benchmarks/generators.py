@@ -0,0 +1,128 @@
+import random
+from logic_engine import Circuit, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb
+
+# Parametric circuits for the benchmarks. Each generator builds through add_component/add_wire,
+# like the editor does, and returns (circuit, switches, bulbs).
+
+GATES = (AndGate, OrGate, NotGate, XorGate, NandGate)
+
+def _gate(c, cls, *sources):
+    gate = cls()
+    c.add_component(gate)
+    for source, node in zip(sources, gate.inputs.values()):
+        c.add_wire(source, node)
+    return gate.outputs["Q"]
+
+def _switches(c, prefix, count):
+    switches = []
+    for i in range(count):
+        switch = Switch()
+        switch.name = f"{prefix}{i}"
+        c.add_component(switch)
+        switches.append(switch)
+    return switches
+
+def _bulbs(c, prefix, sources):
+    bulbs = []
+    for i, source in enumerate(sources):
+        bulb = Bulb()
+        bulb.name = f"{prefix}{i}"
+        c.add_component(bulb)
+        c.add_wire(source, bulb.inputs["A"])
+        bulbs.append(bulb)
+    return bulbs
+
+def _full_adder(c, a, b, carry):
+    # (sum, carry out) output Nodes; a missing carry makes it a half adder
+    partial = _gate(c, XorGate, a, b)
+    if carry is None:
+        return partial, _gate(c, AndGate, a, b)
+    total = _gate(c, XorGate, partial, carry)
+    return total, _gate(c, OrGate, _gate(c, AndGate, a, b), _gate(c, AndGate, partial, carry))
+
+def _add(c, x, y):
+    # Ripple-carry sum of two little-endian lists of Nodes (None for a constant 0)
+    result = []
+    carry = None
+    for i in range(max(len(x), len(y))):
+        bits = [bit for bit in (x[i] if i < len(x) else None, y[i] if i < len(y) else None, carry) if bit is not None]
+        if len(bits) == 3:
+            total, carry = _full_adder(c, *bits)
+        elif len(bits) == 2:
+            total, carry = _full_adder(c, bits[0], bits[1], None)
+        else:
+            total, carry = (bits[0] if bits else None), None
+        result.append(total)
+    result.append(carry)
+    return result
+
+def ripple_adder(bits):
+    # Switches A0.., B0..; Bulbs S0.. with the carry out last
+    c = Circuit()
+    a = _switches(c, "A", bits)
+    b = _switches(c, "B", bits)
+    total = _add(c, [s.outputs["Q"] for s in a], [s.outputs["Q"] for s in b])
+    return c, a + b, _bulbs(c, "S", total)
+
+def array_multiplier(bits):
+    # Switches A0.., B0..; Bulbs P0.. (2 * bits of product), one partial-product row added per bit of B
+    c = Circuit()
+    a = _switches(c, "A", bits)
+    b = _switches(c, "B", bits)
+    product = []
+    for j, multiplier in enumerate(b):
+        row = [None] * j + [_gate(c, AndGate, s.outputs["Q"], multiplier.outputs["Q"]) for s in a]
+        product = _add(c, product, row) if product else row
+    product = (product + [None] * (2 * bits))[:2 * bits]
+    # Constant-0 product bits (only for 1-bit operands) come from an unconnected AND gate
+    product = [bit if bit is not None else _gate(c, AndGate) for bit in product]
+    return c, a + b, _bulbs(c, "P", product)
+
+def parity_tree(inputs):
+    # Balanced XOR tree: one Bulb, lit for an odd number of switches on
+    c = Circuit()
+    switches = _switches(c, "X", inputs)
+    level = [s.outputs["Q"] for s in switches]
+    while len(level) > 1:
+        paired = [_gate(c, XorGate, level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        level = paired + level[len(level) & ~1:]
+    return c, switches, _bulbs(c, "P", level)
+
+def random_dag(gates, inputs=32, outputs=8, seed=0):
+    # Random combinational netlist; each gate reads from the 64 most recent signals, which keeps
+    # the depth growing with the size
+    rng = random.Random(seed)
+    c = Circuit()
+    switches = _switches(c, "X", inputs)
+    signals = [s.outputs["Q"] for s in switches]
+    for _ in range(gates):
+        cls = rng.choice(GATES)
+        window = signals[-64:]
+        signals.append(_gate(c, cls, rng.choice(window), rng.choice(window)))
+    return c, switches, _bulbs(c, "Y", signals[-outputs:])
+
+def ring_oscillators(rings, length=5):
+    # Feedback-heavy: rings of a NAND and length - 1 inverters, each oscillating while its switch is on.
+    # length must be odd.
+    c = Circuit()
+    switches = _switches(c, "EN", rings)
+    taps = []
+    for switch in switches:
+        gate = NandGate()
+        c.add_component(gate)
+        c.add_wire(switch.outputs["Q"], gate.inputs["A"])
+        node = gate.outputs["Q"]
+        for _ in range(length - 1):
+            node = _gate(c, NotGate, node)
+        c.add_wire(node, gate.inputs["B"])
+        taps.append(node)
+    return c, switches, _bulbs(c, "R", taps)
+
+# Name -> (generator, arguments for the full run, arguments for --quick)
+CASES = {
+    "ripple_adder": (ripple_adder, (256,), (32,)),
+    "array_multiplier": (array_multiplier, (24,), (8,)),
+    "parity_tree": (parity_tree, (4096,), (256,)),
+    "random_dag": (random_dag, (20000,), (2000,)),
+    "ring_oscillators": (ring_oscillators, (500, 7), (50, 7)),
+}
@@ -0,0 +1,167 @@
+from logic_engine import Clock, DFlipFlop, Register, SubCircuit, SOURCE_OPS
+
+# Cycle-based simulation for synchronous circuits: every DFlipFlop and Register is clocked by the
+# same Clock, and one cycle evaluates the logic between the registers once, in levelized order,
+# then latches every register at the same time. Nothing in between is simulated (no clock edges,
+# no glitches), so counters and state machines run millions of cycles instead of stepping through
+# ticks for each edge.
+
+class CycleSimulator:
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.cycles = 0 # Cycles run so far
+        self._revision = None
+        self._function = None # Generated by _build(), see run()
+
+    def run(self, cycles=1):
+        # Runs `cycles` clock cycles from the current Switch values and register contents, then writes
+        # every Node, register and Bulb back. Raises ValueError for circuits that aren't synchronous.
+        if self._revision != self.circuit.revision:
+            self._build()
+            self._revision = self.circuit.revision
+        inputs = [node.value for node in self._inputs]
+        state = [value for register in self._registers
+                 for value in ((register.state, not register.state) if isinstance(register, DFlipFlop)
+                               else (register.value,))]
+        values = self._function(cycles, inputs, state, self._components)
+        self.cycles += cycles
+
+        changed = []
+        for node, slot in self._slots:
+            if node.value != values[slot]:
+                node.value = values[slot]
+                changed.append(node)
+        for register in self._registers:
+            if isinstance(register, DFlipFlop):
+                register.state = register._outputs[0].value
+            else:
+                register.value = register._outputs[0].value
+            register.clock = register._inputs[1].value
+        for sink in self._sinks:
+            sink.evaluate()
+        self.circuit.record_changes(changed)
+
+    def _build(self):
+        circuit = self.circuit
+        driver = {} # Input Node -> output Node driving it
+        for net in circuit.nets:
+            if net.driver is not None:
+                for dest in net.sinks:
+                    driver[dest] = net.driver
+
+        registers = []
+        sources = []
+        logic = []
+        sinks = []
+        clocks = set()
+        for component in circuit.components:
+            if isinstance(component, (DFlipFlop, Register)):
+                clock = driver.get(component._inputs[1])
+                if clock is None or not isinstance(clock.component, Clock):
+                    raise ValueError(f"{component.name} is not clocked directly by a Clock")
+                clocks.add(clock.component)
+                registers.append(component)
+            elif not component._inputs:
+                sources.append(component)
+            elif not component._outputs:
+                sinks.append(component)
+            else:
+                logic.append(component)
+        if len(clocks) > 1:
+            raise ValueError("Cycle simulation needs every register on the same Clock")
+
+        # One local per output Node; wired inputs read their driver's, unwired ones keep their value
+        slots = {}
+        for component in circuit.components:
+            for node in component._outputs:
+                slots[node] = len(slots)
+
+        def ref(node):
+            if node in slots:
+                return f"n{slots[node]}"
+            if node in driver:
+                return f"n{slots[driver[node]]}"
+            return repr(node.value)
+
+        # Kahn's algorithm over the logic between registers, as in Circuit.compile()
+        logic_set = set(logic)
+        waiting = {}
+        dependents = {}
+        for component in logic:
+            upstream = {driver[node].component for node in component._inputs if node in driver}
+            upstream = [c for c in upstream if c in logic_set]
+            waiting[component] = len(upstream)
+            for source in upstream:
+                dependents.setdefault(source, []).append(component)
+        ready = [component for component in logic if waiting[component] == 0]
+        order = []
+        while ready:
+            component = ready.pop()
+            order.append(component)
+            for dependent in dependents.get(component, ()):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(logic):
+            raise ValueError("Cycle simulation needs the logic between registers to be free of loops")
+
+        # Plain gates become expressions, blocks a table lookup, anything else an evaluate() call
+        components = []
+        body = []
+        for component in order:
+            outputs = [f"n{slots[node]}" for node in component._outputs]
+            operands = [ref(node) for node in component._inputs]
+            if component.op in SOURCE_OPS:
+                expression = SOURCE_OPS[component.op].format(a=operands[0], b=operands[-1])
+                body.append(f"{outputs[0]} = {expression}")
+                continue
+            name = f"c{len(components)}"
+            components.append(component)
+            if isinstance(component, SubCircuit):
+                body.append("".join(out + ", " for out in outputs) + f"= {name}.block.evaluate(("
+                            + "".join(operand + ", " for operand in operands) + "))")
+                continue
+            for i, operand in enumerate(operands):
+                body.append(f"{name}._inputs[{i}].value = {operand}")
+            body.append(f"{name}.evaluate()")
+            for i, out in enumerate(outputs):
+                body.append(f"{out} = {name}._outputs[{i}].value")
+
+        latched = []
+        latches = []
+        for register in registers:
+            d = ref(register._inputs[0])
+            latched.extend(f"n{slots[node]}" for node in register._outputs)
+            latches.extend((d, f"not {d}") if isinstance(register, DFlipFlop) else (d,))
+
+        lines = ["def run(cycles, inputs, state, components):"]
+        if components:
+            lines.append("    " + "".join(f"c{i}, " for i in range(len(components))) + "= components")
+        self._inputs = [node for source in sources for node in source._outputs]
+        if self._inputs:
+            lines.append("    " + "".join(ref(node) + ", " for node in self._inputs) + "= inputs")
+        if latched:
+            lines.append("    " + "".join(out + ", " for out in latched) + "= state")
+        lines.append("    mask = True") # NOT and NAND in SOURCE_OPS invert with it
+        lines.append("    for _ in range(cycles):")
+        lines.extend("        " + line for line in body)
+        if latched:
+            lines.append("        " + "".join(out + ", " for out in latched) + "= "
+                         + "".join(latch + ", " for latch in latches))
+        else:
+            lines.append("        pass")
+        # Settle once more so the outputs show the logic after the last latch
+        lines.extend("    " + line for line in body)
+        lines.append("    return [" + ", ".join(f"n{slot}" for slot in range(len(slots))) + "]")
+        self.source = "\n".join(lines) + "\n"
+
+        namespace = {}
+        exec(compile(self.source, f"<cycles {circuit.structural_hash()[:8]}>", "exec"), namespace)
+        self._function = namespace["run"]
+        self._components = components
+        self._registers = registers
+        self._sinks = sinks
+        # Every Node, input or output, with the local holding its value after run()
+        self._slots = [(node, slots[node]) for node in slots]
+        self._slots.extend((node, slots[driver[node]]) for component in circuit.components
+                           for node in component._inputs if node in driver)
@@ -0,0 +1,188 @@
+import argparse
+import sys
+from collections import namedtuple
+from logic_engine import SubCircuit, BIT_OPS
+
+# Parallel stuck-at fault simulation for combinational circuits:
+#   python -m faults circuit.lnet vectors.txt
+# Every Node gets a stuck-at-0 and a stuck-at-1 fault. For each test vector, bit 0 of every value
+# carries the good machine and bit k the machine with fault k, so one pass over the compiled program
+# simulates a whole group of faulty machines. A fault is dropped once a Bulb shows it.
+
+LANES = 4095 # Faulty machines per pass, next to the good machine in bit 0
+
+Fault = namedtuple("Fault", "node value") # Node stuck at value (False or True)
+
+def fault_name(fault):
+    component = fault.node.component
+    return f"{component.name}#{component.id}.{fault.node.name} stuck-at-{int(fault.value)}"
+
+def enumerate_faults(circuit):
+    # Both stuck-at faults on every input and output Node, in circuit order
+    return [Fault(node, value) for component in circuit.components
+            for node in component._inputs + component._outputs for value in (False, True)]
+
+def _force(keep, ones):
+    # Program step that pins some lanes of a value to 0 (cleared from keep) or 1 (set in ones)
+    return lambda a, b, mask: (a & keep) | ones
+
+class FaultReport:
+    def __init__(self, faults, detected, vectors):
+        self.faults = faults # Every simulated Fault
+        self.detected = detected # Fault -> index of the first vector that detected it
+        self.vectors = vectors # Number of test vectors applied
+
+    @property
+    def undetected(self):
+        return [fault for fault in self.faults if fault not in self.detected]
+
+    @property
+    def coverage(self):
+        # Fraction of faults detected, 1.0 for a circuit without faults
+        return len(self.detected) / len(self.faults) if self.faults else 1.0
+
+    def new_detections(self):
+        # Faults first detected by each vector, one count per vector (how much each vector adds)
+        counts = [0] * self.vectors
+        for index in self.detected.values():
+            counts[index] += 1
+        return counts
+
+    def summary(self, limit=20):
+        lines = [f"{len(self.detected)} of {len(self.faults)} stuck-at faults detected by {self.vectors} vectors "
+                 f"({self.coverage:.2%} coverage)"]
+        undetected = self.undetected
+        if undetected:
+            lines.append(f"Undetected ({len(undetected)}):")
+            lines.extend("  " + fault_name(fault) for fault in undetected[:limit])
+            if len(undetected) > limit:
+                lines.append(f"  ... and {len(undetected) - limit} more")
+        return "\n".join(lines)
+
+class FaultSimulator:
+    def __init__(self, circuit):
+        # Blocks are expanded so faults inside them are simulated too; their Nodes are the flat copies
+        if any(isinstance(c, SubCircuit) for c in circuit.components):
+            circuit = circuit.flatten()
+        self.circuit = circuit
+        self.compiled = circuit.compile() # ValueError for feedback loops and bus components
+        self.switches = self.compiled.switches
+        self.faults = enumerate_faults(circuit)
+
+        slots = self.compiled.slots
+        step_of = {out: index for index, (op, out, a, b) in enumerate(self.compiled.program)}
+        self._gates = [None] * len(self.compiled.program) # Program index -> gate component
+        for component in circuit.components:
+            if component._outputs and slots[component._outputs[0]] in step_of:
+                self._gates[step_of[slots[component._outputs[0]]]] = component
+
+    def _program(self, faults):
+        # Program for a group of faults, lane k + 1 for faults[k]: (values, program, output slots)
+        stems = {} # Output Node -> [keep, ones] forced after it is computed
+        branches = {} # Input Node -> [keep, ones] forced on the copy its component reads
+        everything = (1 << (len(faults) + 1)) - 1
+        for lane, fault in enumerate(faults, 1):
+            masks = (branches if fault.node.is_input else stems).setdefault(fault.node, [everything, 0])
+            masks[0] &= ~(1 << lane)
+            if fault.value:
+                masks[1] |= 1 << lane
+
+        compiled = self.compiled
+        slots = compiled.slots
+        values = [everything if value else 0 for value in compiled.values]
+        program = []
+        size = len(values)
+
+        def branch(node):
+            # Slot the component reads for an input Node, private when that pin is faulted
+            nonlocal size
+            if node not in branches:
+                return slots[node]
+            values.append(0)
+            program.append((_force(*branches[node]), size, slots[node], slots[node]))
+            size += 1
+            return size - 1
+
+        for switch in self.switches:
+            node = switch._outputs[0]
+            if node in stems:
+                program.append((_force(*stems[node]), slots[node], slots[node], slots[node]))
+        for gate, (op, out, a, b) in zip(self._gates, compiled.program):
+            operands = [branch(node) for node in gate._inputs]
+            program.append((BIT_OPS[op], out, operands[0], operands[1] if len(operands) > 1 else operands[0]))
+            node = gate._outputs[0]
+            if node in stems:
+                program.append((_force(*stems[node]), out, out, out))
+        outputs = [branch(bulb._inputs[0]) for bulb in compiled.bulbs]
+        return values, program, outputs, everything
+
+    def run(self, vectors, lanes=LANES):
+        # Applies the vectors (one bool per Switch, in self.switches order) and returns a FaultReport
+        vectors = [list(vector) for vector in vectors]
+        for vector in vectors:
+            if len(vector) != len(self.switches):
+                raise ValueError(f"Expected {len(self.switches)} values per vector, got {len(vector)}")
+        detected = {}
+        for start in range(0, len(self.faults), lanes):
+            group = self.faults[start:start + lanes]
+            program = None
+            for index, vector in enumerate(vectors):
+                if not group:
+                    break
+                if program is None:
+                    constants, program, outputs, mask = self._program(group)
+                values = list(constants)
+                for slot, value in zip(self.compiled.inputs, vector):
+                    values[slot] = mask if value else 0
+                for fn, out, a, b in program:
+                    values[out] = fn(values[a], values[b], mask)
+                seen = 0
+                for slot in outputs:
+                    word = values[slot]
+                    seen |= word ^ mask if word & 1 else word # Lanes that differ from the good machine
+                if seen:
+                    for lane, fault in enumerate(group, 1):
+                        if seen >> lane & 1:
+                            detected[fault] = index
+                    # Detected faults leave the group, so later vectors simulate fewer machines
+                    group = [fault for fault in group if fault not in detected]
+                    program = None
+        return FaultReport(self.faults, detected, len(vectors))
+
+def fault_coverage(circuit, vectors, lanes=LANES):
+    # Coverage of `vectors` (one bool per Switch, in circuit order) against all stuck-at faults
+    return FaultSimulator(circuit).run(vectors, lanes)
+
+def main(argv=None):
+    from netlist_io import load
+    from runner import read_stimulus
+    parser = argparse.ArgumentParser(prog="python -m faults", description="Stuck-at fault coverage of test vectors")
+    parser.add_argument("netlist", help="circuit saved as .json or .lnet")
+    parser.add_argument("stimulus", nargs="?", default="-", help="test vectors, one per line (default: stdin)")
+    parser.add_argument("--limit", type=int, default=20, help="undetected faults to list (default: 20)")
+    options = parser.parse_args(argv)
+
+    try:
+        simulator = FaultSimulator(load(options.netlist))
+    except (OSError, ValueError, KeyError, IndexError) as exc:
+        print(f"Could not load {options.netlist}: {exc}", file=sys.stderr)
+        return 2
+    source = sys.stdin if options.stimulus == "-" else open(options.stimulus)
+    try:
+        # Same format as runner.py; a header line of names reorders the columns
+        switches = list(simulator.switches)
+        rows = [values for _, values in read_stimulus(source, switches)]
+    except ValueError as exc:
+        print(f"{options.stimulus}: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    columns = [switches.index(switch) if switch in switches else None for switch in simulator.switches]
+    vectors = [[row[column] if column is not None else switch.is_on
+                for column, switch in zip(columns, simulator.switches)] for row in rows]
+    print(simulator.run(vectors).summary(options.limit))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,14 @@
 import tkinter as tk
-from logic_engine import Component, Node
+from tkinter import ttk
+from logic_engine import Component, Node, BusSwitch
+
+NODE_HIT_RADIUS = 10 # Clicks within this distance of a node pick the node
+
+def heat_color(level):
+    # Light gray for idle through red for the busiest, level from 0.0 to 1.0
+    level = min(max(level, 0.0), 1.0)
+    fade = round(211 * (1 - level))
+    return f"#{211 + round(44 * level):02x}{fade:02x}{fade:02x}"
 
 class GuiComponent:
     def __init__(self, component: Component, x, y):
@@ -7,21 +16,34 @@ class GuiComponent:
         self.x = x
         self.y = y
         self.width = 60
-        self.height = 40
+        self.height = max(40, 20 * max(len(component.inputs), len(component.outputs))) # Room for every port
         self.color = "lightgray"
         self.selected = False
-        
+
         # Update component position in logic engine (optional, but good for consistency)
         self.component.position = (x, y)
 
+        # Canvas items are created once by draw() and then updated in place
+        self.canvas = None
+        self.tag = f"comp{component.id}" # Shared by all items of this component
+        self.body = None
+        self.node_items = {} # Node -> oval item id
+        self._drawn = {} # Item id -> {option: value} last sent to the canvas
+        self.index = None # SpatialGrid tracking this component and its nodes, see register()
+        self.values = None # Node -> value as last published by the simulator, or None to read the Nodes
+        self.heat = None # Activity from 0.0 to 1.0 shown by the profiling overlay, or None
+
     def draw(self, canvas: tk.Canvas):
+        if self.canvas is not None:
+            self.update()
+            return
+        self.canvas = canvas
+
         # Draw body
-        outline = "blue" if self.selected else "black"
-        canvas.create_rectangle(self.x, self.y, self.x + self.width, self.y + self.height, 
-                                fill=self.color, outline=outline, width=2, tags="component")
-        
+        self.body = self.draw_body(canvas)
+
         # Draw label
-        canvas.create_text(self.x + self.width/2, self.y + self.height/2, text=self.component.name)
+        canvas.create_text(self.x + self.width/2, self.y + self.height/2, text=self.component.name, tags=self.tag)
 
         # Draw input nodes
         input_spacing = self.height / (len(self.component.inputs) + 1)
@@ -37,13 +59,62 @@ class GuiComponent:
             nx = self.x + self.width
             self.draw_node(canvas, nx, ny, node)
 
+        self.update()
+
+    def draw_body(self, canvas):
+        return canvas.create_rectangle(self.x, self.y, self.x + self.width, self.y + self.height,
+                                       fill=self.color, width=2, tags=("component", self.tag))
+
     def draw_node(self, canvas, x, y, node):
         r = 4
-        color = "red" if node.value else "black"
         # Store coordinates in node for wire drawing
         node.gui_x = x
         node.gui_y = y
-        canvas.create_oval(x - r, y - r, x + r, y + r, fill=color, tags="node")
+        self.node_items[node] = canvas.create_oval(x - r, y - r, x + r, y + r, tags=("node", self.tag))
+
+    def update(self):
+        # Push state changes to the existing items, skipping options that didn't change
+        self.configure(self.body, fill=self.body_fill(), outline="blue" if self.selected else "black")
+        for node, item in self.node_items.items():
+            self.configure(item, fill="red" if self.value(node) else "black")
+
+    def body_fill(self):
+        return self.color if self.heat is None else heat_color(self.heat)
+
+    def value(self, node):
+        if self.values is None:
+            return node.value
+        return self.values.get(node, False)
+
+    def configure(self, item, **options):
+        drawn = self._drawn.setdefault(item, {})
+        changed = {key: value for key, value in options.items() if drawn.get(key) != value}
+        if changed:
+            self.canvas.itemconfig(item, **changed)
+            drawn.update(changed)
+
+    def erase(self):
+        if self.index is not None:
+            self.index.remove(self)
+            for node in self.node_items:
+                self.index.remove(node)
+            self.index = None
+        if self.canvas is not None:
+            self.canvas.delete(self.tag)
+            self.canvas = None
+            self.node_items = {}
+            self._drawn = {}
+
+    def register(self, index):
+        # Track the body and nodes in a SpatialGrid; move() keeps it current (call after draw())
+        self.index = index
+        self.update_index()
+
+    def update_index(self):
+        self.index.insert(self, self.x, self.y, self.x + self.width, self.y + self.height)
+        r = NODE_HIT_RADIUS
+        for node in self.node_items:
+            self.index.insert(node, node.gui_x - r, node.gui_y - r, node.gui_x + r, node.gui_y + r)
 
     def contains(self, x, y):
         return self.x <= x <= self.x + self.width and self.y <= y <= self.y + self.height
@@ -52,35 +123,107 @@ class GuiComponent:
         self.x += dx
         self.y += dy
         self.component.position = (self.x, self.y)
+        for node in self.node_items:
+            node.gui_x += dx
+            node.gui_y += dy
+        if self.canvas is not None:
+            self.canvas.move(self.tag, dx, dy)
+        if self.index is not None:
+            self.update_index()
 
 class SwitchGui(GuiComponent):
     def __init__(self, component, x, y):
         super().__init__(component, x, y)
         self.color = "white"
+        self.state_text = None
 
     def draw(self, canvas: tk.Canvas):
+        if self.canvas is None:
+            # Draw toggle state
+            self.state_text = canvas.create_text(self.x + self.width/2, self.y + self.height + 10, tags=self.tag)
         super().draw(canvas)
-        # Draw toggle state
-        state_text = "ON" if self.component.is_on else "OFF"
-        canvas.create_text(self.x + self.width/2, self.y + self.height + 10, text=state_text)
+
+    def update(self):
+        super().update()
+        self.configure(self.state_text, text="ON" if self.value(self.component.outputs["Q"]) else "OFF")
 
 class BulbGui(GuiComponent):
     def __init__(self, component, x, y):
         super().__init__(component, x, y)
-    
+
+    def draw_body(self, canvas):
+        # Bulb usually has 1 input, drawn at mid-height like any single input
+        return canvas.create_oval(self.x, self.y, self.x + self.width, self.y + self.height,
+                                  width=2, tags=("component", self.tag))
+
+    def body_fill(self):
+        # Always shows the bulb's state, even under the profiling overlay
+        return "yellow" if self.value(self.component.inputs["A"]) else "gray"
+
+class BusIoGui(GuiComponent):
+    # BusSwitch or BusBulb, with its word shown in hex below the body
+    def __init__(self, component, x, y):
+        super().__init__(component, x, y)
+        self.color = "white" if isinstance(component, BusSwitch) else "lightyellow"
+        self.value_text = None
+        self.port = next(iter((component.outputs if isinstance(component, BusSwitch) else component.inputs).values()))
+
     def draw(self, canvas: tk.Canvas):
-        # Draw body
-        color = "yellow" if self.component.is_lit else "gray"
-        outline = "blue" if self.selected else "black"
-        canvas.create_oval(self.x, self.y, self.x + self.width, self.y + self.height, 
-                           fill=color, outline=outline, width=2, tags="component")
-        
-        # Draw label
-        canvas.create_text(self.x + self.width/2, self.y + self.height/2, text=self.component.name)
+        if self.canvas is None:
+            self.value_text = canvas.create_text(self.x + self.width/2, self.y + self.height + 10, tags=self.tag)
+        super().draw(canvas)
 
-        # Draw input nodes (Bulb usually has 1 input)
-        if "A" in self.component.inputs:
-            node = self.component.inputs["A"]
-            ny = self.y + self.height / 2
-            nx = self.x
-            self.draw_node(canvas, nx, ny, node)
+    def update(self):
+        super().update()
+        digits = (self.component.width + 3) // 4
+        self.configure(self.value_text, text=f"0x{int(self.value(self.port)):0{digits}X}")
+
+class VirtualTable(tk.Frame):
+    # Treeview over `total` rows that only holds one screen of items; fetch(start, stop) returns
+    # the rows to show, so tables with millions of rows never exist in memory at once
+    ROW_HEIGHT = 20
+
+    def __init__(self, master, headers, total, fetch):
+        super().__init__(master)
+        self.total = total
+        self.fetch = fetch
+        self.first = 0
+        self.tree = ttk.Treeview(self, columns=headers, show="headings", selectmode="none")
+        for h in headers:
+            self.tree.heading(h, text=h)
+            self.tree.column(h, width=80, anchor="center")
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.items = [] # Reused Treeview items, one per visible row
+
+        self.tree.bind("<Configure>", lambda event: self.show(self.first))
+        self.tree.bind("<MouseWheel>", lambda event: self.show(self.first - event.delta // 120 * 3))
+        self.tree.bind("<Button-4>", lambda event: self.show(self.first - 3))
+        self.tree.bind("<Button-5>", lambda event: self.show(self.first + 3))
+
+    def visible_rows(self):
+        # Rows that fit below the heading
+        return max(1, self.tree.winfo_height() // self.ROW_HEIGHT - 1)
+
+    def on_scroll(self, action, amount, unit=None):
+        count = self.visible_rows()
+        if action == tk.MOVETO:
+            self.show(int(float(amount) * self.total))
+        elif unit == tk.PAGES:
+            self.show(self.first + int(amount) * count)
+        else:
+            self.show(self.first + int(amount))
+
+    def show(self, first):
+        count = min(self.visible_rows(), self.total)
+        self.first = max(0, min(first, self.total - count))
+        rows = self.fetch(self.first, self.first + count)
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert("", tk.END))
+        while len(self.items) > len(rows):
+            self.tree.delete(self.items.pop())
+        for item, row in zip(self.items, rows):
+            self.tree.item(item, values=row)
+        if self.total:
+            self.scrollbar.set(self.first / self.total, (self.first + len(rows)) / self.total)
@@ -1,101 +1,238 @@
-import uuid
+import contextlib
+import hashlib
+import heapq
+import itertools
+import operator
+import time
+from collections import namedtuple
+from collections.abc import Mapping
+
+# NumPy is optional and imported by evaluate_batch on first use, since importing it takes longer
+# than starting everything else (see runner.py)
+np = None
+_numpy_checked = False
+
+def _load_numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy as np
+        except ImportError: # evaluate_batch falls back to bit-sliced Python ints
+            np = None
+    return np
+
+_next_id = itertools.count(1) # Monotonic ids shared by Nodes and Components
 
 class Node:
+    __slots__ = ("id", "component", "name", "is_input", "value", "connections", "net", "gui_x", "gui_y")
+    width = 1 # Bits carried; BusNode overrides it per node
+
     def __init__(self, component, name, is_input=False):
-        self.id = str(uuid.uuid4())
+        self.id = next(_next_id)
         self.component = component
         self.name = name
         self.is_input = is_input
         self.value = False
-        self.connections = [] # List of connected Nodes
+        self.connections = () # Connected Nodes; becomes a set on the first connect
+        self.net = None # Net this node belongs to, maintained by Circuit
 
     def connect(self, other_node):
         if other_node not in self.connections:
-            self.connections.append(other_node)
-            other_node.connections.append(self)
+            if not self.connections:
+                self.connections = set()
+            if not other_node.connections:
+                other_node.connections = set()
+            self.connections.add(other_node)
+            other_node.connections.add(self)
 
     def disconnect(self, other_node):
         if other_node in self.connections:
-            self.connections.remove(other_node)
-            other_node.connections.remove(self)
+            self.connections.discard(other_node)
+            other_node.connections.discard(self)
+
+class BusNode(Node):
+    # Node carrying an int of `width` bits instead of a bool
+    __slots__ = ("width",)
+
+    def __init__(self, component, name, is_input=False, width=1):
+        super().__init__(component, name, is_input)
+        self.width = width
+        self.value = 0
+
+class Net:
+    # Nodes joined by wires: output Nodes drive it, input Nodes are its sinks
+    __slots__ = ("drivers", "sinks", "driver")
+
+    def __init__(self):
+        self.drivers = set()
+        self.sinks = set()
+        self.driver = None # The single driver, or None if undriven or in conflict
+
+    @property
+    def conflict(self):
+        return len(self.drivers) > 1
+
+    def nodes(self):
+        return self.drivers | self.sinks
+
+    def _add(self, node):
+        node.net = self
+        if node.is_input:
+            self.sinks.add(node)
+        else:
+            self.drivers.add(node)
+            self._update_driver()
+
+    def _remove(self, node):
+        node.net = None
+        if node.is_input:
+            self.sinks.discard(node)
+        else:
+            self.drivers.discard(node)
+            self._update_driver()
+
+    def _update_driver(self):
+        self.driver = next(iter(self.drivers)) if len(self.drivers) == 1 else None
+
+class Ports(Mapping):
+    # Read-only name -> Node view over a component's port tuple
+    __slots__ = ("_nodes",)
+
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def __getitem__(self, name):
+        for node in self._nodes:
+            if node.name == name:
+                return node
+        raise KeyError(name)
+
+    def __iter__(self):
+        return (node.name for node in self._nodes)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def values(self):
+        return self._nodes
+
+    def items(self):
+        return [(node.name, node) for node in self._nodes]
 
 class Component:
-    def __init__(self, name="Component"):
-        self.id = str(uuid.uuid4())
+    __slots__ = ("id", "name", "_inputs", "_outputs", "position", "delay")
+    op = None # Opcode used by compiled evaluation, None for components that aren't plain gates
+
+    def __init__(self, name="Component", delay=0):
+        self.id = next(_next_id)
         self.name = name
-        self.inputs = {}
-        self.outputs = {}
+        self.delay = delay # Propagation delay in time units, used by timing.TimedSimulator
+        self._inputs = () # Input Nodes in port order
+        self._outputs = () # Output Nodes in port order
         self.position = (0, 0)
 
-    def add_input(self, name):
-        self.inputs[name] = Node(self, name, is_input=True)
+    @property
+    def inputs(self):
+        return Ports(self._inputs)
+
+    @property
+    def outputs(self):
+        return Ports(self._outputs)
+
+    def add_input(self, name, width=None):
+        # A width makes it a BusNode, even for 1 bit (the value is then 0 or 1 rather than a bool)
+        node = Node(self, name, True) if width is None else BusNode(self, name, True, width)
+        self._inputs += (node,)
 
-    def add_output(self, name):
-        self.outputs[name] = Node(self, name, is_input=False)
+    def add_output(self, name, width=None):
+        node = Node(self, name, False) if width is None else BusNode(self, name, False, width)
+        self._outputs += (node,)
 
     def evaluate(self):
         pass
 
+    def copy(self):
+        # Unwired component of the same type and settings
+        clone = type(self)()
+        clone.name = self.name
+        clone.delay = self.delay
+        clone.position = self.position
+        return clone
+
 class AndGate(Component):
-    def __init__(self):
-        super().__init__("AND")
+    __slots__ = ()
+    op = "AND"
+
+    def __init__(self, delay=1):
+        super().__init__("AND", delay)
         self.add_input("A")
         self.add_input("B")
         self.add_output("Q")
 
     def evaluate(self):
-        a = self.inputs["A"].value
-        b = self.inputs["B"].value
-        self.outputs["Q"].value = a and b
+        a, b = self._inputs
+        self._outputs[0].value = a.value and b.value
 
 class OrGate(Component):
-    def __init__(self):
-        super().__init__("OR")
+    __slots__ = ()
+    op = "OR"
+
+    def __init__(self, delay=1):
+        super().__init__("OR", delay)
         self.add_input("A")
         self.add_input("B")
         self.add_output("Q")
 
     def evaluate(self):
-        a = self.inputs["A"].value
-        b = self.inputs["B"].value
-        self.outputs["Q"].value = a or b
+        a, b = self._inputs
+        self._outputs[0].value = a.value or b.value
 
 class NotGate(Component):
-    def __init__(self):
-        super().__init__("NOT")
+    __slots__ = ()
+    op = "NOT"
+
+    def __init__(self, delay=1):
+        super().__init__("NOT", delay)
         self.add_input("A")
         self.add_output("Q")
 
     def evaluate(self):
-        self.outputs["Q"].value = not self.inputs["A"].value
+        self._outputs[0].value = not self._inputs[0].value
 
 class XorGate(Component):
-    def __init__(self):
-        super().__init__("XOR")
+    __slots__ = ()
+    op = "XOR"
+
+    def __init__(self, delay=1):
+        super().__init__("XOR", delay)
         self.add_input("A")
         self.add_input("B")
         self.add_output("Q")
 
     def evaluate(self):
-        a = self.inputs["A"].value
-        b = self.inputs["B"].value
-        self.outputs["Q"].value = a != b
+        a, b = self._inputs
+        self._outputs[0].value = a.value != b.value
 
 class NandGate(Component):
-    def __init__(self):
-        super().__init__("NAND")
+    __slots__ = ()
+    op = "NAND"
+
+    def __init__(self, delay=1):
+        super().__init__("NAND", delay)
         self.add_input("A")
         self.add_input("B")
         self.add_output("Q")
 
     def evaluate(self):
-        a = self.inputs["A"].value
-        b = self.inputs["B"].value
-        self.outputs["Q"].value = not (a and b)
+        a, b = self._inputs
+        self._outputs[0].value = not (a.value and b.value)
 
 class Switch(Component):
-    def __init__(self):
-        super().__init__("Switch")
+    __slots__ = ("is_on",)
+
+    def __init__(self, delay=0):
+        super().__init__("Switch", delay)
         self.add_output("Q")
         self.is_on = False
 
@@ -108,81 +245,1125 @@ class Switch(Component):
         self.evaluate()
 
     def evaluate(self):
-        self.outputs["Q"].value = self.is_on
+        self._outputs[0].value = self.is_on
+
+    def copy(self):
+        clone = super().copy()
+        clone.set_state(self.is_on)
+        return clone
 
 class Bulb(Component):
-    def __init__(self):
-        super().__init__("Bulb")
+    __slots__ = ("is_lit",)
+
+    def __init__(self, delay=0):
+        super().__init__("Bulb", delay)
         self.add_input("A")
         self.is_lit = False
 
     def evaluate(self):
-        self.is_lit = self.inputs["A"].value
+        self.is_lit = self._inputs[0].value
+
+class SubCircuit(Component):
+    # A combinational Circuit used as a component: one input per Switch and one output per Bulb of
+    # the definition, named after them. Instances with structurally identical definitions share a
+    # single Block; the definition shouldn't be edited once instantiated.
+    __slots__ = ("definition", "block")
+
+    def __init__(self, definition, name="SUB", delay=1):
+        super().__init__(name, delay)
+        self.definition = definition
+        self.block = Block.for_definition(definition)
+        for switch in self.block.switches:
+            self.add_input(switch.name)
+        for bulb in self.block.bulbs:
+            self.add_output(bulb.name)
+
+    def evaluate(self):
+        outputs = self.block.evaluate([node.value for node in self._inputs])
+        for node, value in zip(self._outputs, outputs):
+            node.value = value
+
+    def copy(self):
+        clone = type(self)(self.definition, self.name, self.delay)
+        clone.position = self.position
+        return clone
+
+MAX_WIDTH = 64 # Widest bus
+
+class BusComponent(Component):
+    # Base for components working on buses of `width` bits, with int values
+    __slots__ = ("width",)
+
+    def __init__(self, name, width, delay=0):
+        if not 1 <= width <= MAX_WIDTH:
+            raise ValueError(f"Bus width must be from 1 to {MAX_WIDTH}, got {width}")
+        super().__init__(name, delay)
+        self.width = width
+
+    def copy(self):
+        clone = type(self)(self.width)
+        clone.name = self.name
+        clone.delay = self.delay
+        clone.position = self.position
+        return clone
+
+class BusGate(BusComponent):
+    # Bitwise gate over whole words: one evaluate() per word instead of one gate per bit
+    __slots__ = ()
+    word_op = None # BIT_OPS opcode
+
+    def __init__(self, width=8, delay=1):
+        super().__init__(f"{self.word_op}{width}", width, delay)
+        self.add_input("A", width)
+        if self.word_op != "NOT":
+            self.add_input("B", width)
+        self.add_output("Q", width)
+
+    def evaluate(self):
+        a = self._inputs[0].value
+        b = self._inputs[-1].value
+        self._outputs[0].value = BIT_OPS[self.word_op](a, b, (1 << self.width) - 1)
+
+class BusAndGate(BusGate):
+    __slots__ = ()
+    word_op = "AND"
+
+class BusOrGate(BusGate):
+    __slots__ = ()
+    word_op = "OR"
+
+class BusNotGate(BusGate):
+    __slots__ = ()
+    word_op = "NOT"
+
+class BusXorGate(BusGate):
+    __slots__ = ()
+    word_op = "XOR"
+
+class BusNandGate(BusGate):
+    __slots__ = ()
+    word_op = "NAND"
+
+class BusAdder(BusComponent):
+    # A + B + CIN on `width`-bit words: S is the low `width` bits, COUT the carry out
+    __slots__ = ()
+
+    def __init__(self, width=8, delay=1):
+        super().__init__(f"ADD{width}", width, delay)
+        self.add_input("A", width)
+        self.add_input("B", width)
+        self.add_input("CIN")
+        self.add_output("S", width)
+        self.add_output("COUT")
+
+    def evaluate(self):
+        a, b, carry = self._inputs
+        total = a.value + b.value + carry.value
+        self._outputs[0].value = total & ((1 << self.width) - 1)
+        self._outputs[1].value = bool(total >> self.width)
+
+class Splitter(BusComponent):
+    # Bus input A -> one plain output per bit, "0" (least significant) to str(width - 1)
+    __slots__ = ()
+
+    def __init__(self, width=8, delay=0):
+        super().__init__("SPLIT", width, delay)
+        self.add_input("A", width)
+        for i in range(width):
+            self.add_output(str(i))
+
+    def evaluate(self):
+        value = self._inputs[0].value
+        for i, node in enumerate(self._outputs):
+            node.value = bool(value >> i & 1)
+
+class Merger(BusComponent):
+    # One plain input per bit, "0" (least significant) to str(width - 1) -> bus output Q
+    __slots__ = ()
+
+    def __init__(self, width=8, delay=0):
+        super().__init__("MERGE", width, delay)
+        for i in range(width):
+            self.add_input(str(i))
+        self.add_output("Q", width)
+
+    def evaluate(self):
+        value = 0
+        for i, node in enumerate(self._inputs):
+            if node.value:
+                value |= 1 << i
+        self._outputs[0].value = value
+
+class BusSwitch(BusComponent):
+    # Input word set from outside, like Switch
+    __slots__ = ("value",)
+
+    def __init__(self, width=8, delay=0):
+        super().__init__("BusSwitch", width, delay)
+        self.add_output("Q", width)
+        self.value = 0
+
+    def set_value(self, value):
+        self.value = value & ((1 << self.width) - 1)
+        self.evaluate()
+
+    def evaluate(self):
+        self._outputs[0].value = self.value
+
+    def copy(self):
+        clone = super().copy()
+        clone.set_value(self.value)
+        return clone
+
+class BusBulb(BusComponent):
+    # Shows the word on its input, like Bulb
+    __slots__ = ("value",)
+
+    def __init__(self, width=8, delay=0):
+        super().__init__("BusBulb", width, delay)
+        self.add_input("A", width)
+        self.value = 0
+
+    def evaluate(self):
+        self.value = self._inputs[0].value
+
+class Clock(Component):
+    # Square wave source: tick() flips it every `half_period` ticks. SimulationWorker ticks every Clock
+    # once per simulate(); cycles.CycleSimulator runs whole clock cycles instead.
+    __slots__ = ("is_on", "half_period", "count")
+
+    def __init__(self, half_period=10, delay=0):
+        super().__init__("Clock", delay)
+        self.add_output("Q")
+        self.is_on = False
+        self.half_period = half_period
+        self.count = 0 # Ticks since the last flip
+
+    def tick(self):
+        self.count += 1
+        if self.count >= self.half_period:
+            self.count = 0
+            self.set_state(not self.is_on)
+
+    def set_state(self, state):
+        self.is_on = state
+        self.evaluate()
+
+    def evaluate(self):
+        self._outputs[0].value = self.is_on
+
+    def copy(self):
+        clone = type(self)(self.half_period)
+        clone.name = self.name
+        clone.delay = self.delay
+        clone.position = self.position
+        clone.set_state(self.is_on)
+        return clone
+
+class DFlipFlop(Component):
+    # Rising-edge D flip-flop: Q takes D when CLK goes from low to high, QN is its inverse
+    __slots__ = ("state", "clock")
+
+    def __init__(self, delay=1):
+        super().__init__("DFF", delay)
+        self.add_input("D")
+        self.add_input("CLK")
+        self.add_output("Q")
+        self.add_output("QN")
+        self.state = False
+        self.clock = False # CLK as seen by the last evaluate(), to detect edges
+
+    def set_state(self, state):
+        self.state = state
+        self.evaluate()
+
+    def latch(self):
+        # Takes D on a rising CLK without touching the outputs. Circuit.step() latches flip-flops and
+        # Registers as their turn comes and publishes Q only once the pass has run out of other work,
+        # so none of them sees another's new Q on the same edge, however the clock reaches CLK.
+        d, clk = self._inputs
+        if clk.value and not self.clock:
+            self.state = d.value
+        self.clock = clk.value
+
+    def evaluate(self):
+        self.latch()
+        q, qn = self._outputs
+        q.value = self.state
+        qn.value = not self.state
+
+    def copy(self):
+        clone = super().copy()
+        clone.set_state(self.state)
+        clone.clock = self.clock
+        return clone
+
+class Register(BusComponent):
+    # Rising-edge register of `width` bits: Q takes the D word when CLK goes from low to high
+    __slots__ = ("value", "clock")
+
+    def __init__(self, width=8, delay=1):
+        super().__init__(f"REG{width}", width, delay)
+        self.add_input("D", width)
+        self.add_input("CLK")
+        self.add_output("Q", width)
+        self.value = 0
+        self.clock = False
+
+    def set_value(self, value):
+        self.value = value & ((1 << self.width) - 1)
+        self.evaluate()
+
+    def latch(self):
+        # As DFlipFlop.latch()
+        d, clk = self._inputs
+        if clk.value and not self.clock:
+            self.value = d.value
+        self.clock = clk.value
+
+    def evaluate(self):
+        self.latch()
+        self._outputs[0].value = self.value
+
+    def copy(self):
+        clone = super().copy()
+        clone.set_value(self.value)
+        clone.clock = self.clock
+        return clone
+
+# Opcode -> function of the (a, b) operand values; unary ops ignore b
+BOOL_OPS = {
+    "AND": operator.and_,
+    "OR": operator.or_,
+    "NOT": lambda a, b: not a,
+    "XOR": operator.xor,
+    "NAND": lambda a, b: not (a and b),
+}
+
+# Bit-sliced versions: every value is an int whose bit k belongs to input vector k
+BIT_OPS = {
+    "AND": lambda a, b, mask: a & b,
+    "OR": lambda a, b, mask: a | b,
+    "NOT": lambda a, b, mask: a ^ mask,
+    "XOR": lambda a, b, mask: a ^ b,
+    "NAND": lambda a, b, mask: (a & b) ^ mask,
+}
+
+# Python spelling of each opcode for generated code; works on bools (mask=True) and on bit-sliced
+# ints (mask=all ones)
+SOURCE_OPS = {
+    "AND": "{a} & {b}",
+    "OR": "{a} | {b}",
+    "NOT": "{a} ^ mask",
+    "XOR": "{a} ^ {b}",
+    "NAND": "({a} & {b}) ^ mask",
+}
+
+CODEGEN_CACHE = 64 # Generated functions kept for reuse by structurally identical circuits
+
+def run_program_bits(program, values, mask):
+    # Runs a compiled (op, out, a, b) program in place over bit-sliced values
+    for op, out, a, b in program:
+        values[out] = BIT_OPS[op](values[a], values[b], mask)
+    return values
+
+# NumPy versions, applied to uint8 arrays holding 8 packed input vectors per byte
+NUMPY_OPS = {
+    "AND": lambda a, b: a & b,
+    "OR": lambda a, b: a | b,
+    "NOT": lambda a, b: ~a,
+    "XOR": lambda a, b: a ^ b,
+    "NAND": lambda a, b: ~(a & b),
+}
+
+BATCH_CHUNK = 1 << 13 # Packed bytes (8 vectors each) evaluated per pass, bounds memory per slot
+
+class CompiledCircuit:
+    def __init__(self, switches, bulbs, slots, program, size, constants=None):
+        self.switches = switches # Switch components, in circuit order
+        self.bulbs = bulbs # Bulb components, in circuit order
+        self.slots = slots # Node -> index into values; wired inputs share their driver's slot
+        self.program = program # List of (op, out, a, b) in topological order
+        self.inputs = [slots[s.outputs["Q"]] for s in switches]
+        self.outputs = [slots[b.inputs["A"]] for b in bulbs]
+        self.values = [False] * size
+        for node, slot in slots.items():
+            self.values[slot] = node.value
+        for slot, value in (constants or {}).items():
+            self.values[slot] = value # Slots without a Node, e.g. inside inlined subcircuits
+        self._bound = [(BOOL_OPS[op], out, a, b) for op, out, a, b in program]
+        self.function = None # Generated by Circuit.codegen(); evaluate() uses it when present
+
+    def constants(self):
+        # Slot -> value for slots the program reads but never writes, e.g. unwired gate inputs
+        written = set(self.inputs)
+        written.update(out for op, out, a, b in self.program)
+        return {slot: value for slot, value in enumerate(self.values) if slot not in written}
+
+    def source(self, name="evaluate"):
+        # Straight-line Python: one local per net in program order, constants folded in as mask/zero.
+        #     evaluate(switch_values, mask=True) -> bulb values
+        constants = self.constants()
+
+        def ref(slot):
+            if slot in constants:
+                return "mask" if constants[slot] else "zero"
+            return f"n{slot}"
+
+        lines = [f"def {name}(inputs, mask=True):", "    zero = mask ^ mask"]
+        if self.inputs:
+            lines.append("    " + "".join(f"n{slot}, " for slot in self.inputs) + "= inputs")
+        for op, out, a, b in self.program:
+            lines.append(f"    n{out} = " + SOURCE_OPS[op].format(a=ref(a), b=ref(b)))
+        lines.append("    return (" + "".join(ref(slot) + ", " for slot in self.outputs) + ")")
+        return "\n".join(lines) + "\n"
+
+    def run(self, values):
+        # Single pass over the levelized program, in place
+        for fn, out, a, b in self._bound:
+            values[out] = fn(values[a], values[b])
+        return values
+
+    def evaluate_bits(self, switch_words, width):
+        # Evaluate `width` input vectors at once; bit k of each word is vector k
+        mask = (1 << width) - 1
+        values = [mask if value else 0 for value in self.values]
+        for slot, word in zip(self.inputs, switch_words):
+            values[slot] = word
+        return run_program_bits(self.program, values, mask)
+
+    def evaluate_batch(self, inputs, packed=False):
+        # inputs: one row per vector, one column per switch (self.switches order)
+        # With packed=True, inputs is a uint8 array packed along the vector axis (np.packbits(axis=0))
+        # and the result is packed the same way
+        if _load_numpy() is None:
+            if packed:
+                raise ValueError("Packed batches require NumPy")
+            return self._evaluate_rows(inputs)
+
+        if packed:
+            return self._evaluate_packed(np.asarray(inputs, dtype=np.uint8))
+        rows = np.asarray(inputs).astype(bool, copy=False)
+        if rows.ndim != 2 or rows.shape[1] != len(self.switches):
+            raise ValueError(f"Expected a 2-D array with {len(self.switches)} columns, got shape {rows.shape}")
+        result = self._evaluate_packed(np.packbits(rows, axis=0))
+        return np.unpackbits(result, axis=0, count=rows.shape[0]).astype(bool)
+
+    def _evaluate_packed(self, columns):
+        if columns.ndim != 2 or columns.shape[1] != len(self.switches):
+            raise ValueError(f"Expected a 2-D array with {len(self.switches)} columns, got shape {columns.shape}")
+        ones = np.uint8(0xFF)
+        zero = np.uint8(0)
+        constants = [ones if value else zero for value in self.values]
+        ops = [(NUMPY_OPS[op], out, a, b) for op, out, a, b in self.program]
+        result = np.empty((columns.shape[0], len(self.bulbs)), dtype=np.uint8)
+        for start in range(0, columns.shape[0], BATCH_CHUNK):
+            chunk = columns[start:start + BATCH_CHUNK]
+            values = list(constants)
+            for i, slot in enumerate(self.inputs):
+                values[slot] = chunk[:, i]
+            for fn, out, a, b in ops:
+                values[out] = fn(values[a], values[b])
+            for i, slot in enumerate(self.outputs):
+                result[start:start + len(chunk), i] = values[slot]
+        return result
+
+    def _evaluate_rows(self, rows, width=4096):
+        # Pure-Python path: pack `width` rows into each int and evaluate bit-sliced
+        rows = [tuple(row) for row in rows]
+        result = []
+        for start in range(0, len(rows), width):
+            chunk = rows[start:start + width]
+            words = [0] * len(self.switches)
+            for k, row in enumerate(chunk):
+                for i, value in enumerate(row):
+                    if value:
+                        words[i] |= 1 << k
+            values = self.evaluate_bits(words, len(chunk))
+            columns = [format(values[slot], f"0{len(chunk)}b")[::-1] for slot in self.outputs]
+            if not columns:
+                result.extend(() for _ in chunk)
+            result.extend(tuple(bit == "1" for bit in bits) for bits in zip(*columns))
+        return result
+
+    def evaluate(self, switch_values):
+        # Pure function: switch values (in self.switches order) -> bulb values
+        if self.function is not None:
+            return self.function([bool(value) for value in switch_values])
+        values = list(self.values)
+        for slot, value in zip(self.inputs, switch_values):
+            values[slot] = bool(value)
+        self.run(values)
+        return tuple(values[slot] for slot in self.outputs)
+
+TABLE_INPUTS = 10 # Blocks with up to this many inputs are tabulated: evaluation is one lookup
+BLOCK_CACHE = 256 # Blocks kept for new instances of identical definitions; existing instances keep theirs
+
+class Block:
+    # Compiled form of a subcircuit definition, memoized by the definition's structural hash
+    _cache = {} # Structural hash -> Block, least recently used first
+
+    def __init__(self, definition):
+        self.compiled = definition.compile() # Raises ValueError for feedback loops
+        self.switches = self.compiled.switches
+        self.bulbs = self.compiled.bulbs
+        self.table = None
+        count = len(self.switches)
+        if count <= TABLE_INPUTS:
+            # Every input combination at once, bit-sliced; the first input is the most significant bit
+            width = 1 << count
+            mask = (1 << width) - 1
+            words = []
+            for j in range(count):
+                run = 1 << (count - 1 - j)
+                words.append((((1 << run) - 1) << run) * (mask // ((1 << (2 * run)) - 1)))
+            values = self.compiled.evaluate_bits(words, width)
+            columns = [values[slot] for slot in self.compiled.outputs]
+            self.table = [tuple(bool((word >> k) & 1) for word in columns) for k in range(width)]
+        else:
+            definition.codegen() # Sets self.compiled.function, so evaluate() runs straight-line code
+
+    @classmethod
+    def for_definition(cls, definition):
+        key = definition.structural_hash()
+        block = cls._cache.pop(key, None)
+        if block is None:
+            block = cls(definition)
+            if len(cls._cache) >= BLOCK_CACHE:
+                del cls._cache[next(iter(cls._cache))]
+        cls._cache[key] = block # Re-inserted: most recently used last
+        return block
+
+    @classmethod
+    def clear_cache(cls):
+        # Forget every cached Block, e.g. between tests; instances created so far keep theirs
+        cls._cache.clear()
+
+    def evaluate(self, values):
+        # Input values in Switch order -> tuple of output values in Bulb order
+        if self.table is None:
+            return self.compiled.evaluate(values)
+        index = 0
+        for value in values:
+            index = index << 1 | bool(value)
+        return self.table[index]
+
+# Outcome of Circuit.simulate(): status is STABLE, OSCILLATING (with the loop's period in ticks)
+# or BUDGET_EXCEEDED; ticks is how many steps ran
+SimulationResult = namedtuple("SimulationResult", ["status", "ticks", "period"])
+STABLE = "stable"
+OSCILLATING = "oscillating"
+BUDGET_EXCEEDED = "budget exceeded"
 
 class Circuit:
+    _generated = {} # (structural hash, constant slots) -> function from codegen(), oldest first
+
     def __init__(self):
         self.components = []
-        self.wires = [] # List of tuples (node1, node2)
+        self.wires = {} # (node1, node2) -> None, an insertion-ordered set of wires
+        self.nets = set()
+        self.conflicts = set() # Nets with more than one driver; they don't propagate
+        self._sources = [] # Components without inputs (e.g. switches), polled every step
+        self._source_values = {} # Source output Node -> value last seen by step()
+        self._clocked = set() # DFlipFlops and Registers, whose outputs step() publishes last
+        self._pending = set() # Components waiting to be evaluated
+        self._dirty = set() # Nets whose driver value still has to be pushed to the sinks
+        self._revision = 0 # Bumped on every structural change
+        self._compiled = None
+        self._analysis = None
+        self._structure = None
+        self._changes = None # Nodes whose value changed, once track_changes() is on
+        self.evaluations = 0 # Components evaluated by step() so far
+        self.profile = None # profiler.Profile collecting per-component activity, see profiling()
+
+    @property
+    def revision(self):
+        # Changes whenever components or wires are added or removed
+        return self._revision
+
+    @classmethod
+    def from_netlist(cls, components, wires):
+        # Bulk construction: same result as add_component/add_wire for each item, without the
+        # per-call duplicate checks and net merging. The wires must be distinct and the components
+        # not wired into any other circuit.
+        circuit = cls()
+        circuit.components = list(components)
+        circuit._sources = [component for component in circuit.components if not component._inputs]
+        circuit._clocked = {component for component in circuit.components
+                            if isinstance(component, (DFlipFlop, Register))}
+        circuit._pending = set(circuit.components)
+        circuit.wires = dict.fromkeys(wires)
+
+        for node1, node2 in circuit.wires:
+            if not node1.connections:
+                node1.connections = set()
+            if not node2.connections:
+                node2.connections = set()
+            node1.connections.add(node2)
+            node2.connections.add(node1)
+
+        # Each connected group of wired nodes is a net
+        nets = []
+        for wire in circuit.wires:
+            for start in wire:
+                if start.net is not None:
+                    continue
+                net = Net()
+                start.net = net
+                group = [start]
+                for node in group: # Grows while iterating: a breadth-first walk
+                    for other in node.connections:
+                        if other.net is None:
+                            other.net = net
+                            group.append(other)
+                for node in group:
+                    (net.sinks if node.is_input else net.drivers).add(node)
+                net._update_driver()
+                nets.append(net)
+        circuit.nets = set(nets)
+        for net in circuit.nets:
+            circuit._check_conflict(net)
+        circuit._dirty = set(circuit.nets)
+        circuit._revision += 1
+        return circuit
 
     def add_component(self, component):
         self.components.append(component)
+        self._revision += 1
+        if not component._inputs:
+            self._sources.append(component)
+        if isinstance(component, (DFlipFlop, Register)):
+            self._clocked.add(component)
+        self._pending.add(component)
 
     def remove_component(self, component):
         if component in self.components:
             self.components.remove(component)
+            self._revision += 1
+            if component in self._sources:
+                self._sources.remove(component)
+                for node in component._outputs:
+                    self._source_values.pop(node, None)
+            self._clocked.discard(component)
+            self._pending.discard(component)
             # Disconnect all nodes
-            for node in list(component.inputs.values()) + list(component.outputs.values()):
+            for node in component._inputs + component._outputs:
                 for connected_node in list(node.connections):
                     self.remove_wire(node, connected_node)
 
     def add_wire(self, node1, node2):
-        # Basic validation: Don't connect input to input or output to output (though some logic allows it, let's be strict for now or lenient?)
-        # Let's allow output to input.
-        # Also check if already connected
-        if (node1, node2) not in self.wires and (node2, node1) not in self.wires:
-            node1.connect(node2)
-            self.wires.append((node1, node2))
+        # Wires join nodes into nets; a net with two output nodes is reported in self.conflicts
+        if (node1, node2) in self.wires or (node2, node1) in self.wires:
+            return
+        if node1.width != node2.width:
+            raise ValueError(f"Cannot wire a {node1.width}-bit node to a {node2.width}-bit node")
+        node1.connect(node2)
+        self.wires[(node1, node2)] = None
+        self._revision += 1
+
+        net1 = node1.net
+        net2 = node2.net
+        if net1 is None and net2 is None:
+            net = Net()
+            self.nets.add(net)
+            net._add(node1)
+            net._add(node2)
+        elif net2 is None:
+            net = net1
+            net._add(node2)
+        elif net1 is None:
+            net = net2
+            net._add(node1)
+        elif net1 is not net2:
+            # Merge the smaller net into the larger one
+            if len(net1.drivers) + len(net1.sinks) < len(net2.drivers) + len(net2.sinks):
+                net1, net2 = net2, net1
+            for node in net2.nodes():
+                net1._add(node)
+            self._discard_net(net2)
+            net = net1
+        else:
+            net = net1
+        self._check_conflict(net)
+        self._dirty.add(net)
 
     def remove_wire(self, node1, node2):
         if (node1, node2) in self.wires:
-            self.wires.remove((node1, node2))
-            node1.disconnect(node2)
+            del self.wires[(node1, node2)]
         elif (node2, node1) in self.wires:
-            self.wires.remove((node2, node1))
-            node2.disconnect(node1)
+            del self.wires[(node2, node1)]
+        else:
+            return
+        node1.disconnect(node2)
+        self._revision += 1
 
-    def step(self):
-        changed = False
-        # 1. Propagate values from outputs to inputs via wires
-        for node1, node2 in self.wires:
-            source = None
-            dest = None
-            
-            if not node1.is_input and node2.is_input:
-                source = node1
-                dest = node2
-            elif not node2.is_input and node1.is_input:
-                source = node2
-                dest = node1
-            
-            if source and dest:
-                if dest.value != source.value:
-                    dest.value = source.value
-                    changed = True
-
-        # 2. Evaluate all components
+        # Sinks that leave a net keep their last value, like an unplugged wire
+        net = node1.net
+        if not node1.connections:
+            net._remove(node1)
+        if not node2.connections:
+            net._remove(node2)
+        if node1.net is not None and node2.net is not None:
+            # Both ends still have other wires: the net may have split in two
+            reachable = self._connected(node1)
+            if node2 not in reachable:
+                split = Net()
+                self.nets.add(split)
+                for node in self._connected(node2):
+                    net._remove(node)
+                    split._add(node)
+                self._check_conflict(split)
+        if not net.drivers and not net.sinks:
+            self._discard_net(net)
+        else:
+            self._check_conflict(net)
+            self._dirty.add(net)
+
+    def _connected(self, start):
+        # All nodes reachable from start through wires
+        seen = {start}
+        stack = [start]
+        while stack:
+            for other in stack.pop().connections:
+                if other not in seen:
+                    seen.add(other)
+                    stack.append(other)
+        return seen
+
+    def _check_conflict(self, net):
+        if net.conflict:
+            self.conflicts.add(net)
+        else:
+            self.conflicts.discard(net)
+
+    def _discard_net(self, net):
+        self.nets.discard(net)
+        self.conflicts.discard(net)
+        self._dirty.discard(net)
+
+    def compile(self):
+        # Levelize a combinational circuit into a flat, array-backed program (cached until the next edit)
+        if self._compiled is not None and self._compiled[0] == self._revision:
+            return self._compiled[1]
+
+        driver = {} # Input Node -> output Node driving it
+        for net in self.nets:
+            if net.driver is not None:
+                for dest in net.sinks:
+                    driver[dest] = net.driver
+
+        slots = {}
+        size = 0
+        for component in self.components:
+            for node in component._outputs:
+                slots[node] = size
+                size += 1
+        for component in self.components:
+            for node in component._inputs:
+                if node in driver:
+                    slots[node] = slots[driver[node]]
+                else:
+                    slots[node] = size
+                    size += 1
+
+        switches = []
+        bulbs = []
+        gates = []
+        for component in self.components:
+            if isinstance(component, Switch):
+                switches.append(component)
+            elif isinstance(component, Bulb):
+                bulbs.append(component)
+            elif component.op in BOOL_OPS or isinstance(component, SubCircuit):
+                gates.append(component)
+            else:
+                raise ValueError(f"Cannot compile component {component.name!r}: no opcode")
+
+        # Kahn's algorithm over gate -> gate dependencies
+        waiting = {}
+        dependents = {}
+        gate_set = set(gates)
+        for gate in gates:
+            sources = {driver[node].component for node in gate._inputs if node in driver}
+            sources = [c for c in sources if c in gate_set]
+            waiting[gate] = len(sources)
+            for source in sources:
+                dependents.setdefault(source, []).append(gate)
+        ready = [gate for gate in gates if waiting[gate] == 0]
+        program = []
+        constants = {} # Initial values of slots added by inlined subcircuits
+        done = 0
+        while ready:
+            gate = ready.pop()
+            if gate.op is None:
+                size = self._inline(gate, slots, size, program, constants)
+            else:
+                operands = [slots[node] for node in gate._inputs]
+                a = operands[0]
+                b = operands[1] if len(operands) > 1 else a
+                program.append((gate.op, slots[gate._outputs[0]], a, b))
+            for dependent in dependents.get(gate, ()):
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+            done += 1
+        if done != len(gates):
+            raise ValueError("Cannot compile a circuit with feedback loops")
+
+        compiled = CompiledCircuit(switches, bulbs, slots, program, size, constants)
+        self._compiled = (self._revision, compiled)
+        return compiled
+
+    def codegen(self):
+        # compile() turned into a Python function: fn(switch values, mask=True) -> bulb values, in
+        # compile() order. Pass ints with mask=(1 << width) - 1 to evaluate `width` vectors bit-sliced.
+        # Regenerated after any edit, since compile() is; identical circuits share one function.
+        compiled = self.compile()
+        if compiled.function is None:
+            constants = compiled.constants()
+            key = (self.structural_hash(), tuple(slot for slot in sorted(constants) if constants[slot]))
+            function = Circuit._generated.get(key)
+            if function is None:
+                namespace = {}
+                exec(compile(compiled.source(), f"<circuit {key[0][:8]}>", "exec"), namespace)
+                function = namespace["evaluate"]
+                if len(Circuit._generated) >= CODEGEN_CACHE:
+                    del Circuit._generated[next(iter(Circuit._generated))]
+                Circuit._generated[key] = function
+            compiled.function = function
+        return compiled.function
+
+    def _inline(self, sub, slots, size, program, constants):
+        # Appends a SubCircuit's compiled program with its slots renumbered into ours; returns the new size
+        compiled = sub.block.compiled
+        local = dict(zip(compiled.inputs, (slots[node] for node in sub._inputs)))
+
+        def slot(index):
+            nonlocal size
+            if index not in local:
+                local[index] = size
+                constants[size] = compiled.values[index]
+                size += 1
+            return local[index]
+
+        for op, out, a, b in compiled.program:
+            a, b = slot(a), slot(b)
+            program.append((op, slot(out), a, b))
+        for node, index in zip(sub._outputs, compiled.outputs):
+            # Copy each Bulb's value to the instance output (OR of a value with itself)
+            source = slot(index)
+            program.append(("OR", slots[node], source, source))
+        return size
+
+    def structural_hash(self):
+        # Digest of component types, Switch/Bulb names and wiring: equal for identically built circuits
+        if self._structure is not None and self._structure[0] == self._revision:
+            return self._structure[1]
+        index = {}
+        signature = []
+        for component in self.components:
+            for node in component._inputs + component._outputs:
+                index[node] = len(index)
+            if isinstance(component, SubCircuit):
+                signature.append(("SubCircuit", component.definition.structural_hash()))
+            elif isinstance(component, (Switch, Bulb)):
+                signature.append((type(component).__name__, component.name))
+            elif isinstance(component, BusComponent):
+                signature.append((type(component).__name__, component.width))
+            else:
+                signature.append((type(component).__name__, component.op))
+        wires = sorted(tuple(sorted((index[node1], index[node2]))) for node1, node2 in self.wires)
+        digest = hashlib.blake2b(repr((signature, wires)).encode(), digest_size=16).hexdigest()
+        self._structure = (self._revision, digest)
+        return digest
+
+    def flatten(self):
+        # Copy of the circuit with every SubCircuit (recursively) replaced by the gates of its definition
+        components = []
+        wires = []
+        ports = set() # Copies of definition Switches and Bulbs; their nodes only join nets together
+        self._expand(components, wires, ports)
+
+        # Re-wire each net without the port nodes, as a star from its first remaining node
+        links = {}
+        for node1, node2 in wires:
+            links.setdefault(node1, []).append(node2)
+            links.setdefault(node2, []).append(node1)
+        seen = set()
+        flat_wires = []
+        for start in links:
+            if start in seen:
+                continue
+            seen.add(start)
+            group = [start]
+            for node in group:
+                for other in links[node]:
+                    if other not in seen:
+                        seen.add(other)
+                        group.append(other)
+            kept = [node for node in group if node.component not in ports]
+            if kept:
+                flat_wires.extend((kept[0], node) for node in kept[1:])
+        return Circuit.from_netlist([c for c in components if c not in ports], flat_wires)
+
+    def _expand(self, components, wires, ports):
+        # Appends copies of our components and wires; returns original Node -> copy
+        copies = {}
         for component in self.components:
-            # Capture old output values to detect changes
-            old_outputs = {k: v.value for k, v in component.outputs.items()}
+            if isinstance(component, SubCircuit):
+                inner = component.definition._expand(components, wires, ports)
+                # Instance ports stand in for the definition's Switch outputs and Bulb inputs. The
+                # shared Block may come from another, identical definition, so use this one's own
+                definition = component.definition.components
+                switches = [c for c in definition if isinstance(c, Switch)]
+                bulbs = [c for c in definition if isinstance(c, Bulb)]
+                for node, switch in zip(component._inputs, switches):
+                    copies[node] = inner[switch._outputs[0]]
+                    ports.add(copies[node].component)
+                for node, bulb in zip(component._outputs, bulbs):
+                    copies[node] = inner[bulb._inputs[0]]
+                    ports.add(copies[node].component)
+                continue
+            clone = component.copy()
+            components.append(clone)
+            for node, new in zip(component._inputs + component._outputs, clone._inputs + clone._outputs):
+                copies[node] = new
+        wires.extend((copies[node1], copies[node2]) for node1, node2 in self.wires)
+        return copies
+
+    def evaluate_batch(self, inputs, packed=False):
+        # Vectorized evaluation of many switch vectors, see CompiledCircuit.evaluate_batch
+        return self.compile().evaluate_batch(inputs, packed=packed)
+
+    def iter_truth_table(self, inputs, outputs, start=0, stop=None):
+        # Lazily yields truth-table rows for the given Switches and Bulbs, see truth_table.iter_truth_table
+        from truth_table import iter_truth_table
+        return iter_truth_table(self, inputs, outputs, start, stop)
+
+    @contextlib.contextmanager
+    def profiling(self, profile=None):
+        # Attaches a profiler.Profile (a new one by default) for the duration of the block:
+        #     with circuit.profiling() as profile: circuit.simulate()
+        # Without one attached, step() only pays a None check per evaluation
+        from profiler import Profile
+        previous = self.profile
+        self.profile = profile if profile is not None else Profile()
+        try:
+            yield self.profile
+        finally:
+            self.profile = previous
+
+    def tick_clocks(self):
+        # Advance every Clock by one tick; SimulationWorker calls this before each simulate()
+        for component in self._sources:
+            if isinstance(component, Clock):
+                component.tick()
+
+    def record_changes(self, nodes):
+        # Report Nodes changed outside step() (e.g. by cycles.CycleSimulator) to take_changes()
+        if self._changes is not None:
+            self._changes.update(nodes)
+
+    def track_changes(self):
+        # Start recording which Nodes change value, for take_changes()
+        if self._changes is None:
+            self._changes = set()
+
+    def take_changes(self):
+        # Nodes whose value changed since the last call
+        changes = self._changes
+        if changes is None:
+            return set()
+        self._changes = set()
+        return changes
+
+    def loops(self):
+        # Components of each feedback loop (a strongly connected component of the gate graph)
+        return self._analyze()[1]
+
+    def ranks(self):
+        # Component -> rank; every wire leaving a feedback loop points to a higher rank
+        return self._analyze()[0]
+
+    def _analyze(self):
+        # Tarjan's SCC algorithm over the component graph, cached until the next edit.
+        # Returns (rank, loops, loop_nodes): rank orders components so every edge leaving a loop
+        # points to a higher rank, and components in the same loop share a rank.
+        if self._analysis is not None and self._analysis[0] == self._revision:
+            return self._analysis[1]
+
+        successors = {}
+        for component in self.components:
+            targets = []
+            for node in component._outputs:
+                net = node.net
+                if net is not None and net.driver is node:
+                    targets.extend(dest.component for dest in net.sinks)
+            successors[component] = targets
+
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        sccs = [] # Emitted sinks first, i.e. in reverse topological order
+        for root in self.components:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(successors[root]))]
+            while work:
+                component, targets = work[-1]
+                for target in targets:
+                    if target not in successors:
+                        continue # Wired to a component outside the circuit
+                    if target not in index:
+                        index[target] = lowlink[target] = len(index)
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(successors[target])))
+                        break
+                    if target in on_stack:
+                        lowlink[component] = min(lowlink[component], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[component])
+                    if lowlink[component] == index[component]:
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            scc.append(member)
+                            if member is component:
+                                break
+                        sccs.append(scc)
+
+        rank = {}
+        loops = []
+        for position, scc in enumerate(reversed(sccs)):
+            for component in scc:
+                rank[component] = position
+            if len(scc) > 1 or scc[0] in successors[scc[0]]:
+                loops.append(scc)
+        loop_nodes = tuple(node for loop in loops for component in loop
+                           for node in component._inputs + component._outputs)
+        self._analysis = (self._revision, (rank, loops, loop_nodes))
+        return rank, loops, loop_nodes
+
+    def step(self):
+        # One pass in rank order: combinational logic settles completely, while a change travelling
+        # around a feedback loop advances by one component and waits for the next step.
+        # Returns True if events are still pending.
+        rank = self._analyze()[0]
+        changes = self._changes
+        profile = self.profile
+        if profile is not None:
+            started = time.perf_counter()
+            evaluated = profile.evaluations
+            toggles = profile.toggles
+        else:
+            evaluated = toggles = None
+
+        # Sources are driven from outside the circuit (Switch.set_state), so check them for new values
+        dirty = self._dirty
+        source_values = self._source_values
+        for component in self._sources:
+            for node in component._outputs:
+                value = node.value
+                if source_values.get(node) != value:
+                    source_values[node] = value
+                    if node.net is not None:
+                        dirty.add(node.net)
+                    if changes is not None:
+                        changes.add(node)
+        self._dirty = set()
+
+        queue = [(rank.get(component, -1), component.id, component) for component in self._pending]
+        heapq.heapify(queue)
+        queued = set(self._pending)
+        self._pending = set()
+
+        def propagate(net, current):
+            # Push the driver value to the sinks, scheduling downstream components
+            source = net.driver
+            if source is None:
+                return
+            value = source.value
+            for dest in net.sinks:
+                if dest.value != value:
+                    dest.value = value
+                    if changes is not None:
+                        changes.add(dest)
+                    if toggles is not None:
+                        toggles[dest] += 1
+                    component = dest.component
+                    level = rank.get(component, -1)
+                    if level <= current:
+                        self._pending.add(component) # Feedback edge: next step
+                    elif component not in queued:
+                        queued.add(component)
+                        heapq.heappush(queue, (level, component.id, component))
+
+        # 1. Nets changed by sources or edits
+        for net in dirty:
+            propagate(net, -1)
+
+        # 2. Evaluate components whose inputs changed, upstream first
+        # Registers only latch here; their new Q goes out once the queue is empty, after every register
+        # reached by the same edge (directly or through gates) has sampled its D
+        evaluations = 0
+        clocked = self._clocked
+        latched = []
+        while queue or latched:
+            if queue:
+                current, _, component = heapq.heappop(queue)
+                queued.discard(component)
+                evaluations += 1
+                if evaluated is not None:
+                    evaluated[component] += 1
+                if component in clocked:
+                    component.latch()
+                    latched.append((current, component))
+                    continue
+            else:
+                current, component = latched.pop()
+            outputs = component._outputs
+            old_outputs = [node.value for node in outputs]
             component.evaluate()
-            for k, v in component.outputs.items():
-                if v.value != old_outputs[k]:
-                    changed = True
-        
-        return changed
+            for node, old_value in zip(outputs, old_outputs):
+                if node.value != old_value:
+                    if changes is not None:
+                        changes.add(node)
+                    if toggles is not None:
+                        toggles[node] += 1
+                    if node.net is not None:
+                        propagate(node.net, current)
+
+        self.evaluations += evaluations
+        if profile is not None:
+            profile.record_step(time.perf_counter() - started)
+        return bool(self._pending)
 
     def simulate(self, ticks=10):
-        # Run for a maximum number of ticks or until stable
-        for _ in range(ticks):
+        # Steps until the circuit settles, a feedback loop revisits an earlier state, or `ticks` run out
+        result = self._simulate(ticks)
+        if self.profile is not None:
+            self.profile.settles[result.ticks] += 1
+        return result
+
+    def _simulate(self, ticks):
+        loop_nodes = self._analyze()[2]
+        seen = {}
+        for tick in range(1, ticks + 1):
             if not self.step():
-                break
+                return SimulationResult(STABLE, tick, None)
+            if loop_nodes:
+                # Everything outside the loops has settled, so loop values plus pending events are the whole state
+                state = (tuple(node.value for node in loop_nodes), frozenset(self._pending))
+                if state in seen:
+                    return SimulationResult(OSCILLATING, tick, tick - seen[state])
+                seen[state] = tick
+        return SimulationResult(BUDGET_EXCEEDED, ticks, None)
@@ -1,8 +1,29 @@
+import os
+import struct
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-import itertools
-from logic_engine import Circuit, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb
-from gui_components import GuiComponent, SwitchGui, BulbGui
+from concurrent.futures import CancelledError
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from logic_engine import (Circuit, Node, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb, SubCircuit,
+                          BusAndGate, BusOrGate, BusNotGate, BusXorGate, BusNandGate, BusAdder, Splitter, Merger,
+                          BusSwitch, BusBulb, Clock, DFlipFlop, Register)
+from cycles import CycleSimulator
+from gui_components import GuiComponent, SwitchGui, BulbGui, BusIoGui, VirtualTable, NODE_HIT_RADIUS
+from spatial_index import SpatialGrid
+from sim_worker import SimulationWorker
+from waveform import Trace
+from profiler import Profile
+from netlist_io import save as save_netlist, load as load_netlist
+from truth_table import iter_truth_table, shard_netlist, exhaustive, iter_netlist_rows, export_csv, export_binary
+
+NETLIST_FILES = [("Netlist (JSON)", "*.json"), ("Netlist (binary)", "*.lnet")]
+SHARD_THRESHOLD = 16 # Truth tables with more switches get their bulb counts from a process pool
+PROFILE_INTERVAL = 500 # Milliseconds between refreshes of the profiling overlay
+# Names accepted by the Bus... dialog
+BUS_COMPONENTS = {"AND": BusAndGate, "OR": BusOrGate, "NOT": BusNotGate, "XOR": BusXorGate, "NAND": BusNandGate,
+                  "ADD": BusAdder, "SPLIT": Splitter, "MERGE": Merger, "SWITCH": BusSwitch, "BULB": BusBulb,
+                  "REG": Register}
 
 class SimulatorApp:
     def __init__(self, root):
@@ -10,16 +31,38 @@ class SimulatorApp:
         self.root.title("Digital Logic Simulator")
         self.root.geometry("1000x700")
 
+        # The circuit lives on a worker thread; the GUI only talks to it through the worker
         self.circuit = Circuit()
+        self.worker = SimulationWorker(self.circuit)
+        self.node_values = {} # Node -> value, from the worker's snapshots
+        self.conflicts = frozenset() # Nodes on nets with more than one driver
         self.gui_components = []
         self.selected_component = None
+        self.selection = set() # Selected GuiComponents; dragging one moves them all
         self.drag_data = {"x": 0, "y": 0}
+        self.spatial = SpatialGrid() # Hit-testing index over components and nodes
+        self.band_start = None # Rubber-band selection anchor
+        self.band_item = None
         
         self.wiring_mode = False
         self.start_node = None
         self.temp_wire = None
 
+        # Retained canvas items: created once, then updated in place
+        self.wire_items = {} # (node1, node2) -> line item id
+        self.node_wires = {} # Node -> wires touching it (the GUI's own copy of the wiring)
+        self.gui_by_component = {} # Component -> GuiComponent
+        self.temp_wire_item = None
+        self.trace = None # Waveform capture running on the worker, see toggle_trace()
+        self.blocks = {} # Path -> definition Circuit of blocks added with add_block()
+        self.profile = None # Last Profile copy fetched for the overlay, or None when it's off
+        self.profile_item = None # Overlay text: frame time versus simulation time
+        self.frame_seconds = 0.0 # Time spent in run_simulation() frames since the last overlay refresh
+        self.frames = 0
+
         self.create_widgets()
+        self.worker.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.run_simulation()
 
     def create_widgets(self):
@@ -34,19 +77,42 @@ class SimulatorApp:
             ("XOR", XorGate),
             ("NAND", NandGate),
             ("Switch", Switch),
-            ("Bulb", Bulb)
+            ("Bulb", Bulb),
+            ("Clock", Clock),
+            ("DFF", DFlipFlop)
         ]
 
         for name, cls in components:
             btn = tk.Button(toolbar, text=name, command=lambda c=cls: self.add_component(c))
             btn.pack(side=tk.LEFT, padx=2, pady=2)
 
+        block_btn = tk.Button(toolbar, text="Block...", command=self.add_block)
+        block_btn.pack(side=tk.LEFT, padx=2, pady=2)
+
+        bus_btn = tk.Button(toolbar, text="Bus...", command=self.add_bus_component)
+        bus_btn.pack(side=tk.LEFT, padx=2, pady=2)
+
+        cycles_btn = tk.Button(toolbar, text="Cycles...", command=self.run_cycles)
+        cycles_btn.pack(side=tk.LEFT, padx=2, pady=2)
+
         clear_btn = tk.Button(toolbar, text="Clear", command=self.clear_circuit)
         clear_btn.pack(side=tk.RIGHT, padx=2, pady=2)
 
+        save_btn = tk.Button(toolbar, text="Save", command=self.save_circuit)
+        save_btn.pack(side=tk.RIGHT, padx=2, pady=2)
+
+        open_btn = tk.Button(toolbar, text="Open", command=self.open_circuit)
+        open_btn.pack(side=tk.RIGHT, padx=2, pady=2)
+
         tt_btn = tk.Button(toolbar, text="Truth Table", command=self.generate_truth_table)
         tt_btn.pack(side=tk.RIGHT, padx=2, pady=2)
 
+        self.trace_btn = tk.Button(toolbar, text="Trace", command=self.toggle_trace)
+        self.trace_btn.pack(side=tk.RIGHT, padx=2, pady=2)
+
+        self.profile_btn = tk.Button(toolbar, text="Profile", command=self.toggle_profile)
+        self.profile_btn.pack(side=tk.RIGHT, padx=2, pady=2)
+
         # Canvas
         self.canvas = tk.Canvas(self.root, bg="white")
         self.canvas.pack(fill=tk.BOTH, expand=True)
@@ -56,72 +122,304 @@ class SimulatorApp:
         self.canvas.bind("<ButtonRelease-1>", self.on_release)
         self.canvas.bind("<Motion>", self.on_mouse_move)
 
+        self.temp_wire_item = self.canvas.create_line(0, 0, 0, 0, fill="gray", dash=(4, 2), state=tk.HIDDEN)
+        self.band_item = self.canvas.create_rectangle(0, 0, 0, 0, outline="blue", dash=(2, 2), state=tk.HIDDEN)
+        self.profile_item = self.canvas.create_text(5, 5, anchor=tk.NW, font=("TkFixedFont", 9), state=tk.HIDDEN)
+
     def add_component(self, component_cls):
         comp = component_cls()
-        self.circuit.add_component(comp)
+        self.worker.submit(self.circuit.add_component, comp)
         
         # Place in center of visible canvas or default
         x, y = 100, 100
-        
+        self.add_gui(comp, x, y)
+        self.redraw()
+
+    def add_block(self):
+        # Adds a saved circuit as one component; its Switches and Bulbs become the ports
+        path = filedialog.askopenfilename(filetypes=NETLIST_FILES)
+        if not path:
+            return
+        try:
+            if path not in self.blocks:
+                self.blocks[path] = load_netlist(path)
+            comp = SubCircuit(self.blocks[path], name=os.path.splitext(os.path.basename(path))[0])
+        except (OSError, ValueError, KeyError, IndexError, struct.error) as exc:
+            messagebox.showerror("Block", f"Could not use {path} as a block: {exc}")
+            return
+        self.worker.submit(self.circuit.add_component, comp)
+        self.add_gui(comp, 100, 100)
+        self.redraw()
+
+    def add_bus_component(self):
+        # Multi-bit component from a "<kind> <width>" answer, e.g. "ADD 32"
+        answer = simpledialog.askstring("Bus", "Component and width, e.g. ADD 32\n(" + ", ".join(BUS_COMPONENTS) + ")")
+        if not answer:
+            return
+        try:
+            kind, width = answer.split()
+            comp = BUS_COMPONENTS[kind.upper()](int(width))
+        except (KeyError, ValueError) as exc:
+            messagebox.showerror("Bus", f"Could not create {answer!r}: {exc}")
+            return
+        self.worker.submit(self.circuit.add_component, comp)
+        self.add_gui(comp, 100, 100)
+        self.redraw()
+
+    def run_cycles(self):
+        # Cycle-based run of a synchronous circuit on the worker thread; the canvas picks up the result
+        count = simpledialog.askinteger("Cycles", "Clock cycles to run", initialvalue=1000, minvalue=1)
+        if not count:
+            return
+        circuit = self.circuit
+        def run():
+            started = time.perf_counter()
+            CycleSimulator(circuit).run(count)
+            return time.perf_counter() - started
+        # Long runs keep the window responsive: poll for completion instead of waiting on the worker
+        future = self.worker.submit(run)
+
+        def poll():
+            if not future.done():
+                self.root.after(100, poll)
+            elif future.exception() is not None:
+                messagebox.showerror("Cycles", str(future.exception()))
+            else:
+                messagebox.showinfo("Cycles", f"{count:,} cycles in {future.result():.3f}s")
+        poll()
+
+    def add_gui(self, comp, x, y):
         if isinstance(comp, Switch):
             gui_comp = SwitchGui(comp, x, y)
         elif isinstance(comp, Bulb):
             gui_comp = BulbGui(comp, x, y)
+        elif isinstance(comp, (BusSwitch, BusBulb)):
+            gui_comp = BusIoGui(comp, x, y)
         else:
             gui_comp = GuiComponent(comp, x, y)
             
         self.gui_components.append(gui_comp)
+        self.gui_by_component[comp] = gui_comp
+        gui_comp.values = self.node_values
+        gui_comp.draw(self.canvas)
+        gui_comp.register(self.spatial)
+
+    def toggle_trace(self):
+        # Start recording the selected components' nodes (all if nothing is selected); stop and save as VCD
+        if self.trace is None:
+            gui_comps = self.selection or self.gui_components
+            nodes = [node for gui_comp in gui_comps for node in gui_comp.node_items]
+            if not nodes:
+                messagebox.showinfo("Trace", "Add components to trace first.")
+                return
+            # Built on the worker thread, which owns the Node values
+            worker = self.worker
+
+            def start():
+                worker.trace = Trace(nodes, time=worker.tick)
+                return worker.trace
+
+            self.trace = worker.submit(start).result()
+            self.trace_btn.config(text="Stop Trace")
+            return
+
+        trace = self.trace
+        self.trace = None
+        self.trace_btn.config(text="Trace")
+        # Once the worker has dropped the trace, nothing else writes to it
+        self.worker.submit(setattr, self.worker, "trace", None).result()
+        path = filedialog.asksaveasfilename(defaultextension=".vcd", filetypes=[("Value Change Dump", "*.vcd")])
+        if path:
+            trace.export_vcd(path, timescale="10ms") # One worker tick at the default 100 ticks per second
+
+    def toggle_profile(self):
+        # Heat-maps components by evaluations and shows frame time next to simulation time
+        if self.profile is None:
+            # Attached on the worker thread, which runs step()
+            circuit = self.circuit
+
+            def start():
+                circuit.profile = Profile()
+                return circuit.profile.copy()
+
+            self.profile = self.worker.submit(start).result()
+            self.frame_seconds = 0.0
+            self.frames = 0
+            self.profile_btn.config(text="Stop Profile")
+            self.canvas.itemconfig(self.profile_item, text="Profiling...", state=tk.NORMAL)
+            self.canvas.tag_raise(self.profile_item)
+            self.root.after(PROFILE_INTERVAL, self.refresh_profile, self.worker)
+            return
+
+        self.profile = None
+        self.profile_btn.config(text="Profile")
+        self.worker.submit(setattr, self.circuit, "profile", None)
+        self.canvas.itemconfig(self.profile_item, state=tk.HIDDEN)
+        for gui_comp in self.gui_components:
+            gui_comp.heat = None
+            gui_comp.update()
+
+    def refresh_profile(self, worker, future=None):
+        # Polls for a fresh copy of the worker's Profile and shows the activity since the last one
+        if self.profile is None or worker is not self.worker:
+            return # Turned off, or the circuit was replaced
+        if future is None:
+            circuit = self.circuit
+            future = worker.submit(lambda: circuit.profile.copy())
+        if not future.done():
+            self.root.after(20, self.refresh_profile, worker, future)
+            return
+        latest = future.result()
+        window = latest.since(self.profile)
+        self.profile = latest
+
+        activity = window.activity()
+        for gui_comp in self.gui_components:
+            gui_comp.heat = activity.get(gui_comp.component, 0.0)
+            gui_comp.update()
+        frame = self.frame_seconds / self.frames if self.frames else 0.0
+        self.frame_seconds = 0.0
+        self.frames = 0
+        self.canvas.itemconfig(self.profile_item, text=(
+            f"frame {frame * 1e3:6.2f} ms   step {window.mean_step() * 1e3:6.2f} ms   "
+            f"settle {window.mean_settle():4.1f} ticks   {window.events_per_second():,.0f} evals/s"))
+        self.canvas.tag_raise(self.profile_item)
+        self.root.after(PROFILE_INTERVAL, self.refresh_profile, worker)
+
+    def save_circuit(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=NETLIST_FILES)
+        if not path:
+            return
+        try:
+            # The worker owns the circuit, so it does the writing
+            self.worker.submit(save_netlist, self.circuit, path).result()
+        except (OSError, ValueError) as exc:
+            # ValueError: binary netlists can't hold blocks
+            messagebox.showerror("Save", f"Could not save {path}: {exc}")
+
+    def open_circuit(self):
+        path = filedialog.askopenfilename(filetypes=NETLIST_FILES)
+        if not path:
+            return
+        try:
+            circuit = load_netlist(path)
+        except (OSError, ValueError, KeyError, IndexError, struct.error) as exc:
+            messagebox.showerror("Open", f"Could not open {path}: {exc}")
+            return
+        self.clear_circuit(circuit)
+        for comp in circuit.components:
+            self.add_gui(comp, *comp.position)
+        for node1, node2 in circuit.wires:
+            self.draw_wire(node1, node2)
         self.redraw()
 
-    def clear_circuit(self):
-        self.circuit = Circuit()
+    def clear_circuit(self, circuit=None):
+        # Replaces the circuit with `circuit` (its components still need GUIs), or an empty one
+        if self.trace is not None:
+            self.toggle_trace()
+        if self.profile is not None:
+            self.toggle_profile()
+        self.worker.stop()
+        self.circuit = circuit if circuit is not None else Circuit()
+        self.worker = SimulationWorker(self.circuit)
+        self.worker.start()
+        self.node_values.clear()
+        self.conflicts = frozenset()
+        for gui_comp in self.gui_components:
+            gui_comp.erase()
+        for item in self.wire_items.values():
+            self.canvas.delete(item)
         self.gui_components = []
+        self.gui_by_component = {}
+        self.wire_items = {}
+        self.node_wires = {}
+        self.selected_component = None
+        self.selection = set()
+        self.spatial = SpatialGrid()
         self.redraw()
 
+    def on_close(self):
+        self.worker.stop()
+        self.root.destroy()
+
     def redraw(self):
-        self.canvas.delete("all")
-        
-        # Draw wires
-        for node1, node2 in self.circuit.wires:
-            # Find coordinates (stored in node objects during component draw)
-            # We need to ensure components are drawn or at least positions updated before wires? 
-            # Actually, we draw components first to update node positions, then wires?
-            # No, wires should be behind components.
-            # But we need node positions.
-            # Let's draw components first to get node positions, then move wires to bottom?
-            # Or just use stored positions if available.
-            pass
+        # Full sync of every component and wire with the latest values
 
         # Draw components first to update node positions
         for gui_comp in self.gui_components:
             gui_comp.draw(self.canvas)
 
-        # Now draw wires using updated node positions
-        for node1, node2 in self.circuit.wires:
-            if hasattr(node1, 'gui_x') and hasattr(node2, 'gui_x'):
-                color = "red" if node1.value else "black" # Simple visualization of state
-                self.canvas.create_line(node1.gui_x, node1.gui_y, node2.gui_x, node2.gui_y, fill=color, width=2, tags="wire")
+        for wire, item in self.wire_items.items():
+            self.canvas.itemconfig(item, fill=self.wire_color(*wire))
 
         # Draw temp wire
+        self.update_temp_wire()
+
+    def connect(self, node1, node2):
+        # The worker applies the real Circuit.add_wire; the GUI keeps its own copy of the wiring
+        if (node1, node2) in self.wire_items or (node2, node1) in self.wire_items:
+            return
+        if node1.width != node2.width:
+            messagebox.showerror("Wire", f"Cannot wire a {node1.width}-bit node to a {node2.width}-bit node")
+            return
+        self.worker.submit(self.circuit.add_wire, node1, node2)
+        self.draw_wire(node1, node2)
+
+    def draw_wire(self, node1, node2):
+        wire = (node1, node2)
+        self.wire_items[wire] = self.canvas.create_line(node1.gui_x, node1.gui_y, node2.gui_x, node2.gui_y,
+                                                        fill=self.wire_color(node1, node2), width=2, tags="wire")
+        self.canvas.tag_lower(self.wire_items[wire]) # Wires stay behind components
+        self.node_wires.setdefault(node1, set()).add(wire)
+        self.node_wires.setdefault(node2, set()).add(wire)
+
+    def refresh(self, nodes):
+        # Incremental update for nodes whose value or conflict state changed
+        for node in nodes:
+            gui_comp = self.gui_by_component.get(node.component)
+            if gui_comp is not None:
+                gui_comp.update()
+            for wire in self.node_wires.get(node, ()):
+                self.canvas.itemconfig(self.wire_items[wire], fill=self.wire_color(*wire))
+
+    def wire_color(self, node1, node2):
+        if node1 in self.conflicts:
+            return "orange" # Two outputs driving the same net
+        return "red" if self.node_values.get(node1, False) else "black" # Simple visualization of state
+
+    def update_temp_wire(self):
         if self.temp_wire:
-            self.canvas.create_line(*self.temp_wire, fill="gray", dash=(4, 2))
+            self.canvas.coords(self.temp_wire_item, *self.temp_wire)
+            self.canvas.itemconfig(self.temp_wire_item, state=tk.NORMAL)
+        else:
+            self.canvas.itemconfig(self.temp_wire_item, state=tk.HIDDEN)
 
     def get_node_at(self, x, y):
-        # Check all components' nodes
-        for gui_comp in self.gui_components:
-            # Check inputs
-            for node in gui_comp.component.inputs.values():
-                if hasattr(node, 'gui_x'):
-                    dist = ((node.gui_x - x)**2 + (node.gui_y - y)**2)**0.5
-                    if dist < 10:
-                        return node
-            # Check outputs
-            for node in gui_comp.component.outputs.values():
-                if hasattr(node, 'gui_x'):
-                    dist = ((node.gui_x - x)**2 + (node.gui_y - y)**2)**0.5
-                    if dist < 10:
-                        return node
-        return None
+        # Closest node within the hit radius, from the spatial index
+        best = None
+        best_dist = NODE_HIT_RADIUS
+        for key in self.spatial.at(x, y):
+            if isinstance(key, Node):
+                dist = ((key.gui_x - x)**2 + (key.gui_y - y)**2)**0.5
+                if dist < best_dist:
+                    best = key
+                    best_dist = dist
+        return best
+
+    def get_component_at(self, x, y):
+        # Topmost component containing the point (the index returns them bottom to top)
+        hits = [key for key in self.spatial.at(x, y) if isinstance(key, GuiComponent)]
+        return hits[-1] if hits else None
+
+    def select(self, gui_comps):
+        for gui_comp in self.selection - set(gui_comps):
+            gui_comp.selected = False
+            gui_comp.update()
+        for gui_comp in gui_comps:
+            if not gui_comp.selected:
+                gui_comp.selected = True
+                gui_comp.update()
+        self.selection = set(gui_comps)
 
     def on_click(self, event):
         x, y = event.x, event.y
@@ -134,11 +432,11 @@ class SimulatorApp:
                 self.start_node = clicked_node
             else:
                 # Complete wire
-                self.circuit.add_wire(self.start_node, clicked_node)
+                self.connect(self.start_node, clicked_node)
                 self.wiring_mode = False
                 self.start_node = None
                 self.temp_wire = None
-            self.redraw()
+                self.update_temp_wire()
             return
 
         # If wiring mode is on and we clicked empty space, cancel
@@ -146,61 +444,89 @@ class SimulatorApp:
             self.wiring_mode = False
             self.start_node = None
             self.temp_wire = None
-            self.redraw()
+            self.update_temp_wire()
             return
 
         # Check for component click
-        for gui_comp in reversed(self.gui_components): # Topmost first
-            if gui_comp.contains(x, y):
-                self.selected_component = gui_comp
-                self.drag_data["x"] = x
-                self.drag_data["y"] = y
-                
-                # Handle Switch toggle
-                if isinstance(gui_comp, SwitchGui):
-                    # Simple toggle on click (could be refined to specific area)
-                    gui_comp.component.toggle()
-                
-                gui_comp.selected = True
-                # Deselect others
-                for other in self.gui_components:
-                    if other != gui_comp:
-                        other.selected = False
-                self.redraw()
-                return
-        
-        # Clicked on background
+        gui_comp = self.get_component_at(x, y)
+        if gui_comp:
+            self.selected_component = gui_comp
+            self.drag_data["x"] = x
+            self.drag_data["y"] = y
+
+            # Handle Switch toggle
+            if isinstance(gui_comp, SwitchGui):
+                # Simple toggle on click (could be refined to specific area)
+                self.worker.submit(gui_comp.component.toggle)
+            elif isinstance(gui_comp.component, BusSwitch):
+                value = simpledialog.askstring("Bus Switch", "Value (decimal, or 0x.. / 0b..)")
+                if value:
+                    try:
+                        self.worker.submit(gui_comp.component.set_value, int(value, 0))
+                    except ValueError:
+                        messagebox.showerror("Bus Switch", f"Not a number: {value!r}")
+
+            # Clicking inside a multi-selection keeps it, so the whole group can be dragged
+            if gui_comp not in self.selection:
+                self.select([gui_comp])
+            return
+
+        # Clicked on background: deselect and start a rubber band
         self.selected_component = None
-        for comp in self.gui_components:
-            comp.selected = False
-        self.redraw()
+        self.select([])
+        self.band_start = (x, y)
+        self.canvas.coords(self.band_item, x, y, x, y)
+        self.canvas.itemconfig(self.band_item, state=tk.NORMAL)
 
     def on_drag(self, event):
-        if self.selected_component:
+        if self.band_start:
+            self.canvas.coords(self.band_item, *self.band_start, event.x, event.y)
+        elif self.selected_component:
             dx = event.x - self.drag_data["x"]
             dy = event.y - self.drag_data["y"]
-            self.selected_component.move(dx, dy)
             self.drag_data["x"] = event.x
             self.drag_data["y"] = event.y
-            self.redraw()
+            for gui_comp in self.selection:
+                gui_comp.move(dx, dy)
+            # Only the wires attached to the dragged components need new coordinates
+            for gui_comp in self.selection:
+                for node in gui_comp.node_items:
+                    for wire in self.node_wires.get(node, ()):
+                        node1, node2 = wire
+                        self.canvas.coords(self.wire_items[wire], node1.gui_x, node1.gui_y, node2.gui_x, node2.gui_y)
 
     def on_release(self, event):
-        pass # Drag end
+        if self.band_start:
+            # Select every component fully inside the rubber band
+            hits = self.spatial.within(*self.band_start, event.x, event.y, contained=True)
+            self.select([key for key in hits if isinstance(key, GuiComponent)])
+            self.band_start = None
+            self.canvas.itemconfig(self.band_item, state=tk.HIDDEN)
 
     def on_mouse_move(self, event):
         if self.wiring_mode and self.start_node:
             self.temp_wire = (self.start_node.gui_x, self.start_node.gui_y, event.x, event.y)
-            self.redraw()
+            self.update_temp_wire()
 
     def run_simulation(self):
-        self.circuit.simulate()
-        self.redraw()
-        self.root.after(100, self.run_simulation) # 10 FPS simulation
+        # Pick up what the worker published since the last frame; idle frames have nothing to update
+        started = time.perf_counter()
+        snapshot = self.worker.take_snapshot()
+        if snapshot is not None:
+            self.node_values.update(snapshot.values)
+            changed = set(snapshot.values)
+            if snapshot.conflicts is not None:
+                changed |= self.conflicts ^ snapshot.conflicts
+                self.conflicts = snapshot.conflicts
+            self.refresh(changed)
+        self.frame_seconds += time.perf_counter() - started
+        self.frames += 1
+        self.root.after(33, self.run_simulation) # ~30 FPS display, independent of the simulation rate
 
     def generate_truth_table(self):
         # Identify Inputs (Switches) and Outputs (Bulbs)
-        switches = [c for c in self.circuit.components if isinstance(c, Switch)]
-        bulbs = [c for c in self.circuit.components if isinstance(c, Bulb)]
+        switches = [g.component for g in self.gui_components if isinstance(g.component, Switch)]
+        bulbs = [g.component for g in self.gui_components if isinstance(g.component, Bulb)]
 
         if not switches:
             messagebox.showinfo("Info", "No switches found. Add switches to generate a truth table.")
@@ -215,41 +541,109 @@ class SimulatorApp:
         bulbs.sort(key=lambda x: x.name)
 
         headers = [s.name for s in switches] + [b.name for b in bulbs]
-        data = []
+        total = 1 << len(switches)
+
+        # Rows are evaluated on demand, one screen at a time, from a snapshot of the compiled circuit
+        # The snapshot is taken on the worker thread, which owns the circuit
+        try:
+            netlist = self.worker.submit(shard_netlist, self.circuit, switches, bulbs, True).result()
+        except ValueError:
+            # Feedback loops can't be bit-sliced: the worker simulates just the rows on screen, then puts
+            # the switches back the way they were
+            circuit = self.circuit
+            def rows(start, stop):
+                states = [switch.is_on for switch in switches]
+                try:
+                    return list(iter_truth_table(circuit, switches, bulbs, start, stop))
+                finally:
+                    for switch, state in zip(switches, states):
+                        if switch.is_on != state:
+                            switch.set_state(state)
+            fetch = lambda start, stop: self.worker.submit(rows, start, stop).result()
+            self.show_truth_table(headers, total, fetch, switches, bulbs)
+            return
 
-        # Generate all combinations
-        for values in itertools.product([False, True], repeat=len(switches)):
-            # Set inputs
-            for i, switch in enumerate(switches):
-                switch.set_state(values[i])
-            
-            # Simulate to stabilize
-            self.circuit.simulate(ticks=20)
-            
-            # Read outputs
-            outputs = [b.is_lit for b in bulbs]
-            
-            # Format row (0/1 instead of False/True)
-            row = [1 if v else 0 for v in values] + [1 if v else 0 for v in outputs]
-            data.append(row)
+        fetch = lambda start, stop: list(iter_netlist_rows(netlist, start, stop))
+        if len(switches) > SHARD_THRESHOLD:
+            self.generate_sharded_truth_table(headers, netlist, fetch, switches, bulbs)
+            return
+        self.show_truth_table(headers, total, fetch, switches, bulbs)
+
+    def generate_sharded_truth_table(self, headers, netlist, fetch, switches, bulbs):
+        total = 1 << len(switches)
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Truth Table")
+        tk.Label(dialog, text=f"Evaluating {total:,} rows...").pack(padx=10, pady=5)
+        bar = ttk.Progressbar(dialog, length=300, maximum=total)
+        bar.pack(padx=10, pady=5)
+        cancel = threading.Event()
+        tk.Button(dialog, text="Cancel", command=cancel.set).pack(pady=5)
+        dialog.protocol("WM_DELETE_WINDOW", cancel.set)
+
+        # Shards run in a process pool driven from a helper thread; the dialog polls its progress
+        state = {"done": 0, "counts": None, "error": None, "finished": False}
+
+        def run():
+            try:
+                state["counts"] = exhaustive(netlist, "counts", progress=lambda done, total: state.update(done=done),
+                                             cancel=cancel)
+            except CancelledError:
+                pass
+            except Exception as exc:
+                state["error"] = exc
+            finally:
+                state["finished"] = True
+
+        def poll():
+            bar["value"] = state["done"]
+            if not state["finished"]:
+                self.root.after(100, poll)
+                return
+            dialog.destroy()
+            if state["error"] is not None:
+                messagebox.showerror("Truth Table", str(state["error"]))
+            elif state["counts"] is not None:
+                summary = ", ".join(f"{b.name}: {count:,} on" for b, count in zip(bulbs, state["counts"]))
+                self.show_truth_table(headers, total, fetch, switches, bulbs, summary)
 
-        self.show_truth_table(headers, data)
+        threading.Thread(target=run, daemon=True).start()
+        poll()
 
-    def show_truth_table(self, headers, data):
+    def show_truth_table(self, headers, total, fetch, switches, bulbs, summary=None):
         window = tk.Toplevel(self.root)
         window.title("Truth Table")
         window.geometry("600x400")
 
-        tree = ttk.Treeview(window, columns=headers, show="headings")
-        
-        for h in headers:
-            tree.heading(h, text=h)
-            tree.column(h, width=80, anchor="center")
-
-        for row in data:
-            tree.insert("", tk.END, values=row)
+        toolbar = tk.Frame(window)
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+        tk.Label(toolbar, text=summary or f"{total:,} rows").pack(side=tk.LEFT, padx=5)
+        status = tk.Label(toolbar)
+        status.pack(side=tk.LEFT, padx=5)
 
-        tree.pack(fill=tk.BOTH, expand=True)
+        def export(exporter, extension):
+            path = filedialog.asksaveasfilename(parent=window, defaultextension=extension)
+            if not path:
+                return
+            # Streams the table on the worker thread; the window polls for completion
+            status.config(text="Exporting...")
+            future = self.worker.submit(exporter, path, self.circuit, switches, bulbs)
+
+            def poll():
+                if not status.winfo_exists():
+                    return
+                if not future.done():
+                    window.after(100, poll)
+                elif future.exception() is not None:
+                    status.config(text="")
+                    messagebox.showerror("Export", str(future.exception()), parent=window)
+                else:
+                    status.config(text=f"Saved {path}")
+            poll()
+
+        tk.Button(toolbar, text="Export Binary", command=lambda: export(export_binary, ".lttb")).pack(side=tk.RIGHT)
+        tk.Button(toolbar, text="Export CSV", command=lambda: export(export_csv, ".csv")).pack(side=tk.RIGHT)
+
+        VirtualTable(window, headers, total, fetch).pack(fill=tk.BOTH, expand=True)
 
 
 if __name__ == "__main__":
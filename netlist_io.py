@@ -0,0 +1,236 @@
+import gc
+import json
+import mmap
+import struct
+from logic_engine import (Circuit, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb, SubCircuit,
+                          BusComponent, BusAndGate, BusOrGate, BusNotGate, BusXorGate, BusNandGate, BusAdder,
+                          Splitter, Merger, BusSwitch, BusBulb, Clock, DFlipFlop, Register)
+
+# Saved type name -> Component class
+COMPONENT_TYPES = {cls.__name__: cls for cls in (AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb,
+                                                 BusAndGate, BusOrGate, BusNotGate, BusXorGate, BusNandGate,
+                                                 BusAdder, Splitter, Merger, BusSwitch, BusBulb,
+                                                 Clock, DFlipFlop, Register)}
+
+FORMAT = "logisim-netlist"
+VERSION = 2 # 2 added bus widths and word values; version 1 files still load
+STATE_ON = 1 # Version 1 component flag: Switch is on
+
+# Both formats store components in order and wires as pairs of node indexes. Nodes are numbered
+# across the whole circuit, each component contributing its inputs and then its outputs.
+
+def _records(circuit, definitions=None):
+    # (type, name, value, delay, x, y, width) per component, and the wires as node index pairs. The
+    # value is a Switch's or DFlipFlop's state (0 or 1), a BusSwitch's or Register's word, or a Clock's
+    # half period times two plus its state. The width is 1 for plain components.
+    # SubCircuit definitions are added to `definitions` (structural hash -> (records, wires)) and
+    # referenced by hash in place of the type.
+    index = {}
+    records = []
+    for component in circuit.components:
+        for node in component.inputs.values() + component.outputs.values():
+            index[node] = len(index)
+        x, y = component.position
+        if isinstance(component, (BusSwitch, Register)):
+            value = int(component.value)
+        elif isinstance(component, Clock):
+            value = component.half_period << 1 | component.is_on
+        else:
+            value = int(getattr(component, "is_on", getattr(component, "state", 0)))
+        width = component.width if isinstance(component, BusComponent) else 1
+        kind = type(component).__name__
+        if isinstance(component, SubCircuit):
+            if definitions is None:
+                raise ValueError("Binary netlists can't hold subcircuits; save as JSON or flatten() first")
+            kind = component.definition.structural_hash()
+            if kind not in definitions:
+                definitions[kind] = _records(component.definition, definitions)
+        records.append((kind, component.name, value, component.delay, x, y, width))
+    wires = [(index[node1], index[node2]) for node1, node2 in circuit.wires]
+    return records, wires
+
+def _build(records, wires, definitions=None):
+    # Millions of new objects and no garbage: pausing the cycle collector roughly halves load time
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_circuit(records, wires, definitions or {}, {})
+    finally:
+        if enabled:
+            gc.enable()
+
+def _build_circuit(records, wires, definitions, built):
+    # `built` holds the definition Circuits created so far, so instances share them
+    components = []
+    nodes = []
+    for kind, name, value, delay, x, y, width in records:
+        cls = COMPONENT_TYPES.get(kind)
+        if cls is not None:
+            component = cls(width) if issubclass(cls, BusComponent) else cls()
+        elif kind in definitions:
+            if kind not in built:
+                built[kind] = _build_circuit(*definitions[kind], definitions, built)
+            component = SubCircuit(built[kind])
+        else:
+            raise ValueError(f"Unknown component type {kind!r}")
+        component.name = name
+        component.delay = delay
+        component.position = (x, y)
+        if isinstance(component, Clock):
+            component.half_period = value >> 1 or component.half_period
+            value &= 1
+        if value:
+            if isinstance(component, (BusSwitch, Register)):
+                component.set_value(value)
+            else:
+                component.set_state(True)
+        components.append(component)
+        nodes.extend(component.inputs.values())
+        nodes.extend(component.outputs.values())
+    circuit = Circuit.from_netlist(components, [(nodes[a], nodes[b]) for a, b in wires])
+    # The CLK level isn't saved: take it from the Clock (or Switch) driving it, so a clock that is
+    # high when loaded isn't mistaken for a rising edge
+    for component in circuit._clocked:
+        net = component._inputs[1].net
+        if net is not None and net.driver is not None:
+            component.clock = net.driver.value
+    return circuit
+
+def _json_netlist(records, wires):
+    components = []
+    for kind, name, value, delay, x, y, width in records:
+        # "state" is a bool except for BusSwitch and Register words; "width" is only written for buses
+        state = value if kind in (BusSwitch.__name__, Register.__name__) else bool(value & 1)
+        component = {"type": kind, "name": name, "state": state, "delay": delay, "position": [x, y]}
+        if kind == Clock.__name__:
+            component["half_period"] = value >> 1
+        if width != 1:
+            component["width"] = width
+        components.append(component)
+    return {"components": components, "wires": wires}
+
+def _json_records(data):
+    records = [(c["type"], c["name"], int(c.get("state", 0)) | c.get("half_period", 0) << 1, c.get("delay", 0),
+                *c["position"], c.get("width", 1)) for c in data["components"]]
+    return records, data["wires"]
+
+def save_json(circuit, path):
+    # Subcircuit definitions are stored once each under "definitions", keyed by structural hash
+    definitions = {}
+    records, wires = _records(circuit, definitions)
+    data = {"format": FORMAT, "version": VERSION, **_json_netlist(records, wires)}
+    if definitions:
+        data["definitions"] = {key: _json_netlist(*value) for key, value in definitions.items()}
+    with open(path, "w") as out:
+        json.dump(data, out, indent=1)
+
+def load_json(path):
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("format") != FORMAT:
+        raise ValueError("Not a netlist file")
+    if data.get("version") not in (1, VERSION):
+        raise ValueError(f"Unsupported netlist version {data.get('version')}")
+    definitions = {key: _json_records(value) for key, value in data.get("definitions", {}).items()}
+    return _build(*_json_records(data), definitions)
+
+# Binary layout (little-endian): a 24-byte header, then column arrays, each padded to 8 bytes
+#   header:    magic, version u16, reserved u16, string count u32, string bytes u32,
+#              component count u32, wire count u32
+#   strings:   u32 offsets (count + 1) into a UTF-8 blob holding type names and component names
+#   per component: type string u32, name string u32, value u64, delay i32, position 2 x f64, width u8
+#   wires:     2 x u32 node indexes per wire
+# Version 1 had a u8 flags column (STATE_ON) in place of the values and no widths.
+BINARY_MAGIC = b"LNET"
+HEADER = struct.Struct("<4sHHIIII")
+
+def save_binary(circuit, path):
+    records, wires = _records(circuit)
+    strings = {}
+    for kind, name, *_ in records:
+        strings.setdefault(kind, len(strings))
+        strings.setdefault(name, len(strings))
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    count = len(records)
+    sections = [
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        b"".join(encoded),
+        struct.pack(f"<{count}I", *(strings[r[0]] for r in records)),
+        struct.pack(f"<{count}I", *(strings[r[1]] for r in records)),
+        struct.pack(f"<{count}Q", *(r[2] for r in records)),
+        struct.pack(f"<{count}i", *(r[3] for r in records)),
+        struct.pack(f"<{2 * count}d", *(v for r in records for v in r[4:6])),
+        struct.pack(f"<{count}B", *(r[6] for r in records)),
+        struct.pack(f"<{2 * len(wires)}I", *(i for wire in wires for i in wire)),
+    ]
+    with open(path, "wb") as out:
+        out.write(HEADER.pack(BINARY_MAGIC, VERSION, 0, len(encoded), offsets[-1], count, len(wires)))
+        for section in sections:
+            out.write(section + bytes(-len(section) % 8))
+
+def load_binary(path):
+    # Reads the columns straight out of a memory-mapped file
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            return _load_binary(view)
+        finally:
+            view.release()
+
+def _load_binary(view):
+    if len(view) < HEADER.size:
+        raise ValueError("Truncated netlist file")
+    magic, version, _, string_count, string_size, count, wire_count = HEADER.unpack_from(view)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not a netlist file")
+    if version not in (1, VERSION):
+        raise ValueError(f"Unsupported netlist version {version}")
+    position = HEADER.size
+    columns = []
+    layout = [("I", string_count + 1), ("B", string_size), ("I", count), ("I", count), ("Q", count),
+              ("i", count), ("d", 2 * count), ("B", count), ("I", 2 * wire_count)]
+    if version == 1:
+        layout[4] = ("B", count) # Flags, where STATE_ON is 1 just like an on Switch's value
+        del layout[7]
+    sections = []
+    for fmt, length in layout:
+        size = length * struct.calcsize(fmt)
+        sections.append((fmt, position, size))
+        position += size + -size % 8
+    # Checked up front: a short column would otherwise just drop components or wires
+    _, start, size = sections[-1]
+    if start + size > len(view):
+        raise ValueError("Truncated netlist file")
+    try:
+        for fmt, start, size in sections:
+            columns.append(view[start:start + size].cast(fmt))
+        if version == 1:
+            columns.insert(7, [1] * count)
+        offsets, blob, kinds, names, values, delays, positions, widths, wires = columns
+        strings = [str(blob[offsets[i]:offsets[i + 1]], "utf-8") for i in range(string_count)]
+        records = zip(map(strings.__getitem__, kinds), map(strings.__getitem__, names), values, delays,
+                      positions[0::2], positions[1::2], widths)
+        return _build(records, zip(wires[0::2], wires[1::2]))
+    finally:
+        # Views into the map must be gone before load_binary() closes it, also after an error
+        for column in columns:
+            if isinstance(column, memoryview):
+                column.release()
+
+def save(circuit, path):
+    # Binary for ".lnet" files, JSON otherwise
+    if str(path).endswith(".lnet"):
+        save_binary(circuit, path)
+    else:
+        save_json(circuit, path)
+
+def load(path):
+    with open(path, "rb") as f:
+        magic = f.read(len(BINARY_MAGIC))
+    if magic == BINARY_MAGIC:
+        return load_binary(path)
+    return load_json(path)
@@ -0,0 +1,226 @@
+import itertools
+from logic_engine import (Circuit, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb, BusSwitch, Clock,
+                          BOOL_OPS)
+
+GATE_TYPES = {"AND": AndGate, "OR": OrGate, "NOT": NotGate, "XOR": XorGate, "NAND": NandGate}
+COMMUTATIVE = {"AND", "OR", "XOR", "NAND"}
+
+class _Signal:
+    # A value in the reduced netlist: a free Switch, a gate over other signals, or one output of a
+    # component kept as it is (feedback loops, subcircuits). Constants are plain bools instead.
+    __slots__ = ("id", "op", "inputs", "source", "index", "delay", "node")
+    _ids = itertools.count()
+
+    def __init__(self, op, inputs=(), source=None, index=0, delay=1):
+        self.id = next(self._ids)
+        self.op = op # Gate opcode, "SWITCH" or "KEEP"
+        self.inputs = inputs
+        self.source = source # Original Switch or kept component
+        self.index = index # Output of the kept component
+        self.delay = delay
+        self.node = None # Output Node in the reduced circuit, once built
+
+class Optimized:
+    # Reduced copy of a circuit plus the mapping back to the original nodes
+    def __init__(self, original, circuit, signals, switches, bulbs, order, kept):
+        self.original = original
+        self.circuit = circuit # The reduced Circuit; simulate or tabulate this one
+        self.signals = signals # Original Node -> _Signal or constant bool
+        self.switches = switches # Original free Switch -> its copy in the reduced circuit
+        self.bulbs = bulbs # Original Bulb -> its copy
+        self._order = order # Every _Signal, inputs before the gates using them
+        self.kept = kept # Original component kept whole (loops, blocks, buses) -> its copy
+
+    def gate_count(self):
+        return sum(1 for c in self.circuit.components if not isinstance(c, (Switch, Bulb)))
+
+    def simulate(self, ticks=10):
+        # Runs the reduced circuit from the original switch states, then updates the original nodes
+        for switch, copy in self.switches.items():
+            if copy.is_on != switch.is_on:
+                copy.set_state(switch.is_on)
+        for original, copy in self.kept.items():
+            if isinstance(original, BusSwitch) and copy.value != original.value:
+                copy.set_value(original.value)
+            elif isinstance(original, Clock) and copy.is_on != original.is_on:
+                copy.set_state(original.is_on)
+        result = self.circuit.simulate(ticks)
+        self.write_back()
+        return result
+
+    def write_back(self):
+        # Copies values to the original nodes; removed gates are recomputed from their inputs
+        values = {}
+        for signal in self._order:
+            if signal.node is not None:
+                values[signal] = signal.node.value
+            elif signal.op in BOOL_OPS:
+                a = signal.inputs[0]
+                b = signal.inputs[-1]
+                values[signal] = BOOL_OPS[signal.op](values.get(a, a), values.get(b, b))
+            else:
+                values[signal] = False
+        for node, signal in self.signals.items():
+            node.value = values[signal] if isinstance(signal, _Signal) else signal
+        for bulb in self.bulbs:
+            bulb.is_lit = bulb.inputs["A"].value
+        for component in self.kept:
+            if not component.outputs:
+                component.evaluate() # Sinks such as BusBulb show their input
+
+def optimize(circuit, fixed=()):
+    # Constant folding (the `fixed` Switches keep their current state), double-NOT collapse,
+    # merging of identical gates and removal of gates that can't reach a Bulb
+    fixed = set(fixed)
+    table = {} # Hash-consing: (op, input ids) -> _Signal
+    order = []
+
+    def gate(op, inputs, delay):
+        if op in COMMUTATIVE:
+            inputs = tuple(sorted(inputs, key=lambda s: s.id))
+        key = (op,) + tuple(s.id for s in inputs)
+        signal = table.get(key)
+        if signal is None:
+            table[key] = signal = _Signal(op, inputs, delay=delay)
+            order.append(signal)
+        return signal
+
+    def invert(a, delay):
+        if isinstance(a, bool):
+            return not a
+        if a.op == "NOT":
+            return a.inputs[0]
+        return gate("NOT", (a,), delay)
+
+    def fold(op, a, b, delay):
+        # Signal for op(a, b), with a and b each a _Signal or a constant
+        if op == "NOT":
+            return invert(a, delay)
+        if isinstance(a, bool) and not isinstance(b, bool):
+            a, b = b, a # Constant, if any, in b
+        if isinstance(b, bool):
+            if isinstance(a, bool):
+                return BOOL_OPS[op](a, b)
+            if op == "AND":
+                return a if b else False
+            if op == "OR":
+                return True if b else a
+            if op == "XOR":
+                return invert(a, delay) if b else a
+            return invert(a, delay) if b else True # NAND
+        if a is b:
+            if op == "XOR":
+                return False
+            return invert(a, delay) if op == "NAND" else a
+        return gate(op, (a, b), delay)
+
+    driver = {}
+    for net in circuit.nets:
+        if net.driver is not None:
+            for dest in net.sinks:
+                driver[dest] = net.driver
+
+    signals = {}
+    kept_inputs = {}
+    ranks = circuit.ranks()
+    loop_members = {component for loop in circuit.loops() for component in loop}
+    components = sorted(circuit.components, key=ranks.__getitem__)
+
+    # Components that aren't folded get their output signals up front, so loops can refer to them
+    for component in components:
+        if component.op is None and not isinstance(component, (Switch, Bulb)) or component in loop_members:
+            for index, node in enumerate(component.outputs.values()):
+                signals[node] = _Signal("KEEP", source=component, index=index)
+                order.append(signals[node])
+
+    for component in components:
+        inputs = tuple(component.inputs.values())
+        for node in inputs:
+            source = driver.get(node)
+            signals[node] = signals[source] if source is not None else False
+        if isinstance(component, Switch):
+            q = component.outputs["Q"]
+            if component in fixed:
+                signals[q] = component.is_on
+            else:
+                signals[q] = _Signal("SWITCH", source=component)
+                order.append(signals[q])
+        elif isinstance(component, Bulb):
+            pass
+        elif component.op is not None and component not in loop_members:
+            out = component.outputs["Q"]
+            signals[out] = fold(component.op, signals[inputs[0]], signals[inputs[-1]], component.delay)
+        else:
+            kept_inputs[component] = [signals[node] for node in inputs]
+
+    # Keep what reaches a Bulb or a kept component (those stay whole); free Switches always stay
+    live = set()
+    pending = [signal for signal in order if signal.op in ("KEEP", "SWITCH")]
+    pending += [signals[bulb.inputs["A"]] for bulb in components if isinstance(bulb, Bulb)]
+    # Kept components without outputs (e.g. BusBulb) are sinks, like Bulbs
+    pending += [value for component, values in kept_inputs.items() if not component.outputs for value in values]
+    while pending:
+        signal = pending.pop()
+        if not isinstance(signal, _Signal) or signal in live:
+            continue
+        live.add(signal)
+        if signal.op == "KEEP":
+            pending.extend(kept_inputs[signal.source])
+        else:
+            pending.extend(signal.inputs)
+
+    # Build the reduced circuit
+    new_components = []
+    copies = {}
+    switches = {}
+    bulbs = {}
+    for signal in order:
+        if signal not in live:
+            continue
+        if signal.op == "SWITCH":
+            copy = signal.source.copy()
+            switches[signal.source] = copy
+        elif signal.op == "KEEP":
+            copy = copies.get(signal.source)
+            if copy is None:
+                copy = copies[signal.source] = signal.source.copy()
+                new_components.append(copy)
+            signal.node = copy.outputs.values()[signal.index]
+            continue
+        else:
+            copy = GATE_TYPES[signal.op](delay=signal.delay)
+        new_components.append(copy)
+        signal.node = copy.outputs["Q"]
+
+    for component in kept_inputs:
+        if component not in copies:
+            copies[component] = component.copy()
+            new_components.append(copies[component])
+
+    constant = [] # NOT gate with an unconnected input: the driver for constant True inputs
+    wires = []
+
+    def connect(signal, sink):
+        if signal is True:
+            if not constant:
+                constant.append(NotGate(delay=0))
+                new_components.append(constant[0])
+            wires.append((constant[0].outputs["Q"], sink))
+        elif signal is not False:
+            wires.append((signal.node, sink))
+
+    for signal in order:
+        if signal in live and signal.op in BOOL_OPS:
+            for value, sink in zip(signal.inputs, signal.node.component.inputs.values()):
+                connect(value, sink)
+    for component, values in kept_inputs.items():
+        for value, sink in zip(values, copies[component].inputs.values()):
+            connect(value, sink)
+    for component in components:
+        if isinstance(component, Bulb):
+            copy = bulbs[component] = component.copy()
+            new_components.append(copy)
+            connect(signals[component.inputs["A"]], copy.inputs["A"])
+
+    reduced = Circuit.from_netlist(new_components, wires)
+    return Optimized(circuit, reduced, signals, switches, bulbs, order, dict(copies))
@@ -0,0 +1,66 @@
+from collections import Counter, deque
+
+STEP_HISTORY = 1000 # Recent step() wall times kept per Profile
+
+class Profile:
+    # Activity collected by Circuit.step() and simulate() while attached as Circuit.profile
+    # (see Circuit.profiling()). Counters only grow; subtract two copies for a window.
+    def __init__(self):
+        self.evaluations = Counter() # Component -> times evaluated
+        self.toggles = Counter() # Node -> value changes
+        self.steps = 0
+        self.step_seconds = 0.0 # Wall time spent in step()
+        self.recent_steps = deque(maxlen=STEP_HISTORY) # Wall time of each recent step()
+        self.settles = Counter() # Ticks -> simulate() calls that took that many
+
+    def record_step(self, seconds):
+        self.steps += 1
+        self.step_seconds += seconds
+        self.recent_steps.append(seconds)
+
+    def events(self):
+        return sum(self.evaluations.values())
+
+    def events_per_second(self):
+        # Component evaluations per second of step() time
+        return self.events() / self.step_seconds if self.step_seconds else 0.0
+
+    def mean_step(self):
+        return self.step_seconds / self.steps if self.steps else 0.0
+
+    def mean_settle(self):
+        calls = sum(self.settles.values())
+        return sum(ticks * count for ticks, count in self.settles.items()) / calls if calls else 0.0
+
+    def hottest(self, count=10):
+        # (Component, evaluations) for the most evaluated components
+        return self.evaluations.most_common(count)
+
+    def activity(self):
+        # Component -> evaluations relative to the busiest component, 0.0 to 1.0
+        if not self.evaluations:
+            return {}
+        peak = max(self.evaluations.values())
+        return {component: count / peak for component, count in self.evaluations.items()}
+
+    def copy(self):
+        profile = Profile()
+        profile.evaluations = Counter(self.evaluations)
+        profile.toggles = Counter(self.toggles)
+        profile.steps = self.steps
+        profile.step_seconds = self.step_seconds
+        profile.recent_steps = deque(self.recent_steps, maxlen=STEP_HISTORY)
+        profile.settles = Counter(self.settles)
+        return profile
+
+    def since(self, earlier):
+        # Activity between an earlier copy() and this one (recent_steps stay as they are)
+        profile = self.copy()
+        profile.evaluations.subtract(earlier.evaluations)
+        profile.toggles.subtract(earlier.toggles)
+        profile.settles.subtract(earlier.settles)
+        for counter in (profile.evaluations, profile.toggles, profile.settles):
+            counter += Counter() # Drops the zero entries
+        profile.steps -= earlier.steps
+        profile.step_seconds -= earlier.step_seconds
+        return profile
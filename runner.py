@@ -0,0 +1,171 @@
+import argparse
+import sys
+import time
+from logic_engine import Switch, Bulb, BusSwitch, BusBulb, STABLE
+from netlist_io import load
+
+# Headless batch runner; never imports tkinter, so it works on servers and in CI:
+#   python -m runner circuit.lnet vectors.txt -o results.txt
+#   generate_vectors | python -m runner circuit.json
+# Each stimulus line is one input vector: a 0/1 per Switch, in circuit order, optionally separated by
+# spaces or commas. A BusSwitch takes a number instead (42, 0x2A or 0b101010), so lines with buses
+# need the separators. A first line of names ("A B CIN") picks the inputs and their column order.
+# Blank lines and "#" comments are skipped. Every vector produces one output line with a 0/1 per
+# Bulb, after a "# name name ..." header; a BusBulb shows its word in decimal, and then the values
+# are separated by spaces. Throughput is reported on stderr at the end.
+
+BATCH = 4096 # Vectors evaluated together by combinational circuits
+SETTLE_TICKS = 1000 # Step budget per vector for circuits with feedback loops
+
+def _number(token):
+    # Decimal (leading zeros allowed) or 0x/0o/0b; None if the token isn't a number
+    try:
+        return int(token, 0 if token[:2].lower() in ("0x", "0o", "0b") else 10)
+    except ValueError:
+        return None
+
+def parse_vector(line, widths):
+    # One value per input of the given width: a bool for 1 bit, an int for a bus
+    tokens = line.replace(",", " ").split()
+    if len(tokens) == 1 and len(tokens[0]) > 1 and all(width == 1 for width in widths):
+        tokens = list(tokens[0])
+    if len(tokens) != len(widths):
+        raise ValueError(f"expected {len(widths)} values, got {line.strip()!r}")
+    values = []
+    for token, width in zip(tokens, widths):
+        if width == 1:
+            if token not in ("0", "1"):
+                raise ValueError(f"expected 0 or 1, got {token!r}")
+            values.append(token == "1")
+        elif _number(token) is None or not 0 <= _number(token) < 1 << width:
+            raise ValueError(f"expected a {width}-bit number, got {token!r}")
+        else:
+            values.append(_number(token))
+    return values
+
+def read_stimulus(lines, switches):
+    # Yields (line number, values) per vector; the Switches list (Switch or BusSwitch) is updated in
+    # place by a header line
+    first = True
+    widths = [switch.outputs["Q"].width for switch in switches]
+    for number, line in enumerate(lines, 1):
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if first:
+            first = False
+            names = line.replace(",", " ").split()
+            if any(_number(name) is None for name in names):
+                by_name = {switch.name: switch for switch in switches}
+                missing = [name for name in names if name not in by_name]
+                if missing:
+                    raise ValueError(f"line {number}: no Switch named {', '.join(missing)}")
+                switches[:] = [by_name[name] for name in names]
+                widths = [switch.outputs["Q"].width for switch in switches]
+                continue
+        try:
+            yield number, parse_vector(line, widths)
+        except ValueError as exc:
+            raise ValueError(f"line {number}: {exc}") from None
+
+def _batches(vectors, size):
+    batch = []
+    for vector in vectors:
+        batch.append(vector)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def run(circuit, lines, out, batch=BATCH):
+    # Streams results for every vector in `lines` to `out`; returns (vectors, vectors that didn't settle)
+    switches = [c for c in circuit.components if isinstance(c, (Switch, BusSwitch))]
+    bulbs = [c for c in circuit.components if isinstance(c, (Bulb, BusBulb))]
+    vectors = read_stimulus(lines, switches)
+    out.write("# " + " ".join(bulb.name for bulb in bulbs) + "\n")
+    count = 0
+    unsettled = 0
+    try:
+        compiled = circuit.compile()
+        function = circuit.codegen() # Straight-line code for the whole batch
+    except ValueError:
+        compiled = None
+
+    if compiled is not None:
+        # Combinational: no state carries over, so whole batches are evaluated bit-sliced
+        for chunk in _batches(vectors, batch):
+            # Resolved per batch, since a header line reorders the Switches on the first one
+            columns = [compiled.switches.index(switch) for switch in switches]
+            fixed = [j for j, switch in enumerate(compiled.switches) if switch.is_on and j not in columns]
+            words = [0] * len(compiled.switches)
+            for k, (_, values) in enumerate(chunk):
+                for column, value in zip(columns, values):
+                    if value:
+                        words[column] |= 1 << k
+            # Switches left out by a header line keep their saved state
+            for j in fixed:
+                words[j] = (1 << len(chunk)) - 1
+            results = function(words, (1 << len(chunk)) - 1)
+            out.write("".join("".join("1" if (word >> k) & 1 else "0" for word in results) + "\n"
+                              for k in range(len(chunk))))
+            out.flush()
+            count += len(chunk)
+        return count, unsettled
+
+    # Feedback loops or buses: simulate vector by vector, keeping state between them
+    separator = " " if any(isinstance(bulb, BusBulb) for bulb in bulbs) else ""
+    for _, values in vectors:
+        for switch, value in zip(switches, values):
+            if isinstance(switch, BusSwitch):
+                if switch.value != value:
+                    switch.set_value(value)
+            elif switch.is_on != value:
+                switch.set_state(value)
+        if circuit.simulate(SETTLE_TICKS).status != STABLE:
+            unsettled += 1
+        out.write(separator.join(str(bulb.value) if isinstance(bulb, BusBulb) else "1" if bulb.is_lit else "0"
+                                 for bulb in bulbs) + "\n")
+        out.flush()
+        count += 1
+    return count, unsettled
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m runner", description="Run input vectors through a saved circuit")
+    parser.add_argument("netlist", help="circuit saved as .json or .lnet")
+    parser.add_argument("stimulus", nargs="?", default="-", help="input vectors, one per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="where to write the results (default: stdout)")
+    options = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        circuit = load(options.netlist)
+    except (OSError, ValueError, KeyError, IndexError) as exc:
+        print(f"Could not load {options.netlist}: {exc}", file=sys.stderr)
+        return 2
+    loaded = time.perf_counter()
+
+    interactive = options.stimulus == "-" and sys.stdin.isatty()
+    source = sys.stdin if options.stimulus == "-" else open(options.stimulus)
+    out = sys.stdout if options.output == "-" else open(options.output, "w")
+    try:
+        # Typed input gets its answer line by line
+        count, unsettled = run(circuit, source, out, 1 if interactive else BATCH)
+    except ValueError as exc:
+        print(f"{options.stimulus}: {exc}", file=sys.stderr)
+        return 2
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    seconds = time.perf_counter() - loaded
+    rate = count / seconds if seconds else 0.0
+    print(f"{count} vectors in {seconds:.3f}s ({rate:,.0f} vectors/s), load {loaded - started:.3f}s", file=sys.stderr)
+    if unsettled:
+        print(f"{unsettled} vectors did not settle within {SETTLE_TICKS} ticks", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+# values: {Node: value} for every node that changed since the previous snapshot was taken
+# conflicts: frozenset of Nodes on multiply-driven nets, or None if unchanged since the previous snapshot
+Snapshot = namedtuple("Snapshot", ["tick", "values", "conflicts", "ticks_per_second"])
+
+class SimulationWorker:
+    # Owns a Circuit on a background thread. Every edit goes through submit(), and results
+    # come back as snapshots, so the GUI never reads or writes Node.value directly.
+    def __init__(self, circuit, rate=100.0):
+        self.circuit = circuit
+        self.rate = rate # simulate() calls per second, or None to run as fast as possible
+        self.commands = queue.Queue()
+        self.tick = 0
+        self._lock = threading.Lock()
+        self._values = {} # Changes not yet handed to the GUI
+        self._conflicts = None
+        self._revision = None
+        self._ticks_per_second = 0.0
+        self.trace = None # waveform.Trace sampled after every tick; set it through submit()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.circuit.track_changes()
+        self._thread = threading.Thread(target=self._run, name="SimulationWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.commands.put(None) # Wake the thread if it's waiting for commands
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def submit(self, fn, *args):
+        # Run fn(*args) on the worker thread before its next tick; returns a Future with the result
+        future = Future()
+        self.commands.put((future, fn, args))
+        return future
+
+    def take_snapshot(self):
+        # Changes published since the last call, or None if nothing changed
+        with self._lock:
+            if not self._values and self._conflicts is None:
+                return None
+            snapshot = Snapshot(self.tick, self._values, self._conflicts, self._ticks_per_second)
+            self._values = {}
+            self._conflicts = None
+        return snapshot
+
+    def _run(self):
+        window_start = time.perf_counter()
+        window_ticks = 0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            self._apply_commands()
+            self.circuit.tick_clocks()
+            self.circuit.simulate()
+            self.tick += 1
+            if self.trace is not None:
+                self.trace.sample(self.tick)
+            busy = self._publish()
+
+            window_ticks += 1
+            now = time.perf_counter()
+            if now - window_start >= 1.0:
+                self._ticks_per_second = window_ticks / (now - window_start)
+                window_start = now
+                window_ticks = 0
+
+            # Sleep out the rest of the tick, waking early for new commands
+            if self.rate:
+                timeout = 1.0 / self.rate - (time.perf_counter() - started)
+                if timeout > 0:
+                    self._wait_for_command(timeout)
+            elif not busy:
+                # Free-running and settled: don't spin while waiting for edits
+                self._wait_for_command(0.05)
+
+    def _wait_for_command(self, timeout):
+        try:
+            command = self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return
+        if command is not None:
+            self._apply(command)
+
+    def _apply_commands(self):
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if command is not None:
+                self._apply(command)
+
+    def _apply(self, command):
+        future, fn, args = command
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+
+    def _publish(self):
+        changes = self.circuit.take_changes()
+        conflicts = None
+        if self.circuit.revision != self._revision:
+            self._revision = self.circuit.revision
+            conflicts = frozenset(node for net in self.circuit.conflicts for node in net.nodes())
+        if not changes and conflicts is None:
+            return False
+        values = {node: node.value for node in changes}
+        with self._lock:
+            self._values.update(values)
+            if conflicts is not None:
+                self._conflicts = conflicts
+        return True
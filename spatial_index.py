@@ -0,0 +1,86 @@
+class SpatialGrid:
+    # Uniform grid over bounding boxes: point and rectangle queries only visit the cells they touch
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {} # (cx, cy) -> set of keys overlapping that cell
+        self.bounds = {} # key -> (x0, y0, x1, y1)
+        self.order = {} # key -> insertion sequence, so results come back bottom to top
+        self._sequence = 0
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return int(x0 // size), int(y0 // size), int(x1 // size), int(y1 // size)
+
+    def _cells(self, cell_range):
+        cx0, cy0, cx1, cy1 = cell_range
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                yield (cx, cy)
+
+    def insert(self, key, x0, y0, x1, y1):
+        # Adds key, or moves it if it's already indexed
+        old = self.bounds.get(key)
+        new_range = self._cell_range(x0, y0, x1, y1)
+        if old is not None:
+            old_range = self._cell_range(*old)
+            if old_range != new_range:
+                self._unlink(key, old_range)
+                self._link(key, new_range)
+        else:
+            self._link(key, new_range)
+            self.order[key] = self._sequence
+            self._sequence += 1
+        self.bounds[key] = (x0, y0, x1, y1)
+
+    def remove(self, key):
+        old = self.bounds.pop(key, None)
+        if old is not None:
+            self._unlink(key, self._cell_range(*old))
+            del self.order[key]
+
+    def _link(self, key, cell_range):
+        for cell in self._cells(cell_range):
+            self.cells.setdefault(cell, set()).add(key)
+
+    def _unlink(self, key, cell_range):
+        for cell in self._cells(cell_range):
+            keys = self.cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.cells[cell]
+
+    def at(self, x, y):
+        # Keys whose bounds contain the point, in insertion order
+        size = self.cell_size
+        hits = []
+        for key in self.cells.get((int(x // size), int(y // size)), ()):
+            x0, y0, x1, y1 = self.bounds[key]
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                hits.append(key)
+        hits.sort(key=self.order.__getitem__)
+        return hits
+
+    def within(self, x0, y0, x1, y1, contained=False):
+        # Keys overlapping the rectangle (or fully inside it with contained=True), in insertion order
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        cx0, cy0, cx1, cy1 = cell_range = self._cell_range(x0, y0, x1, y1)
+        candidates = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Large rectangle over a sparse grid: cheaper to scan the occupied cells
+            for (cx, cy), keys in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    candidates.update(keys)
+        else:
+            for cell in self._cells(cell_range):
+                candidates.update(self.cells.get(cell, ()))
+        hits = []
+        for key in candidates:
+            bx0, by0, bx1, by1 = self.bounds[key]
+            if contained:
+                if x0 <= bx0 and bx1 <= x1 and y0 <= by0 and by1 <= y1:
+                    hits.append(key)
+            elif bx0 <= x1 and x0 <= bx1 and by0 <= y1 and y0 <= by1:
+                hits.append(key)
+        hits.sort(key=self.order.__getitem__)
+        return hits
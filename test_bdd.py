@@ -0,0 +1,74 @@
+from logic_engine import Circuit, AndGate, XorGate, Switch, Bulb
+from bdd import BDD, SymbolicCircuit, counterexample, equivalent
+from test_logic import build_full_adder, build_ripple_adder
+
+def test_bdd_manager():
+    bdd = BDD(3)
+    x, y, z = bdd.var(0), bdd.var(1), bdd.var(2)
+    f = bdd.apply("OR", bdd.apply("AND", x, y), z)
+    # Canonical: the same function built another way is the same node
+    assert bdd.apply("OR", z, bdd.apply("AND", y, x)) == f
+    assert bdd.apply("NAND", x, bdd.apply("NOT", x, x)) == 1
+    assert bdd.count_minterms(f) == 5
+    assert bdd.count_minterms(bdd.var(1)) == 4
+    assert bdd.satisfy(bdd.apply("XOR", x, x)) is None
+    assert bdd.satisfy(bdd.apply("AND", x, bdd.negate(z))) == {0: True, 2: False}
+    assert list(bdd.cubes([f])) == [
+        ((False, None, False), (False,)), ((False, None, True), (True,)),
+        ((True, False, False), (False,)), ((True, False, True), (True,)), ((True, True, None), (True,)),
+    ]
+
+    print("BDD Manager Test Passed")
+
+def test_symbolic_adder():
+    # 64-bit adder: 2**128 rows, far beyond enumeration
+    c, switches, bulbs = build_ripple_adder(64, build_full_adder())
+    symbolic = SymbolicCircuit(c)
+    assert [s.name for s in symbolic.switches[:4]] == ["A0", "B0", "A1", "B1"]
+    assert symbolic.size() < 10000
+    carry = bulbs[-1]
+    # For each a, exactly a values of b overflow: 0 + 1 + ... + (2**64 - 1) pairs in all
+    assert symbolic.count(carry) == (1 << 63) * ((1 << 64) - 1)
+    lit = symbolic.satisfy(carry)
+    a = sum(lit[s] << i for i, s in enumerate(switches[:64]))
+    b = sum(lit[s] << i for i, s in enumerate(switches[64:]))
+    assert a + b >= 1 << 64
+
+    print("Symbolic Adder Test Passed")
+
+def test_equivalence():
+    first, _, _ = build_ripple_adder(8, build_full_adder())
+    second, _, bulbs = build_ripple_adder(8, build_full_adder())
+    assert equivalent(first, second)
+
+    # Same names, different function: S0 = A0 AND B0 instead of A0 XOR B0
+    third = Circuit()
+    a, b, gate, bulb = Switch(), Switch(), AndGate(), Bulb()
+    a.name, b.name, bulb.name = "A0", "B0", "S0"
+    for comp in (a, b, gate, bulb):
+        third.add_component(comp)
+    third.add_wire(a.outputs["Q"], gate.inputs["A"])
+    third.add_wire(b.outputs["Q"], gate.inputs["B"])
+    third.add_wire(gate.outputs["Q"], bulb.inputs["A"])
+    reference = Circuit()
+    a, b, gate, bulb = Switch(), Switch(), XorGate(), Bulb()
+    a.name, b.name, bulb.name = "A0", "B0", "S0"
+    for comp in (a, b, gate, bulb):
+        reference.add_component(comp)
+    reference.add_wire(a.outputs["Q"], gate.inputs["A"])
+    reference.add_wire(b.outputs["Q"], gate.inputs["B"])
+    reference.add_wire(gate.outputs["Q"], bulb.inputs["A"])
+    assert counterexample(third, reference) == {"A0": False, "B0": True}
+
+    try:
+        equivalent(first, reference)
+        assert False, "Circuits with different inputs can't be compared"
+    except ValueError:
+        pass
+
+    print("Equivalence Test Passed")
+
+if __name__ == "__main__":
+    test_bdd_manager()
+    test_symbolic_adder()
+    test_equivalence()
@@ -0,0 +1,51 @@
+import random
+from logic_engine import OSCILLATING, STABLE
+from benchmarks.generators import ripple_adder, array_multiplier, parity_tree, random_dag, ring_oscillators
+from benchmarks.bench_suite import compare, run_case
+
+def number(values):
+    return sum(bool(value) << i for i, value in enumerate(values))
+
+def test_generators():
+    rng = random.Random(1)
+    for build, expected in ((ripple_adder, lambda a, b: a + b), (array_multiplier, lambda a, b: a * b)):
+        c, switches, bulbs = build(5)
+        compiled = c.compile()
+        for _ in range(20):
+            a, b = rng.randrange(32), rng.randrange(32)
+            bits = [(a >> i) & 1 for i in range(5)] + [(b >> i) & 1 for i in range(5)]
+            assert number(compiled.evaluate(bits)) == expected(a, b)
+
+    c, switches, bulbs = parity_tree(7)
+    for switch in switches[:3]:
+        switch.set_state(True)
+    c.simulate()
+    assert bulbs[0].is_lit
+
+    c, switches, bulbs = random_dag(300, inputs=8, outputs=4)
+    assert len(bulbs) == 4 and not c.loops()
+
+    c, switches, bulbs = ring_oscillators(3, 5)
+    assert len(c.loops()) == 3
+    assert c.simulate(100).status == STABLE
+    switches[1].set_state(True)
+    assert c.simulate(100).status == OSCILLATING
+
+    print("Generators Test Passed")
+
+def test_regression_check():
+    results = {"results": {"adder": run_case(ripple_adder, (4,))}}
+    assert compare(results, results) == []
+    slower = {"results": {"adder": dict(results["results"]["adder"])}}
+    slower["results"]["adder"]["build_seconds"] *= 2
+    slower["results"]["adder"]["evals_per_second"] /= 2
+    regressions = compare(slower, results, threshold=0.25)
+    assert len(regressions) == 2 and regressions[0].startswith("adder.build_seconds")
+    # Improvements are never regressions
+    assert compare(results, slower, threshold=0.25) == []
+
+    print("Regression Check Test Passed")
+
+if __name__ == "__main__":
+    test_generators()
+    test_regression_check()
@@ -0,0 +1,201 @@
+import os
+import tempfile
+from logic_engine import Circuit, AndGate, XorGate, NotGate, Switch, Bulb, Clock, DFlipFlop, Register, BusAdder
+from logic_engine import BusSwitch, BusBulb
+from netlist_io import save, load
+from cycles import CycleSimulator
+
+def build_counter(bits):
+    # Synchronous binary counter from D flip-flops, counting while the EN switch is on
+    c = Circuit()
+    clock, enable = Clock(1), Switch()
+    enable.name = "EN"
+    c.add_component(clock)
+    c.add_component(enable)
+    carry = enable.outputs["Q"]
+    bulbs = []
+    for _ in range(bits):
+        flop, toggle, chain, bulb = DFlipFlop(), XorGate(), AndGate(), Bulb()
+        for comp in (flop, toggle, chain, bulb):
+            c.add_component(comp)
+        c.add_wire(clock.outputs["Q"], flop.inputs["CLK"])
+        c.add_wire(flop.outputs["Q"], toggle.inputs["A"])
+        c.add_wire(carry, toggle.inputs["B"])
+        c.add_wire(toggle.outputs["Q"], flop.inputs["D"])
+        c.add_wire(flop.outputs["Q"], chain.inputs["A"])
+        c.add_wire(carry, chain.inputs["B"])
+        c.add_wire(flop.outputs["Q"], bulb.inputs["A"])
+        carry = chain.outputs["Q"]
+        bulbs.append(bulb)
+    return c, clock, enable, bulbs
+
+def count(bulbs):
+    return sum(bulb.is_lit << i for i, bulb in enumerate(bulbs))
+
+def test_flip_flops():
+    c, clock, enable, bulbs = build_counter(4)
+    enable.set_state(True)
+    c.simulate()
+    # Event-driven: a rising edge every second tick of a half period 1 clock
+    for _ in range(10):
+        clock.tick()
+        c.simulate()
+    assert count(bulbs) == 5
+
+    # Cycle-based runs continue from the same state, and the event-driven engine from theirs
+    sim = CycleSimulator(c)
+    sim.run(3)
+    assert count(bulbs) == 8 and sim.cycles == 3
+    clock.tick()
+    c.simulate()
+    assert count(bulbs) == 9
+    sim.run(1000)
+    assert count(bulbs) == (9 + 1000) % 16
+    enable.set_state(False)
+    sim.run(5)
+    assert count(bulbs) == (9 + 1000) % 16
+
+    # Register and bus adder: a 16-bit counter, also after a netlist round trip
+    c = Circuit()
+    clock, register, adder, step, total = Clock(3), Register(16), BusAdder(16), BusSwitch(16), BusBulb(16)
+    for comp in (clock, register, adder, step, total):
+        c.add_component(comp)
+    c.add_wire(clock.outputs["Q"], register.inputs["CLK"])
+    c.add_wire(register.outputs["Q"], adder.inputs["A"])
+    c.add_wire(step.outputs["Q"], adder.inputs["B"])
+    c.add_wire(adder.outputs["S"], register.inputs["D"])
+    c.add_wire(register.outputs["Q"], total.inputs["A"])
+    step.set_value(3)
+    CycleSimulator(c).run(100000)
+    assert total.value == register.value == 300000 % 65536
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("counter.json", "counter.lnet"):
+            path = os.path.join(folder, name)
+            save(c, path)
+            loaded = load(path)
+            assert loaded.components[0].half_period == 3 and loaded.components[1].value == 300000 % 65536
+            CycleSimulator(loaded).run(10)
+            assert loaded.components[-1].value == (300000 + 30) % 65536
+
+    print("Flip-Flop Test Passed")
+
+def build_shift_register(stages):
+    # Switch -> DFF -> DFF -> ... and BusSwitch -> Register -> Register -> ..., all on one Clock
+    c = Circuit()
+    clock, bit, word = Clock(), Switch(), BusSwitch(8)
+    for comp in (clock, bit, word):
+        c.add_component(comp)
+    flops, registers = [], []
+    previous_bit, previous_word = bit.outputs["Q"], word.outputs["Q"]
+    for _ in range(stages):
+        flop, register = DFlipFlop(), Register(8)
+        c.add_component(flop)
+        c.add_component(register)
+        c.add_wire(clock.outputs["Q"], flop.inputs["CLK"])
+        c.add_wire(clock.outputs["Q"], register.inputs["CLK"])
+        c.add_wire(previous_bit, flop.inputs["D"])
+        c.add_wire(previous_word, register.inputs["D"])
+        previous_bit, previous_word = flop.outputs["Q"], register.outputs["Q"]
+        flops.append(flop)
+        registers.append(register)
+    return c, clock, bit, word, flops, registers
+
+def test_shift_register():
+    # Every stage takes its neighbour's value from before the edge, so data moves one stage per cycle
+    # in the event-driven engine just as in CycleSimulator
+    event = build_shift_register(3)
+    cycle = build_shift_register(3)
+    sim = CycleSimulator(cycle[0])
+    event[0].simulate()
+    pattern = [(True, 5), (False, 6), (True, 7), (True, 8), (False, 9), (False, 10)]
+    for index, (bit, word) in enumerate(pattern):
+        for c, clock, switch, bus, flops, registers in (event, cycle):
+            switch.set_state(bit)
+            bus.set_value(word)
+        event[1].set_state(True)
+        event[0].simulate()
+        event[1].set_state(False)
+        event[0].simulate()
+        sim.run(1)
+        expected = [pattern[index - stage] if index >= stage else (False, 0) for stage in range(3)]
+        for c, clock, switch, bus, flops, registers in (event, cycle):
+            assert [(flop.state, register.value) for flop, register in zip(flops, registers)] == expected
+            assert [flop.outputs["Q"].value for flop in flops] == [bit for bit, _ in expected]
+
+    print("Shift Register Test Passed")
+
+def test_gated_clock():
+    # The edge reaches CLK through gates: an inverter (registers latch on the falling Clock edge) or
+    # an AND with an enable Switch. Each stage still takes the value from before the edge.
+    for gate in (NotGate, AndGate):
+        c = Circuit()
+        clock, bit, enable, buffer = Clock(), Switch(), Switch(), gate()
+        for comp in (clock, bit, enable, buffer):
+            c.add_component(comp)
+        c.add_wire(clock.outputs["Q"], buffer.inputs["A"])
+        if gate is AndGate:
+            c.add_wire(enable.outputs["Q"], buffer.inputs["B"])
+        flops = [DFlipFlop() for _ in range(3)]
+        previous = bit.outputs["Q"]
+        for flop in flops:
+            c.add_component(flop)
+            c.add_wire(buffer.outputs["Q"], flop.inputs["CLK"])
+            c.add_wire(previous, flop.inputs["D"])
+            previous = flop.outputs["Q"]
+        c.simulate()
+
+        # One Clock cycle per (bit, enable); only the AND gate holds the values while disabled
+        states = []
+        for value, enabled in ((True, True), (False, True), (True, False)):
+            bit.set_state(value)
+            enable.set_state(enabled)
+            for level in (True, False):
+                clock.set_state(level)
+                c.simulate()
+            states.append([flop.state for flop in flops])
+        last = [False, True, False] if gate is AndGate else [True, False, True]
+        assert states == [[True, False, False], [False, True, False], last], (gate, states)
+
+    print("Gated Clock Test Passed")
+
+def test_cycle_checks():
+    c = Circuit()
+    flop, inverter, bulb = DFlipFlop(), NotGate(), Bulb()
+    for comp in (flop, inverter, bulb):
+        c.add_component(comp)
+    c.add_wire(flop.outputs["Q"], inverter.inputs["A"])
+    c.add_wire(inverter.outputs["Q"], flop.inputs["D"])
+    c.add_wire(flop.outputs["Q"], bulb.inputs["A"])
+    sim = CycleSimulator(c)
+    try:
+        sim.run()
+        assert False, "unclocked flip-flop accepted"
+    except ValueError:
+        pass
+
+    # Edits are picked up on the next run
+    clock = Clock()
+    c.add_component(clock)
+    c.add_wire(clock.outputs["Q"], flop.inputs["CLK"])
+    sim.run(3)
+    assert bulb.is_lit and flop.state
+
+    # A loop that no register breaks can't be levelized
+    first, second = NotGate(), NotGate()
+    c.add_component(first)
+    c.add_component(second)
+    c.add_wire(first.outputs["Q"], second.inputs["A"])
+    c.add_wire(second.outputs["Q"], first.inputs["A"])
+    try:
+        sim.run()
+        assert False, "combinational loop accepted"
+    except ValueError:
+        pass
+
+    print("Cycle Check Test Passed")
+
+if __name__ == "__main__":
+    test_flip_flops()
+    test_shift_register()
+    test_gated_clock()
+    test_cycle_checks()
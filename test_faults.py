@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from logic_engine import Circuit, AndGate, OrGate, Switch, Bulb, SubCircuit
+from netlist_io import save
+from faults import FaultSimulator, Fault, fault_coverage, main
+from test_logic import build_full_adder
+
+def test_stuck_at_faults():
+    c = Circuit()
+    a, b, gate, bulb = Switch(), Switch(), AndGate(), Bulb()
+    for comp in (a, b, gate, bulb):
+        c.add_component(comp)
+    c.add_wire(a.outputs["Q"], gate.inputs["A"])
+    c.add_wire(b.outputs["Q"], gate.inputs["B"])
+    c.add_wire(gate.outputs["Q"], bulb.inputs["A"])
+
+    # 11 finds every stuck-at-0; 01 and 10 add the stuck-at-1 faults on each input side
+    report = fault_coverage(c, [[True, True]])
+    assert len(report.faults) == 12 and report.coverage == 0.5
+    assert all(fault.value for fault in report.undetected)
+    report = fault_coverage(c, [[True, True], [False, True], [True, False], [False, False]])
+    assert report.coverage == 1.0 and report.new_detections() == [6, 4, 2, 0]
+    assert report.detected[Fault(gate.inputs["A"], True)] == 1
+
+    # A fault on one branch of a fanout is only seen through that branch
+    c = Circuit()
+    a, first, second, left, right = Switch(), AndGate(), OrGate(), Bulb(), Bulb()
+    for comp in (a, first, second, left, right):
+        c.add_component(comp)
+    for gate in (first, second):
+        c.add_wire(a.outputs["Q"], gate.inputs["A"])
+        c.add_wire(a.outputs["Q"], gate.inputs["B"])
+    c.add_wire(first.outputs["Q"], left.inputs["A"])
+    c.add_wire(second.outputs["Q"], right.inputs["A"])
+    report = fault_coverage(c, [[True], [False]])
+    # The stem is seen at both Bulbs, but one AND input stuck at 1 (or OR input at 0) changes nothing
+    assert set(report.undetected) == {Fault(first.inputs["A"], True), Fault(first.inputs["B"], True),
+                                      Fault(second.inputs["A"], False), Fault(second.inputs["B"], False)}
+
+    print("Stuck-at Fault Test Passed")
+
+def test_fault_groups():
+    # Faults inside blocks are simulated on the flattened circuit; small groups agree with one big one
+    definition = build_full_adder()
+    c = Circuit()
+    switches = [Switch() for _ in range(3)]
+    block, bulbs = SubCircuit(definition), [Bulb(), Bulb()]
+    for comp in switches + [block] + bulbs:
+        c.add_component(comp)
+    for switch, node in zip(switches, block.inputs.values()):
+        c.add_wire(switch.outputs["Q"], node)
+    for node, bulb in zip(block.outputs.values(), bulbs):
+        c.add_wire(node, bulb.inputs["A"])
+    vectors = [[bool(row >> i & 1) for i in range(3)] for row in range(8)]
+    simulator = FaultSimulator(c)
+    assert simulator.circuit is not c and len(simulator.faults) == 2 * (3 + 5 * 3 + 2)
+    report = simulator.run(vectors)
+    assert report.coverage == 1.0
+    assert simulator.run(vectors, lanes=7).detected == report.detected
+    assert simulator.run(vectors[:2]).coverage < 1.0
+
+    with tempfile.TemporaryDirectory() as folder:
+        netlist = os.path.join(folder, "adder.lnet")
+        stimulus = os.path.join(folder, "vectors.txt")
+        save(build_full_adder(), netlist)
+        with open(stimulus, "w") as f:
+            f.write("CIN B A\n000\n111\n")
+        out = io.StringIO()
+        with redirect_stdout(out):
+            assert main([netlist, stimulus, "--limit", "1"]) == 0
+        assert out.getvalue().startswith("30 of 40 stuck-at faults detected by 2 vectors")
+
+    print("Fault Group Test Passed")
+
+if __name__ == "__main__":
+    test_stuck_at_faults()
+    test_fault_groups()
@@ -1,4 +1,7 @@
-from logic_engine import Circuit, AndGate, OrGate, NotGate, Switch, Bulb
+from logic_engine import Circuit, AndGate, OrGate, NotGate, XorGate, NandGate, Switch, Bulb, SubCircuit, Block
+from logic_engine import STABLE, OSCILLATING, BUDGET_EXCEEDED
+from logic_engine import BusAndGate, BusNotGate, BusXorGate, BusAdder, Splitter, Merger, BusSwitch, BusBulb
+import itertools
 
 def test_and_gate():
     c = Circuit()
@@ -67,6 +70,413 @@ def test_not_gate():
 
     print("NOT Gate Test Passed")
 
+def test_event_driven_step():
+    evaluations = []
+
+    class CountingNot(NotGate):
+        def evaluate(self):
+            evaluations.append(self)
+            super().evaluate()
+
+    c = Circuit()
+    s1 = Switch()
+    s2 = Switch()
+    not1 = CountingNot()
+    not2 = CountingNot()
+    bulb1 = Bulb()
+    bulb2 = Bulb()
+
+    for comp in (s1, s2, not1, not2, bulb1, bulb2):
+        c.add_component(comp)
+
+    c.add_wire(s1.outputs["Q"], not1.inputs["A"])
+    c.add_wire(not1.outputs["Q"], bulb1.inputs["A"])
+    c.add_wire(s2.outputs["Q"], not2.inputs["A"])
+    c.add_wire(not2.outputs["Q"], bulb2.inputs["A"])
+
+    c.simulate()
+    assert bulb1.is_lit == True and bulb2.is_lit == True
+    assert c.step() == False, "Settled circuit should have no pending events"
+
+    # Only the gate downstream of the toggled switch is re-evaluated
+    evaluations.clear()
+    s1.set_state(True)
+    c.simulate()
+    assert evaluations == [not1]
+    assert bulb1.is_lit == False and bulb2.is_lit == True
+
+    print("Event-Driven Step Test Passed")
+
+def test_compiled_circuit():
+    c = Circuit()
+    s1 = Switch()
+    c.add_component(s1)
+
+    # A chain of 50 inverters needs one pass once compiled
+    node = s1.outputs["Q"]
+    for _ in range(50):
+        not_gate = NotGate()
+        c.add_component(not_gate)
+        c.add_wire(node, not_gate.inputs["A"])
+        node = not_gate.outputs["Q"]
+    bulb = Bulb()
+    c.add_component(bulb)
+    c.add_wire(node, bulb.inputs["A"])
+
+    compiled = c.compile()
+    assert len(compiled.program) == 50
+    assert compiled.evaluate([False]) == (False,)
+    assert compiled.evaluate([True]) == (True,)
+    assert c.compile() is compiled, "Compiled program should be cached"
+
+    # The live circuit settles the chain in one step() as well
+    s1.set_state(True)
+    assert c.simulate().ticks == 1
+    assert bulb.is_lit == True
+
+    # Editing the circuit invalidates the cache
+    c.remove_component(bulb)
+    assert c.compile() is not compiled
+
+    # Feedback loops can't be levelized
+    loop = NotGate()
+    c.add_component(loop)
+    c.add_wire(loop.outputs["Q"], loop.inputs["A"])
+    try:
+        c.compile()
+        assert False, "Expected ValueError for feedback loop"
+    except ValueError:
+        pass
+
+    print("Compiled Circuit Test Passed")
+
+def test_evaluate_batch():
+    c = Circuit()
+    s1, s2, s3 = Switch(), Switch(), Switch()
+    xor_gate = XorGate()
+    or_gate = OrGate()
+    bulb1, bulb2 = Bulb(), Bulb()
+    for comp in (s1, s2, s3, xor_gate, or_gate, bulb1, bulb2):
+        c.add_component(comp)
+
+    c.add_wire(s1.outputs["Q"], xor_gate.inputs["A"])
+    c.add_wire(s2.outputs["Q"], xor_gate.inputs["B"])
+    c.add_wire(xor_gate.outputs["Q"], or_gate.inputs["A"])
+    c.add_wire(s3.outputs["Q"], or_gate.inputs["B"])
+    c.add_wire(xor_gate.outputs["Q"], bulb1.inputs["A"])
+    c.add_wire(or_gate.outputs["Q"], bulb2.inputs["A"])
+
+    rows = [list(values) for values in itertools.product([False, True], repeat=3)] * 10
+    expected = [((a != b), (a != b) or s) for a, b, s in rows]
+
+    # Returns a bool array with NumPy installed, a list of tuples otherwise
+    result = c.evaluate_batch(rows)
+    assert [tuple(bool(v) for v in row) for row in result] == expected
+
+    print("Evaluate Batch Test Passed")
+
+def test_compact_layout():
+    gate = AndGate()
+    nodes = list(gate.inputs.values()) + list(gate.outputs.values())
+
+    # Integer ids, no per-instance __dict__
+    ids = [gate.id] + [node.id for node in nodes]
+    assert all(isinstance(i, int) for i in ids)
+    assert len(set(ids)) == len(ids)
+    assert not hasattr(gate, "__dict__") and not hasattr(nodes[0], "__dict__")
+
+    # The dict-like port API still works
+    assert list(gate.inputs) == ["A", "B"]
+    assert "Q" in gate.outputs and "Q" not in gate.inputs
+    assert gate.inputs["B"].name == "B"
+    assert [name for name, node in gate.outputs.items()] == ["Q"]
+    assert len(gate.inputs) == 2
+
+    print("Compact Layout Test Passed")
+
+def test_nets():
+    c = Circuit()
+    s1, s2 = Switch(), Switch()
+    bulb1, bulb2 = Bulb(), Bulb()
+    for comp in (s1, s2, bulb1, bulb2):
+        c.add_component(comp)
+
+    out1 = s1.outputs["Q"]
+    c.add_wire(out1, bulb1.inputs["A"])
+    # Input to input wires join the same net
+    c.add_wire(bulb1.inputs["A"], bulb2.inputs["A"])
+    net = out1.net
+    assert net is bulb1.inputs["A"].net is bulb2.inputs["A"].net
+    assert net.driver is out1
+    assert net.sinks == {bulb1.inputs["A"], bulb2.inputs["A"]}
+
+    s1.set_state(True)
+    c.simulate()
+    assert bulb1.is_lit == True and bulb2.is_lit == True
+
+    # A second driver is a conflict
+    c.add_wire(s2.outputs["Q"], bulb2.inputs["A"])
+    assert net in c.conflicts and net.driver is None
+    c.remove_wire(s2.outputs["Q"], bulb2.inputs["A"])
+    assert not c.conflicts and net.driver is out1
+
+    # Removing the middle wire splits the net
+    c.remove_wire(bulb1.inputs["A"], bulb2.inputs["A"])
+    assert bulb2.inputs["A"].net is None
+    assert bulb1.inputs["A"].net is net
+
+    c.remove_component(s1)
+    assert out1.net is None and not c.nets and not c.wires
+
+    print("Nets Test Passed")
+
+def test_oscillation_detection():
+    # Ring oscillator: three inverters in a loop never settle
+    c = Circuit()
+    nots = [NotGate() for _ in range(3)]
+    for gate in nots:
+        c.add_component(gate)
+    for gate, following in zip(nots, nots[1:] + nots[:1]):
+        c.add_wire(gate.outputs["Q"], following.inputs["A"])
+    assert [set(loop) for loop in c.loops()] == [set(nots)]
+
+    result = c.simulate(ticks=100)
+    assert result.status == OSCILLATING
+    state = [gate.outputs["Q"].value for gate in nots]
+    for _ in range(result.period):
+        c.step()
+    assert [gate.outputs["Q"].value for gate in nots] == state
+    assert c.simulate(ticks=2).status == BUDGET_EXCEEDED
+
+    # SR latch: a stable feedback loop
+    c = Circuit()
+    s, r, n1, n2, bulb = Switch(), Switch(), NandGate(), NandGate(), Bulb()
+    for comp in (s, r, n1, n2, bulb):
+        c.add_component(comp)
+    c.add_wire(s.outputs["Q"], n1.inputs["A"])
+    c.add_wire(r.outputs["Q"], n2.inputs["B"])
+    c.add_wire(n1.outputs["Q"], n2.inputs["A"])
+    c.add_wire(n2.outputs["Q"], n1.inputs["B"])
+    c.add_wire(n1.outputs["Q"], bulb.inputs["A"])
+    r.set_state(True)
+    assert c.simulate().status == STABLE and bulb.is_lit == True
+    s.set_state(True)
+    assert c.simulate().status == STABLE and bulb.is_lit == True # Holds its state
+    r.set_state(False)
+    assert c.simulate().status == STABLE and bulb.is_lit == False
+
+    # Combinational logic settles in a single ordered pass, however deep
+    c = Circuit()
+    switch = Switch()
+    c.add_component(switch)
+    node = switch.outputs["Q"]
+    for _ in range(50):
+        gate = NotGate()
+        c.add_component(gate)
+        c.add_wire(node, gate.inputs["A"])
+        node = gate.outputs["Q"]
+    assert c.loops() == []
+    assert c.simulate(ticks=1).status == STABLE
+    assert node.value == False
+    switch.set_state(True)
+    assert c.simulate(ticks=1) == (STABLE, 1, None)
+    assert node.value == True
+
+    print("Oscillation Detection Test Passed")
+
+def build_full_adder():
+    c = Circuit()
+    a, b, cin = Switch(), Switch(), Switch()
+    a.name, b.name, cin.name = "A", "B", "CIN"
+    x1, x2 = XorGate(), XorGate()
+    n1, n2, n3 = NandGate(), NandGate(), NandGate()
+    total, carry = Bulb(), Bulb()
+    total.name, carry.name = "S", "COUT"
+    for comp in (a, b, cin, x1, x2, n1, n2, n3, total, carry):
+        c.add_component(comp)
+    c.add_wire(a.outputs["Q"], x1.inputs["A"])
+    c.add_wire(b.outputs["Q"], x1.inputs["B"])
+    c.add_wire(x1.outputs["Q"], x2.inputs["A"])
+    c.add_wire(cin.outputs["Q"], x2.inputs["B"])
+    c.add_wire(x2.outputs["Q"], total.inputs["A"])
+    c.add_wire(a.outputs["Q"], n1.inputs["A"])
+    c.add_wire(b.outputs["Q"], n1.inputs["B"])
+    c.add_wire(x1.outputs["Q"], n2.inputs["A"])
+    c.add_wire(cin.outputs["Q"], n2.inputs["B"])
+    c.add_wire(n1.outputs["Q"], n3.inputs["A"])
+    c.add_wire(n2.outputs["Q"], n3.inputs["B"])
+    c.add_wire(n3.outputs["Q"], carry.inputs["A"])
+    return c
+
+def build_ripple_adder(bits, definition):
+    # Adder made of full-adder SubCircuits; switches A0.., B0.., bulbs S0.. and the carry out
+    c = Circuit()
+    a_bits = [Switch() for _ in range(bits)]
+    b_bits = [Switch() for _ in range(bits)]
+    for i in range(bits):
+        a_bits[i].name, b_bits[i].name = f"A{i}", f"B{i}"
+    for switch in a_bits + b_bits:
+        c.add_component(switch)
+    bulbs = []
+    carry = None
+    for i in range(bits):
+        adder = SubCircuit(definition)
+        c.add_component(adder)
+        c.add_wire(a_bits[i].outputs["Q"], adder.inputs["A"])
+        c.add_wire(b_bits[i].outputs["Q"], adder.inputs["B"])
+        if carry is not None:
+            c.add_wire(carry, adder.inputs["CIN"])
+        bulb = Bulb()
+        bulb.name = f"S{i}"
+        c.add_component(bulb)
+        c.add_wire(adder.outputs["S"], bulb.inputs["A"])
+        bulbs.append(bulb)
+        carry = adder.outputs["COUT"]
+    bulb = Bulb()
+    bulb.name = "C"
+    c.add_component(bulb)
+    c.add_wire(carry, bulb.inputs["A"])
+    return c, a_bits + b_bits, bulbs + [bulb]
+
+def test_subcircuit():
+    Block.clear_cache() # Blocks cached by other tests come from other definition objects
+    full_adder = build_full_adder()
+    c, switches, bulbs = build_ripple_adder(4, full_adder)
+    adders = [comp for comp in c.components if isinstance(comp, SubCircuit)]
+    assert list(adders[0].inputs) == ["A", "B", "CIN"] and list(adders[0].outputs) == ["S", "COUT"]
+    # Structurally identical definitions share one compiled block
+    assert SubCircuit(build_full_adder()).block is adders[0].block
+
+    def check(circuit, switches, bulbs):
+        compiled = circuit.compile()
+        for a, b in ((0, 0), (5, 9), (15, 15), (7, 8)):
+            bits = [(a >> i) & 1 for i in range(4)] + [(b >> i) & 1 for i in range(4)]
+            for switch, value in zip(switches, bits):
+                switch.set_state(bool(value))
+            circuit.simulate()
+            total = sum(bulb.is_lit << i for i, bulb in enumerate(bulbs))
+            assert total == a + b, (a, b, total)
+            assert compiled.evaluate([switch.is_on for switch in compiled.switches]) == tuple(b.is_lit for b in bulbs)
+
+    check(c, switches, bulbs)
+
+    # Flattening replaces every instance with the definition's gates
+    flat = c.flatten()
+    assert not any(isinstance(comp, SubCircuit) for comp in flat.components)
+    assert len(flat.components) == 8 + 4 * 5 + 5
+    check(flat, [comp for comp in flat.components if isinstance(comp, Switch)],
+          [comp for comp in flat.components if isinstance(comp, Bulb)])
+
+    # Nested: the 4-bit adder as a block of its own flattens all the way down
+    outer = Circuit()
+    nested = SubCircuit(c)
+    outer.add_component(nested)
+    assert len(nested.inputs) == 8 and len(nested.outputs) == 5
+    assert len(outer.flatten().components) == 4 * 5
+
+    # The cache keeps the most recently used blocks only
+    import logic_engine
+    limit = logic_engine.BLOCK_CACHE
+    logic_engine.BLOCK_CACHE = 2
+    try:
+        Block.clear_cache()
+        first = SubCircuit(full_adder).block
+        SubCircuit(c)
+        SubCircuit(full_adder) # Used again, so the 4-bit adder is evicted next
+        SubCircuit(outer)
+        assert c.structural_hash() not in Block._cache and len(Block._cache) == 2
+        assert SubCircuit(build_full_adder()).block is first
+        assert adders[0].block.evaluate([True, True, False]) == (False, True)
+    finally:
+        logic_engine.BLOCK_CACHE = limit
+
+    print("SubCircuit Test Passed")
+
+def test_codegen():
+    c = build_full_adder()
+    function = c.codegen()
+    assert function is c.codegen() and c.compile().function is function
+    assert c.compile().source().count("\n") == 2 + 1 + 5 + 1 # Header, unpacking, one line per gate, return
+    for bits in itertools.product([False, True], repeat=3):
+        a, b, cin = bits
+        assert function(bits) == (a ^ b ^ cin, (a and b) or (cin and (a ^ b)))
+    # Bit-sliced: all eight rows at once, bit k of each word is row k
+    assert function([0xF0, 0xCC, 0xAA], 0xFF) == (0x96, 0xE8)
+    # Identical circuits share the generated function
+    assert build_full_adder().codegen() is function
+
+    # Every edit invalidates it
+    total = c.components[-2]
+    xor = total.inputs["A"].net.driver.component
+    c.remove_wire(xor.outputs["Q"], total.inputs["A"])
+    assert c.codegen() is not function and c.codegen()([True, True, False]) == (False, True)
+    c.add_wire(xor.outputs["Q"], total.inputs["A"])
+    assert c.codegen() is function
+    extra = Bulb()
+    c.add_component(extra)
+    assert len(c.codegen()([True, True, True])) == 3
+    c.remove_component(extra)
+    assert c.codegen() is function
+
+    print("Codegen Test Passed")
+
+def test_buses():
+    # 32-bit adder: two words in, one word and a carry out
+    c = Circuit()
+    a, b, adder, total, carry = BusSwitch(32), BusSwitch(32), BusAdder(32), BusBulb(32), Bulb()
+    for comp in (a, b, adder, total, carry):
+        c.add_component(comp)
+    c.add_wire(a.outputs["Q"], adder.inputs["A"])
+    c.add_wire(b.outputs["Q"], adder.inputs["B"])
+    c.add_wire(adder.outputs["S"], total.inputs["A"])
+    c.add_wire(adder.outputs["COUT"], carry.inputs["A"])
+    for x, y in ((1, 2), (123456789, 987654321), (0xFFFFFFFF, 1), (0x80000000, 0x80000001)):
+        a.set_value(x)
+        b.set_value(y)
+        assert c.simulate().status == STABLE
+        assert total.value == (x + y) & 0xFFFFFFFF and carry.is_lit == (x + y > 0xFFFFFFFF)
+
+    # Wide gates, and splitting a word into bits and merging it back in another order
+    c = Circuit()
+    a, b, xor, invert, split, merge, out = BusSwitch(8), BusSwitch(8), BusXorGate(8), BusNotGate(8), Splitter(8), Merger(8), BusBulb(8)
+    for comp in (a, b, xor, invert, split, merge, out):
+        c.add_component(comp)
+    c.add_wire(a.outputs["Q"], xor.inputs["A"])
+    c.add_wire(b.outputs["Q"], xor.inputs["B"])
+    c.add_wire(xor.outputs["Q"], invert.inputs["A"])
+    c.add_wire(invert.outputs["Q"], split.inputs["A"])
+    for i in range(8):
+        c.add_wire(split.outputs[str(i)], merge.inputs[str(7 - i)])
+    c.add_wire(merge.outputs["Q"], out.inputs["A"])
+    a.set_value(0b10110000)
+    b.set_value(0b00110101)
+    c.simulate()
+    assert out.value == int(f"{~0b10000101 & 0xFF:08b}"[::-1], 2)
+    assert BusAndGate(8).name == "AND8" and BusSwitch(4).copy().width == 4
+
+    # Widths must match across a wire and stay within MAX_WIDTH
+    try:
+        c.add_wire(a.outputs["Q"], BusBulb(4).inputs["A"])
+        assert False, "width mismatch accepted"
+    except ValueError:
+        pass
+    try:
+        BusSwitch(65)
+        assert False, "65-bit bus accepted"
+    except ValueError:
+        pass
+
+    print("Bus Test Passed")
+
 if __name__ == "__main__":
     test_and_gate()
     test_not_gate()
+    test_event_driven_step()
+    test_compiled_circuit()
+    test_evaluate_batch()
+    test_compact_layout()
+    test_nets()
+    test_oscillation_detection()
+    test_subcircuit()
+    test_codegen()
+    test_buses()
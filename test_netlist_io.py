@@ -0,0 +1,173 @@
+import json
+import os
+import tempfile
+from logic_engine import Circuit, AndGate, NotGate, Switch, Bulb, SubCircuit, BusSwitch, BusBulb, BusAdder
+from logic_engine import Clock, DFlipFlop, Register
+from netlist_io import VERSION, save, load, save_json, load_json, load_binary
+
+def build_circuit():
+    c = Circuit()
+    a, b, gate, inverter, bulb, extra = Switch(), Switch(), AndGate(delay=2), NotGate(), Bulb(), Bulb()
+    for i, comp in enumerate((a, b, gate, inverter, bulb, extra)):
+        comp.position = (10 * i, 20.5 * i)
+        c.add_component(comp)
+    a.name = "A"
+    b.set_state(True)
+    c.add_wire(a.outputs["Q"], gate.inputs["A"])
+    c.add_wire(b.outputs["Q"], gate.inputs["B"])
+    c.add_wire(gate.outputs["Q"], inverter.inputs["A"])
+    c.add_wire(inverter.outputs["Q"], bulb.inputs["A"])
+    c.add_wire(bulb.inputs["A"], extra.inputs["A"]) # Sink-to-sink wire on the same net
+    return c
+
+def check_round_trip(loaded, original):
+    assert [type(comp) for comp in loaded.components] == [type(comp) for comp in original.components]
+    for new, old in zip(loaded.components, original.components):
+        assert (new.name, new.position, new.delay) == (old.name, old.position, old.delay)
+        assert getattr(new, "is_on", None) == getattr(old, "is_on", None)
+    assert len(loaded.wires) == len(original.wires)
+    assert len(loaded.nets) == len(original.nets) == 4
+
+    loaded.simulate()
+    switch, _, _, _, bulb, extra = loaded.components
+    assert bulb.is_lit == True and extra.is_lit == True
+    switch.set_state(True)
+    loaded.simulate()
+    assert bulb.is_lit == False and extra.is_lit == False
+    # The bulk-built circuit still supports regular edits
+    loaded.remove_wire(*list(loaded.wires)[-1])
+    assert len(loaded.nets) == 4
+
+def test_json_round_trip():
+    c = build_circuit()
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "circuit.json")
+        save_json(c, path)
+        with open(path) as f:
+            data = json.load(f)
+        assert data["version"] == VERSION and data["components"][0]["name"] == "A"
+        check_round_trip(load_json(path), c)
+
+    print("JSON Round Trip Test Passed")
+
+def test_binary_round_trip():
+    c = build_circuit()
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "circuit.lnet")
+        save(c, path)
+        check_round_trip(load(path), c)
+        check_round_trip(load_binary(path), c)
+
+        # Cut anywhere, the file is rejected rather than loaded with components or wires missing
+        with open(path, "rb") as f:
+            data = f.read()
+        for size in (10, 24, len(data) // 2, len(data) - 1):
+            with open(path, "wb") as f:
+                f.write(data[:size])
+            try:
+                load_binary(path)
+                assert False, f"File cut to {size} bytes should be rejected"
+            except ValueError:
+                pass
+        with open(path, "wb") as f:
+            f.write(data)
+
+        with open(path, "r+b") as f:
+            f.write(b"XXXX")
+        try:
+            load_binary(path)
+            assert False, "Corrupt header should be rejected"
+        except ValueError:
+            pass
+
+    print("Binary Round Trip Test Passed")
+
+def test_subcircuit_round_trip():
+    definition = build_circuit()
+    c = Circuit()
+    first, second = SubCircuit(definition), SubCircuit(definition)
+    c.add_component(first)
+    c.add_component(second)
+    c.add_wire(first.outputs["Bulb"], second.inputs["A"])
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "circuit.json")
+        save(c, path)
+        with open(path) as f:
+            assert len(json.load(f)["definitions"]) == 1
+        loaded = load(path)
+        try:
+            save(c, os.path.join(folder, "circuit.lnet"))
+            assert False, "Binary netlists don't support subcircuits"
+        except ValueError:
+            pass
+    first, second = loaded.components
+    assert first.definition is second.definition and first.block is second.block
+    assert list(first.inputs) == ["A", "Switch"] and len(loaded.wires) == 1
+
+    print("Subcircuit Round Trip Test Passed")
+
+def test_bus_round_trip():
+    c = Circuit()
+    a, b, adder, total = BusSwitch(16), BusSwitch(16), BusAdder(16), BusBulb(16)
+    for comp in (a, b, adder, total):
+        c.add_component(comp)
+    a.set_value(40000)
+    b.set_value(123)
+    c.add_wire(a.outputs["Q"], adder.inputs["A"])
+    c.add_wire(b.outputs["Q"], adder.inputs["B"])
+    c.add_wire(adder.outputs["S"], total.inputs["A"])
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("bus.json", "bus.lnet"):
+            path = os.path.join(folder, name)
+            save(c, path)
+            loaded = load(path)
+            a, b, adder, total = loaded.components
+            assert (a.width, a.value, b.value, adder.width) == (16, 40000, 123, 16)
+            loaded.simulate()
+            assert total.value == 40123
+
+    print("Bus Round Trip Test Passed")
+
+def test_clocked_round_trip():
+    # Saved while the Clock is high: the loaded registers must wait for the next rising edge
+    c = Circuit()
+    clock, data, word, flop, register = Clock(), Switch(), BusSwitch(8), DFlipFlop(), Register(8)
+    for comp in (clock, data, word, flop, register):
+        c.add_component(comp)
+    c.add_wire(clock.outputs["Q"], flop.inputs["CLK"])
+    c.add_wire(clock.outputs["Q"], register.inputs["CLK"])
+    c.add_wire(data.outputs["Q"], flop.inputs["D"])
+    c.add_wire(word.outputs["Q"], register.inputs["D"])
+    clock.set_state(True)
+    c.simulate()
+    data.set_state(True)
+    word.set_value(42)
+    c.simulate()
+    assert (flop.state, register.value) == (False, 0)
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("clocked.json", "clocked.lnet"):
+            path = os.path.join(folder, name)
+            save(c, path)
+            loaded = load(path)
+            clock, data, word, flop, register = loaded.components
+            loaded.simulate()
+            assert (flop.state, register.value) == (False, 0)
+            clock.set_state(False)
+            loaded.simulate()
+            clock.set_state(True)
+            loaded.simulate()
+            assert (flop.state, register.value) == (True, 42)
+
+    # Copies keep the clock level too
+    copied = c.flatten()
+    copied.simulate()
+    assert (copied.components[3].state, copied.components[4].value) == (False, 0)
+
+    print("Clocked Round Trip Test Passed")
+
+if __name__ == "__main__":
+    test_json_round_trip()
+    test_binary_round_trip()
+    test_subcircuit_round_trip()
+    test_bus_round_trip()
+    test_clocked_round_trip()
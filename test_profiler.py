@@ -0,0 +1,37 @@
+from logic_engine import Circuit, NotGate, Switch, Bulb
+
+def test_profiling():
+    c = Circuit()
+    switch, first, second, bulb = Switch(), NotGate(), NotGate(), Bulb()
+    for comp in (switch, first, second, bulb):
+        c.add_component(comp)
+    c.add_wire(switch.outputs["Q"], first.inputs["A"])
+    c.add_wire(first.outputs["Q"], second.inputs["A"])
+    c.add_wire(second.outputs["Q"], bulb.inputs["A"])
+    c.simulate()
+    assert c.profile is None
+
+    with c.profiling() as profile:
+        for _ in range(4):
+            switch.toggle()
+            c.simulate()
+        snapshot = profile.copy()
+        switch.toggle()
+        c.simulate()
+    assert c.profile is None # Detached again, so the next simulate() isn't counted
+    c.simulate()
+
+    assert profile.evaluations[first] == profile.evaluations[bulb] == 5
+    assert profile.toggles[first.outputs["Q"]] == 5 and profile.toggles[bulb.inputs["A"]] == 5
+    assert profile.steps == 5 and profile.settles == {1: 5}
+    assert profile.step_seconds > 0 and profile.events_per_second() > 0
+    assert switch not in profile.activity() and profile.activity()[second] == 1.0
+
+    window = profile.since(snapshot)
+    assert window.steps == 1 and window.evaluations[second] == 1
+    assert set(window.evaluations) == {first, second, bulb}
+
+    print("Profiling Test Passed")
+
+if __name__ == "__main__":
+    test_profiling()
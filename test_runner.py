@@ -0,0 +1,88 @@
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from logic_engine import Circuit, NandGate, Switch, Bulb, BusSwitch, BusBulb, BusNotGate
+from netlist_io import save
+from runner import main, run
+from test_logic import build_full_adder
+
+def test_runner_combinational():
+    circuit = build_full_adder()
+    out = io.StringIO()
+    # Header line reorders the columns; comments and blank lines are skipped
+    lines = ["# carry in first", "CIN, B, A", "", "0 0 0", "1 1 0 # two ones", "111"]
+    assert run(circuit, lines, out, batch=2) == (3, 0)
+    assert out.getvalue() == "# S COUT\n00\n01\n11\n"
+
+    with tempfile.TemporaryDirectory() as folder:
+        netlist = os.path.join(folder, "adder.lnet")
+        stimulus = os.path.join(folder, "vectors.txt")
+        output = os.path.join(folder, "out.txt")
+        save(circuit, netlist)
+        with open(stimulus, "w") as f:
+            f.write("100\n011\n01\n")
+        assert main([netlist, stimulus, "-o", output]) == 2 # Third vector is too short
+        with open(stimulus, "w") as f:
+            f.write("100\n011\n")
+        assert main([netlist, stimulus, "-o", output]) == 0
+        with open(output) as f:
+            assert f.read() == "# S COUT\n10\n01\n"
+
+        # The runner must work without a display: tkinter is never imported
+        script = ("import sys, runner; runner.main(sys.argv[1:]); "
+                  "assert 'tkinter' not in sys.modules, 'tkinter was imported'")
+        result = subprocess.run([sys.executable, "-c", script, netlist, stimulus], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == "# S COUT\n10\n01\n" and "vectors/s" in result.stderr
+
+    print("Runner Combinational Test Passed")
+
+def test_runner_sequential():
+    # SR latch from NAND gates: state carries over between vectors
+    c = Circuit()
+    set_n, reset_n, top, bottom, q = Switch(), Switch(), NandGate(), NandGate(), Bulb()
+    set_n.name, reset_n.name, q.name = "S", "R", "Q"
+    for comp in (set_n, reset_n, top, bottom, q):
+        c.add_component(comp)
+    c.add_wire(set_n.outputs["Q"], top.inputs["A"])
+    c.add_wire(reset_n.outputs["Q"], bottom.inputs["B"])
+    c.add_wire(top.outputs["Q"], bottom.inputs["A"])
+    c.add_wire(bottom.outputs["Q"], top.inputs["B"])
+    c.add_wire(top.outputs["Q"], q.inputs["A"])
+    out = io.StringIO()
+    assert run(c, ["01", "11", "10", "11"], out) == (4, 0)
+    assert out.getvalue() == "# Q\n1\n1\n0\n0\n"
+
+    print("Runner Sequential Test Passed")
+
+def test_runner_buses():
+    # BusSwitches take a number per vector, BusBulbs print theirs in decimal
+    c = Circuit()
+    word, enable, inverted, raw, lit = BusSwitch(4), Switch(), BusNotGate(4), BusBulb(4), Bulb()
+    word.name, enable.name, inverted.name, raw.name, lit.name = "W", "E", "N", "R", "L"
+    for comp in (word, enable, inverted, raw, lit):
+        c.add_component(comp)
+    c.add_wire(word.outputs["Q"], inverted.inputs["A"])
+    c.add_wire(inverted.outputs["Q"], raw.inputs["A"])
+    c.add_wire(enable.outputs["Q"], lit.inputs["A"])
+    out = io.StringIO()
+    assert run(c, ["E W", "1 0x3", "0, 0b1010", "1 15"], out) == (3, 0)
+    assert out.getvalue() == "# R L\n12 1\n5 0\n0 1\n"
+
+    for line in ("1 16", "1 x", "2 3", "1"):
+        try:
+            run(c, ["E W", line], io.StringIO())
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{line!r} was accepted")
+
+    print("Runner Buses Test Passed")
+
+if __name__ == "__main__":
+    test_runner_combinational()
+    test_runner_sequential()
+    test_runner_buses()
@@ -0,0 +1,47 @@
+import time
+from logic_engine import Circuit, NotGate, Switch, Bulb
+from sim_worker import SimulationWorker
+
+def wait_for_snapshot(worker, timeout=2.0):
+    values = {}
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        snapshot = worker.take_snapshot()
+        if snapshot is not None:
+            values.update(snapshot.values)
+        elif values:
+            return values
+        time.sleep(0.02)
+    return values
+
+def test_worker_snapshots():
+    c = Circuit()
+    worker = SimulationWorker(c, rate=None) # As fast as possible
+    worker.start()
+    try:
+        s1 = Switch()
+        not_gate = NotGate()
+        bulb = Bulb()
+        for comp in (s1, not_gate, bulb):
+            worker.submit(c.add_component, comp)
+        worker.submit(c.add_wire, s1.outputs["Q"], not_gate.inputs["A"])
+        worker.submit(c.add_wire, not_gate.outputs["Q"], bulb.inputs["A"]).result(timeout=2)
+
+        values = wait_for_snapshot(worker)
+        assert values[bulb.inputs["A"]] == True
+
+        worker.submit(s1.toggle).result(timeout=2)
+        values = wait_for_snapshot(worker)
+        assert values[s1.outputs["Q"]] == True
+        assert values[bulb.inputs["A"]] == False
+
+        # Command results come back through the future
+        future = worker.submit(c.compile)
+        assert future.result(timeout=2).evaluate([False]) == (True,)
+    finally:
+        worker.stop()
+
+    print("Simulation Worker Test Passed")
+
+if __name__ == "__main__":
+    test_worker_snapshots()
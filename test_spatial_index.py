@@ -0,0 +1,39 @@
+from spatial_index import SpatialGrid
+
+def test_point_queries():
+    grid = SpatialGrid(cell_size=50)
+    grid.insert("a", 0, 0, 60, 40)
+    grid.insert("b", 40, 20, 100, 60) # Overlaps "a", inserted later so it's on top
+    grid.insert("c", 500, 500, 510, 510)
+
+    assert grid.at(10, 10) == ["a"]
+    assert grid.at(50, 30) == ["a", "b"]
+    assert grid.at(505, 505) == ["c"]
+    assert grid.at(300, 300) == []
+
+    # Moving keeps the stacking order and updates the cells
+    grid.insert("a", 600, 600, 660, 640)
+    assert grid.at(10, 10) == []
+    assert grid.at(610, 610) == ["a"]
+
+    grid.remove("c")
+    assert grid.at(505, 505) == []
+    assert "c" not in grid.bounds
+
+    print("Spatial Grid Point Test Passed")
+
+def test_rectangle_queries():
+    grid = SpatialGrid(cell_size=16)
+    for i in range(10):
+        grid.insert(i, i * 100, 0, i * 100 + 60, 40)
+
+    assert grid.within(0, 0, 250, 50) == [0, 1, 2]
+    # Only components fully inside the rubber band
+    assert grid.within(250, 50, 0, 0, contained=True) == [0, 1]
+    assert grid.within(-1000, -1000, 5000, 5000, contained=True) == list(range(10))
+
+    print("Spatial Grid Rectangle Test Passed")
+
+if __name__ == "__main__":
+    test_point_queries()
+    test_rectangle_queries()
@@ -0,0 +1,91 @@
+from logic_engine import Circuit, AndGate, NotGate, Switch, Bulb, Splitter, Merger, BusSwitch, BusBulb, Clock
+from timing import TimedSimulator, critical_paths
+
+def build_hazard(and_delay):
+    # A AND (NOT A): always off once settled, but a rising A races the inverter
+    c = Circuit()
+    a, inverter, gate, bulb = Switch(), NotGate(delay=1), AndGate(delay=and_delay), Bulb()
+    for comp in (a, inverter, gate, bulb):
+        c.add_component(comp)
+    c.add_wire(a.outputs["Q"], inverter.inputs["A"])
+    c.add_wire(a.outputs["Q"], gate.inputs["A"])
+    c.add_wire(inverter.outputs["Q"], gate.inputs["B"])
+    c.add_wire(gate.outputs["Q"], bulb.inputs["A"])
+    return c, a, inverter, gate, bulb
+
+def test_glitch_and_inertial_delay():
+    c, a, inverter, gate, bulb = build_hazard(and_delay=1)
+    sim = TimedSimulator(c)
+    assert sim.run() == True
+    assert sim.now == 1 and inverter.outputs["Q"].value == True
+
+    # The AND gate is as fast as the inverter, so the race shows up as a one-unit glitch
+    a.set_state(True)
+    sim.run(until=2)
+    assert bulb.is_lit == True
+    sim.run()
+    assert bulb.is_lit == False and sim.now == 3 and sim.filtered == 0
+
+    # A slower AND gate swallows the pulse
+    c, a, inverter, gate, bulb = build_hazard(and_delay=2)
+    sim = TimedSimulator(c)
+    sim.run()
+    a.set_state(True)
+    start = sim.now
+    for time in range(start, start + 4):
+        sim.run(until=time)
+        assert bulb.is_lit == False
+    assert sim.filtered == 1
+
+    print("Glitch and Inertial Delay Test Passed")
+
+def test_timing_report():
+    c = Circuit()
+    switch, bulb = Switch(), Bulb()
+    first, second, gate = NotGate(delay=1), NotGate(delay=2), AndGate(delay=3)
+    for comp in (switch, first, second, gate, bulb):
+        c.add_component(comp)
+    c.add_wire(switch.outputs["Q"], first.inputs["A"])
+    c.add_wire(first.outputs["Q"], second.inputs["A"])
+    c.add_wire(second.outputs["Q"], gate.inputs["A"])
+    c.add_wire(switch.outputs["Q"], gate.inputs["B"])
+    c.add_wire(gate.outputs["Q"], bulb.inputs["A"])
+
+    delay, path = critical_paths(c)[bulb]
+    assert delay == 6 and path == [switch, first, second, gate, bulb]
+
+    sim = TimedSimulator(c)
+    sim.run()
+    switch.set_state(True)
+    sim.run()
+    assert bulb.is_lit == True
+    timing, = sim.report()
+    assert timing.bulb is bulb and timing.settle_time == 6 and timing.critical_delay == 6
+
+    print("Timing Report Test Passed")
+
+def test_component_delays():
+    # Every component takes a delay; a bus split into bits and merged again takes both delays
+    assert Switch(delay=2).delay == Bulb(delay=2).delay == Clock(delay=2).delay == 2
+    c = Circuit()
+    source, split, merge, out = BusSwitch(4, delay=1), Splitter(4, delay=2), Merger(4, delay=3), BusBulb(4, delay=1)
+    for comp in (source, split, merge, out):
+        c.add_component(comp)
+    c.add_wire(source.outputs["Q"], split.inputs["A"])
+    for i in range(4):
+        c.add_wire(split.outputs[str(i)], merge.inputs[str(i)])
+    c.add_wire(merge.outputs["Q"], out.inputs["A"])
+    sim = TimedSimulator(c)
+    sim.run()
+    source.set_value(0b1010)
+    sim.run(until=sim.now + 4)
+    assert out.value == 0
+    sim.run()
+    assert out.value == 0b1010 and sim.now == 5
+
+    print("Component Delay Test Passed")
+
+if __name__ == "__main__":
+    test_glitch_and_inertial_delay()
+    test_timing_report()
+    test_component_delays()
@@ -1,5 +1,10 @@
-from logic_engine import Circuit, AndGate, Switch, Bulb
+from logic_engine import Circuit, AndGate, XorGate, NandGate, Switch, Bulb
+from truth_table import truth_table, _simulated_truth_table, shard_netlist, exhaustive
+from truth_table import iter_truth_table, export_csv, export_binary, read_binary
+import csv
 import itertools
+import os
+import tempfile
 
 def test_truth_table_logic():
     c = Circuit()
@@ -35,13 +40,12 @@ def test_truth_table_logic():
         (True, True, True)
     ]
 
+    rows = truth_table(c, switches, bulbs)
+    assert len(rows) == 4
+
     for i, values in enumerate(itertools.product([False, True], repeat=len(switches))):
-        for j, switch in enumerate(switches):
-            switch.set_state(values[j])
-        
-        c.simulate(ticks=20)
-        
-        output = bulb.is_lit
+        assert rows[i][:2] == tuple(int(v) for v in values)
+        output = bool(rows[i][2])
         print(f"{int(values[0])} | {int(values[1])} | {int(output)}")
         
         assert values[0] == expected_results[i][0]
@@ -50,5 +54,102 @@ def test_truth_table_logic():
 
     print("Truth Table Logic Verified!")
 
+def test_bit_parallel_matches_simulation():
+    # Full adder: bit-sliced evaluation must agree with simulating each row
+    c = Circuit()
+    a, b, cin = Switch(), Switch(), Switch()
+    x1, x2 = XorGate(), XorGate()
+    n1, n2, n3 = NandGate(), NandGate(), NandGate()
+    total, carry = Bulb(), Bulb()
+    for comp in (a, b, cin, x1, x2, n1, n2, n3, total, carry):
+        c.add_component(comp)
+
+    c.add_wire(a.outputs["Q"], x1.inputs["A"])
+    c.add_wire(b.outputs["Q"], x1.inputs["B"])
+    c.add_wire(x1.outputs["Q"], x2.inputs["A"])
+    c.add_wire(cin.outputs["Q"], x2.inputs["B"])
+    c.add_wire(x2.outputs["Q"], total.inputs["A"])
+    c.add_wire(a.outputs["Q"], n1.inputs["A"])
+    c.add_wire(b.outputs["Q"], n1.inputs["B"])
+    c.add_wire(x1.outputs["Q"], n2.inputs["A"])
+    c.add_wire(cin.outputs["Q"], n2.inputs["B"])
+    c.add_wire(n1.outputs["Q"], n3.inputs["A"])
+    c.add_wire(n2.outputs["Q"], n3.inputs["B"])
+    c.add_wire(n3.outputs["Q"], carry.inputs["A"])
+
+    switches = [a, b, cin]
+    bulbs = [total, carry]
+    rows = truth_table(c, switches, bulbs)
+    assert rows == _simulated_truth_table(c, switches, bulbs)
+    for row in rows:
+        assert row[3] + 2 * row[4] == row[0] + row[1] + row[2]
+
+    print("Bit-Parallel Truth Table Verified!")
+
+def build_parity(count):
+    c = Circuit()
+    switches = [Switch() for _ in range(count)]
+    for switch in switches:
+        c.add_component(switch)
+    node = switches[0].outputs["Q"]
+    for switch in switches[1:]:
+        gate = XorGate()
+        c.add_component(gate)
+        c.add_wire(node, gate.inputs["A"])
+        c.add_wire(switch.outputs["Q"], gate.inputs["B"])
+        node = gate.outputs["Q"]
+    bulb = Bulb()
+    c.add_component(bulb)
+    c.add_wire(node, bulb.inputs["A"])
+    return c, switches, [bulb]
+
+def test_sharded_exhaustive():
+    c, switches, bulbs = build_parity(10)
+    netlist = shard_netlist(c, switches, bulbs)
+    progress = []
+
+    # Small shards so the table is split across several tasks
+    rows = list(exhaustive(netlist, "rows", shard_bits=6, max_workers=2,
+                           progress=lambda done, total: progress.append(done)))
+    assert rows == truth_table(c, switches, bulbs)
+    assert progress[-1] == 1024 and len(progress) == 16
+
+    assert exhaustive(netlist, "counts", shard_bits=6, max_workers=2) == [512]
+    # Row 1 (only the last switch on) is the first with odd parity
+    assert exhaustive(netlist, "first_failure", shard_bits=6, max_workers=2) == 1
+    assert exhaustive(netlist, "first_failure", expected=[1], shard_bits=6, max_workers=2) == 0
+
+    print("Sharded Exhaustive Evaluation Verified!")
+
+def test_streaming_truth_table():
+    c, switches, bulbs = build_parity(18)
+    rows = c.iter_truth_table(switches, bulbs)
+    assert next(rows) == (0,) * 19
+    # Slices are evaluated on their own, without generating the rows before them
+    window = list(iter_truth_table(c, switches, bulbs, 200000, 200005))
+    assert [row[:18] for row in window] == [tuple(int(b) for b in format(i, "018b")) for i in range(200000, 200005)]
+    assert all(row[18] == sum(row[:18]) % 2 for row in window)
+
+    c, switches, bulbs = build_parity(9)
+    rows = truth_table(c, switches, bulbs)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "table.csv")
+        export_csv(path, c, switches, bulbs)
+        with open(path, newline="") as f:
+            data = list(csv.reader(f))
+        assert data[0] == [s.name for s in switches] + [bulbs[0].name]
+        assert [tuple(map(int, row)) for row in data[1:]] == rows
+
+        path = os.path.join(folder, "table.lttb")
+        export_binary(path, c, switches, bulbs, chunk_bits=4)
+        headers, binary_rows = read_binary(path)
+        assert headers == data[0]
+        assert list(binary_rows) == rows
+
+    print("Streaming Truth Table Verified!")
+
 if __name__ == "__main__":
     test_truth_table_logic()
+    test_bit_parallel_matches_simulation()
+    test_sharded_exhaustive()
+    test_streaming_truth_table()
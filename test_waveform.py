@@ -0,0 +1,60 @@
+import os
+import tempfile
+from logic_engine import Circuit, NotGate, Switch
+from timing import TimedSimulator
+from waveform import Trace
+
+def test_trace_ring_buffer():
+    c = Circuit()
+    switch, gate = Switch(), NotGate()
+    c.add_component(switch)
+    c.add_component(gate)
+    c.add_wire(switch.outputs["Q"], gate.inputs["A"])
+    c.simulate()
+
+    trace = Trace([switch.outputs["Q"], gate.outputs["Q"]], capacity=4)
+    trace.sample(1) # No transitions, nothing recorded
+    assert len(trace) == 0
+    for time in range(1, 4):
+        switch.toggle()
+        c.simulate()
+        trace.sample(time)
+    assert len(trace) == 4 # Six transitions, only the newest four kept
+    q, not_q = trace.nodes
+    assert list(trace.changes()) == [(2, q, False), (2, not_q, True), (3, q, True), (3, not_q, False)]
+    # The dropped records are folded into the starting values
+    assert trace.start_time == 1 and trace.start_values == [True, False]
+
+    print("Trace Ring Buffer Test Passed")
+
+def test_vcd_export():
+    c = Circuit()
+    switch, gate = Switch(), NotGate(delay=3)
+    c.add_component(switch)
+    c.add_component(gate)
+    c.add_wire(switch.outputs["Q"], gate.inputs["A"])
+
+    trace = Trace([switch.outputs["Q"], gate.outputs["Q"]])
+    sim = TimedSimulator(c, trace=trace)
+    sim.run()
+    switch.set_state(True)
+    sim.run()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "trace.vcd")
+        trace.export_vcd(path)
+        with open(path) as f:
+            lines = f.read().splitlines()
+    assert "$timescale 1ns $end" in lines
+    assert f"$var wire 1 ! Switch{switch.id}_Q $end" in lines
+    assert lines[lines.index("$enddefinitions $end") + 1:] == [
+        "#0", "$dumpvars", "0!", "0\"", "$end",
+        "#3", "1\"", "1!", # The inverter settles after its delay, then the switch flips
+        "#6", "0\"",
+    ]
+
+    print("VCD Export Test Passed")
+
+if __name__ == "__main__":
+    test_trace_ring_buffer()
+    test_vcd_export()
@@ -0,0 +1,210 @@
+import heapq
+from collections import namedtuple
+from logic_engine import Bulb, BOOL_OPS
+
+# settle_time: time from the last stimulus until the bulb's input stopped changing
+# critical_delay / path: longest static delay from any source to the bulb, and the components along it
+BulbTiming = namedtuple("BulbTiming", ["bulb", "settle_time", "critical_delay", "path"])
+
+class TimedSimulator:
+    # Discrete-event simulation with per-component propagation delays (Component.delay).
+    # Scheduled output transitions live in a calendar queue: one bucket per future time plus a
+    # heap of the distinct times, so scheduling is O(1) and only times with events are visited.
+    # Delays are inertial: an output change that is undone before its delay expires is dropped.
+    def __init__(self, circuit, trace=None):
+        self.circuit = circuit
+        self.trace = trace # waveform.Trace sampled at every time with events
+        self.now = 0
+        self.events = 0 # Output transitions applied so far
+        self.filtered = 0 # Pulses cancelled by inertial delay
+        self.stimulus_time = 0 # When a source last changed
+        self.last_change = {} # Output Node -> time its value last changed
+        self._buckets = {} # time -> list of (node, value) transitions
+        self._times = [] # Heap of the keys of _buckets
+        self._scheduled = {} # Output Node -> its pending (node, value) transition
+        self._revision = None
+        self._sinks = {}
+        self._outputs = {}
+        self._gates = {} # Plain gate -> (function, input A, input B, output, delay), evaluated inline
+        self._sources = {}
+
+    def _sync(self):
+        # Rebuild the fan-out tables after edits, then settle every component from the current values
+        circuit = self.circuit
+        if self._revision == circuit.revision:
+            return
+        self._revision = circuit.revision
+        self._sinks = {net.driver: tuple(net.sinks) for net in circuit.nets if net.driver is not None}
+        self._outputs = {component: tuple(component.outputs.values()) for component in circuit.components}
+        self._gates = {}
+        for component in circuit.components:
+            if component.op is not None:
+                inputs = tuple(component.inputs.values())
+                self._gates[component] = (BOOL_OPS[component.op], inputs[0], inputs[-1],
+                                          self._outputs[component][0], component.delay)
+        self._sources = {node: None for component in circuit.components if not component.inputs
+                         for node in component.outputs.values()}
+        self._scheduled.clear()
+        self._buckets.clear()
+        self._times.clear()
+        for driver, sinks in self._sinks.items():
+            for dest in sinks:
+                dest.value = driver.value
+        for component in circuit.components:
+            self._evaluate(component)
+
+    def run(self, until=None, max_events=None):
+        # Processes transitions in time order up to `until` (or until nothing is scheduled).
+        # Returns True once the circuit has settled.
+        self._sync()
+        self._poll_sources()
+        if self.trace is not None:
+            self.trace.sample(self.now)
+        buckets = self._buckets
+        times = self._times
+        scheduled = self._scheduled
+        sinks = self._sinks
+        gates = self._gates
+        trace = self.trace
+        last_change = self.last_change
+        limit = None if max_events is None else self.events + max_events
+        while times:
+            time = times[0]
+            if until is not None and time > until:
+                break
+            if limit is not None and self.events >= limit:
+                return False
+            heapq.heappop(times)
+            self.now = time
+            affected = {}
+            for entry in buckets.pop(time):
+                node, value = entry
+                if scheduled.get(node) is not entry:
+                    continue # Cancelled or superseded
+                del scheduled[node]
+                node.value = value
+                last_change[node] = time
+                self.events += 1
+                for dest in sinks.get(node, ()):
+                    if dest.value != value:
+                        dest.value = value
+                        affected[dest.component] = None
+            # Zero-delay outputs land in a fresh bucket for the same time
+            for component in affected:
+                gate = gates.get(component)
+                if gate is None:
+                    self._evaluate(component)
+                    continue
+                # Same as _evaluate(), inlined for plain gates
+                function, a, b, out, delay = gate
+                value = function(a.value, b.value)
+                pending = scheduled.get(out)
+                if pending is not None:
+                    if pending[1] == value:
+                        continue
+                    del scheduled[out]
+                    self.filtered += 1
+                if value != out.value:
+                    entry = scheduled[out] = (out, value)
+                    at = time + delay
+                    bucket = buckets.get(at)
+                    if bucket is None:
+                        buckets[at] = bucket = []
+                        heapq.heappush(times, at)
+                    bucket.append(entry)
+            if trace is not None:
+                trace.sample(time)
+        if until is not None and until > self.now:
+            self.now = until
+        return not times
+
+    def _poll_sources(self):
+        # Sources (switches) are set from outside, like Circuit.step(); their changes apply at `now`
+        affected = {}
+        for node, seen in self._sources.items():
+            if seen == node.value:
+                continue
+            self._sources[node] = node.value
+            if seen is None:
+                continue # First look: _sync() already settled from it
+            self.stimulus_time = self.now
+            self.last_change[node] = self.now
+            for dest in self._sinks.get(node, ()):
+                if dest.value != node.value:
+                    dest.value = node.value
+                    affected[dest.component] = None
+        for component in affected:
+            self._evaluate(component)
+
+    def _evaluate(self, component):
+        outputs = self._outputs.get(component, ())
+        if not outputs:
+            component.evaluate() # Bulbs react immediately
+            return
+        # Let the component compute its new outputs, then put the old values back until the delay expires
+        old = [node.value for node in outputs]
+        component.evaluate()
+        delay = component.delay
+        for node, current in zip(outputs, old):
+            value = node.value
+            node.value = current
+            pending = self._scheduled.get(node)
+            if pending is not None:
+                if pending[1] == value:
+                    continue # Already on its way
+                # The input went back before the output could follow: swallow the pulse
+                del self._scheduled[node]
+                self.filtered += 1
+            if value != current:
+                self._schedule(node, value, self.now + delay)
+
+    def _schedule(self, node, value, time):
+        entry = (node, value)
+        self._scheduled[node] = entry
+        bucket = self._buckets.get(time)
+        if bucket is None:
+            self._buckets[time] = bucket = []
+            heapq.heappush(self._times, time)
+        bucket.append(entry)
+
+    def report(self):
+        # BulbTiming for every Bulb in the circuit
+        paths = critical_paths(self.circuit)
+        timings = []
+        for component in self.circuit.components:
+            if isinstance(component, Bulb):
+                net = component.inputs["A"].net
+                driver = net.driver if net is not None else None
+                changed = self.last_change.get(driver, 0)
+                delay, path = paths[component]
+                timings.append(BulbTiming(component, max(changed - self.stimulus_time, 0), delay, path))
+        return timings
+
+def critical_paths(circuit):
+    # Component -> (longest delay from any source through to its outputs, components along that path).
+    # Wires inside a feedback loop are ignored, so each loop is crossed at most once.
+    ranks = circuit.ranks()
+    drivers = {}
+    for net in circuit.nets:
+        if net.driver is not None:
+            for dest in net.sinks:
+                drivers[dest] = net.driver.component
+    arrival = {}
+    previous = {}
+    for component in sorted(circuit.components, key=ranks.__getitem__):
+        best = 0
+        for node in component.inputs.values():
+            source = drivers.get(node)
+            if source is None or ranks.get(source) == ranks[component]:
+                continue
+            if source in arrival and (component not in previous or arrival[source] > best):
+                best = arrival[source]
+                previous[component] = source
+        arrival[component] = best + component.delay
+    paths = {}
+    for component, delay in arrival.items():
+        path = [component]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+        paths[component] = (delay, path[::-1])
+    return paths
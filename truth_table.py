@@ -0,0 +1,276 @@
+import csv
+import hashlib
+import itertools
+import os
+import struct
+from collections import namedtuple
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+import optimizer
+from logic_engine import Switch, run_program_bits
+
+CHUNK_BITS = 16 # 2**16 input vectors are packed into each Python int
+SHARD_BITS = 20 # 2**20 rows per process-pool task
+SETTLE_TICKS = 1000 # Step budget per row for circuits with feedback loops (oscillations are detected sooner)
+
+# Picklable form of a compiled circuit for worker processes: the levelized program, initial slot
+# values (bools), and the slots of the table's switches and bulbs in column order
+ShardNetlist = namedtuple("ShardNetlist", ["program", "values", "inputs", "outputs"])
+
+def input_words(count, start, width):
+    # Bit-sliced switch values for rows start .. start + width - 1 (width is a power of two, start a multiple of it)
+    # Row order matches itertools.product([False, True], repeat=count): the first switch is the most significant bit
+    mask = (1 << width) - 1
+    words = []
+    for j in range(count):
+        bit = count - 1 - j
+        run = 1 << bit
+        if run >= width:
+            # Constant across the whole chunk
+            words.append(mask if (start >> bit) & 1 else 0)
+        else:
+            # `run` zeros followed by `run` ones, repeated across the chunk
+            block = ((1 << run) - 1) << run
+            words.append(block * (mask // ((1 << (2 * run)) - 1)))
+    return words
+
+def unpack_columns(words, width):
+    # One bytes object per word, holding 0 or 1 for each of the `width` rows
+    return [format(word, f"0{width}b")[::-1].encode().translate(_BIT_BYTES) for word in words]
+
+_BIT_BYTES = bytes.maketrans(b"01", b"\x00\x01")
+
+def truth_table(circuit, switches, bulbs):
+    # Rows of 0/1 ints: switch values followed by bulb values, in itertools.product order
+    return list(iter_truth_table(circuit, switches, bulbs))
+
+def shard_netlist(circuit, switches, bulbs, optimize=False):
+    # Raises ValueError for circuits with feedback loops, like Circuit.compile()
+    if optimize:
+        # Compile optimizer.optimize()'s reduced circuit instead, folding the switches left out of the table
+        free = set(switches)
+        fixed = [c for c in circuit.components if isinstance(c, Switch) and c not in free]
+        reduced = optimizer.optimize(circuit, fixed)
+        circuit = reduced.circuit
+        switches = [reduced.switches[s] for s in switches]
+        bulbs = [reduced.bulbs[b] for b in bulbs]
+    compiled = circuit.compile()
+    values = list(compiled.values)
+    # Switches that aren't part of the table keep their current state
+    for slot, switch in zip(compiled.inputs, compiled.switches):
+        values[slot] = switch.is_on
+    inputs = [compiled.slots[s.outputs["Q"]] for s in switches]
+    outputs = [compiled.slots[b.inputs["A"]] for b in bulbs]
+    return ShardNetlist(compiled.program, values, inputs, outputs)
+
+def iter_truth_table(circuit, switches, bulbs, start=0, stop=None):
+    # Lazily yields rows start .. stop - 1, one bit-sliced chunk at a time
+    return _rows(_circuit_chunks(circuit, switches, bulbs, start, stop), start, stop)
+
+def iter_netlist_rows(netlist, start=0, stop=None):
+    # Same rows from a ShardNetlist, without touching the live circuit
+    return _rows(netlist_chunks(netlist, start, stop), start, stop)
+
+def _rows(chunks, start, stop):
+    for chunk_start, width, words in chunks:
+        rows = zip(*unpack_columns(words, width))
+        first = max(start - chunk_start, 0)
+        last = width if stop is None else min(stop - chunk_start, width)
+        yield from itertools.islice(rows, first, last)
+
+def _chunk_range(count, start, stop, chunk_bits):
+    # Aligned (chunk_start, width) pairs covering rows start .. stop - 1
+    total = 1 << count
+    stop = total if stop is None else min(stop, total)
+    if start >= stop:
+        return
+    width = min(1 << chunk_bits, total)
+    # Short ranges (e.g. one screen of the table viewer) use smaller chunks
+    while width > 1 and width // 2 >= stop - start:
+        width //= 2
+    for chunk_start in range(start - start % width, stop, width):
+        yield chunk_start, width
+
+def netlist_chunks(netlist, start=0, stop=None, chunk_bits=CHUNK_BITS):
+    # (chunk_start, width, words) with bit-sliced switch columns followed by bulb columns
+    count = len(netlist.inputs)
+    for chunk_start, width in _chunk_range(count, start, stop, chunk_bits):
+        mask = (1 << width) - 1
+        values = [mask if value else 0 for value in netlist.values]
+        words = input_words(count, chunk_start, width)
+        for slot, word in zip(netlist.inputs, words):
+            values[slot] = word
+        run_program_bits(netlist.program, values, mask)
+        yield chunk_start, width, words + [values[slot] for slot in netlist.outputs]
+
+def _circuit_chunks(circuit, switches, bulbs, start=0, stop=None, chunk_bits=CHUNK_BITS):
+    try:
+        netlist = shard_netlist(circuit, switches, bulbs)
+    except ValueError:
+        yield from _simulated_chunks(circuit, switches, bulbs, start, stop, chunk_bits)
+    else:
+        yield from netlist_chunks(netlist, start, stop, chunk_bits)
+
+def _simulated_chunks(circuit, switches, bulbs, start, stop, chunk_bits):
+    # Circuits with feedback loops can't be bit-sliced; simulate every row and pack the results
+    count = len(switches)
+    for chunk_start, width in _chunk_range(count, start, stop, chunk_bits):
+        words = input_words(count, chunk_start, width)
+        outputs = [0] * len(bulbs)
+        for k in range(width):
+            for j, switch in enumerate(switches):
+                switch.set_state(bool((words[j] >> k) & 1))
+            circuit.simulate(ticks=SETTLE_TICKS)
+            for i, bulb in enumerate(bulbs):
+                if bulb.is_lit:
+                    outputs[i] |= 1 << k
+        yield chunk_start, width, words + outputs
+
+def _simulated_truth_table(circuit, switches, bulbs):
+    return list(_rows(_simulated_chunks(circuit, switches, bulbs, 0, None, CHUNK_BITS), 0, None))
+
+def export_csv(path, circuit, switches, bulbs):
+    # Streams the whole table to a CSV file in constant memory
+    with open(path, "w", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow([s.name for s in switches] + [b.name for b in bulbs])
+        for _, width, words in _circuit_chunks(circuit, switches, bulbs):
+            writer.writerows(zip(*unpack_columns(words, width)))
+
+# Packed binary table: header, then for every chunk of rows each bulb column as little-endian bits.
+# Switch values are implied by the row index, so only outputs are stored.
+BINARY_MAGIC = b"LTTB"
+BINARY_VERSION = 1
+
+def export_binary(path, circuit, switches, bulbs, chunk_bits=CHUNK_BITS):
+    with open(path, "wb") as out:
+        out.write(BINARY_MAGIC + struct.pack("<BHHB", BINARY_VERSION, len(switches), len(bulbs), chunk_bits))
+        for name in [s.name for s in switches] + [b.name for b in bulbs]:
+            encoded = name.encode("utf-8")
+            out.write(struct.pack("<H", len(encoded)) + encoded)
+        count = len(switches)
+        for _, width, words in _circuit_chunks(circuit, switches, bulbs, chunk_bits=chunk_bits):
+            size = (width + 7) // 8
+            for word in words[count:]:
+                out.write(word.to_bytes(size, "little"))
+
+def read_binary(path):
+    # Returns (headers, row iterator) for a file written by export_binary; the file stays open until
+    # the iterator is exhausted or closed
+    out = open(path, "rb")
+    if out.read(4) != BINARY_MAGIC:
+        out.close()
+        raise ValueError("Not a truth table file")
+    version, count, outputs, chunk_bits = struct.unpack("<BHHB", out.read(6))
+    if version != BINARY_VERSION:
+        out.close()
+        raise ValueError(f"Unsupported truth table version {version}")
+    headers = []
+    for _ in range(count + outputs):
+        length, = struct.unpack("<H", out.read(2))
+        headers.append(out.read(length).decode("utf-8"))
+
+    def rows():
+        with out:
+            for chunk_start, width in _chunk_range(count, 0, None, chunk_bits):
+                size = (width + 7) // 8
+                words = input_words(count, chunk_start, width)
+                words += [int.from_bytes(out.read(size), "little") for _ in range(outputs)]
+                yield from zip(*unpack_columns(words, width))
+
+    return headers, rows()
+
+def exhaustive(netlist, mode="counts", expected=None, shard_bits=SHARD_BITS, max_workers=None,
+               progress=None, cancel=None):
+    # Evaluates all 2**n input rows of a ShardNetlist across a process pool, split into contiguous shards
+    #   "rows":          generator of row tuples in itertools.product order (switch values, then bulb values)
+    #   "counts":        list with the number of rows lighting each bulb
+    #   "hash":          hex digest of the output columns (stable for a given shard_bits)
+    #   "first_failure": index of the first row whose bulbs differ from `expected` (default all off), or None
+    # progress(done_rows, total_rows) is called as shards complete; setting the `cancel` Event
+    # stops the run with CancelledError.
+    if mode not in ("rows", "counts", "hash", "first_failure"):
+        raise ValueError(f"Unknown mode {mode!r}")
+    if expected is None:
+        expected = [0] * len(netlist.outputs)
+    shards = _run_shards(netlist, mode, tuple(expected), shard_bits, max_workers, progress, cancel)
+    if mode == "rows":
+        return (row for shard in shards for row in shard)
+    if mode == "counts":
+        counts = [0] * len(netlist.outputs)
+        for shard in shards:
+            counts = [a + b for a, b in zip(counts, shard)]
+        return counts
+    if mode == "hash":
+        digest = hashlib.blake2b()
+        for shard in shards:
+            digest.update(shard)
+        return digest.hexdigest()
+    for shard in shards:
+        if shard is not None:
+            shards.close() # Cancels the remaining shards
+            return shard
+    return None
+
+def _run_shards(netlist, mode, expected, shard_bits, max_workers, progress, cancel):
+    # Yields each shard's result in order while keeping a bounded number of shards in flight
+    count = len(netlist.inputs)
+    total = 1 << count
+    size = 1 << min(shard_bits, count)
+    max_workers = max_workers or os.cpu_count() or 1
+    starts = iter(range(0, total, size))
+    done = 0
+    with ProcessPoolExecutor(max_workers, initializer=_init_shard_worker, initargs=(netlist,)) as pool:
+        in_flight = []
+        try:
+            while True:
+                while len(in_flight) < 2 * max_workers:
+                    start = next(starts, None)
+                    if start is None:
+                        break
+                    in_flight.append(pool.submit(_evaluate_shard, count, start, size, mode, expected))
+                if not in_flight:
+                    return
+                if cancel is not None and cancel.is_set():
+                    raise CancelledError()
+                result = in_flight.pop(0).result()
+                done += size
+                if progress is not None:
+                    progress(done, total)
+                yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+_shard_netlist = None # Set once per worker process
+
+def _init_shard_worker(netlist):
+    global _shard_netlist
+    _shard_netlist = netlist
+
+def _evaluate_shard(count, start, size, mode, expected):
+    counts = [0] * len(expected)
+    digest = hashlib.blake2b()
+    rows = []
+    for chunk_start, width, words in netlist_chunks(_shard_netlist, start, start + size):
+        outputs = words[count:]
+        if mode == "rows":
+            rows.extend(zip(*unpack_columns(words, width)))
+        elif mode == "counts":
+            counts = [total + word.bit_count() for total, word in zip(counts, outputs)]
+        elif mode == "hash":
+            for word in outputs:
+                digest.update(word.to_bytes(width // 8 or 1, "little"))
+        else:
+            mask = (1 << width) - 1
+            mismatch = 0
+            for word, value in zip(outputs, expected):
+                mismatch |= word ^ (mask if value else 0)
+            if mismatch:
+                return chunk_start + (mismatch & -mismatch).bit_length() - 1
+    if mode == "rows":
+        return rows
+    if mode == "counts":
+        return counts
+    if mode == "hash":
+        return digest.digest()
+    return None
@@ -0,0 +1,99 @@
+from array import array
+
+class Trace:
+    # Transition log for a fixed set of Nodes, kept in a ring buffer of parallel arrays
+    # (time, node index, value), about 13 bytes per change (20 if a bus is traced). Nothing outside
+    # the traced Nodes is touched: whoever advances time calls sample(), which compares only the
+    # traced values.
+    def __init__(self, nodes, capacity=1 << 16, time=0):
+        self.nodes = list(nodes)
+        self.capacity = capacity
+        self.times = array("q", [0]) * capacity
+        self.indexes = array("L", [0]) * capacity
+        self.buses = any(node.width > 1 for node in self.nodes)
+        self.values = array("Q" if self.buses else "B", [0]) * capacity
+        self.first = 0 # Position of the oldest record
+        self.count = 0
+        self.last = [self._value(index, node.value) for index, node in enumerate(self.nodes)] # As of the newest record
+        # Values and time at the start of the retained history; records that fall out of the
+        # ring are folded in here, so the oldest retained state is always known
+        self.start_values = list(self.last)
+        self.start_time = time
+
+    def __len__(self):
+        return self.count
+
+    def sample(self, time):
+        # Records every traced Node whose value changed since the previous sample
+        last = self.last
+        for index, node in enumerate(self.nodes):
+            value = node.value
+            if value != last[index]:
+                last[index] = value
+                self.record(time, index, value)
+
+    def record(self, time, index, value):
+        position = self.first + self.count
+        if self.count == self.capacity:
+            # Full: overwrite the oldest record
+            oldest = self.first
+            self.start_values[self.indexes[oldest]] = self._value(self.indexes[oldest], self.values[oldest])
+            self.start_time = self.times[oldest]
+            self.first = (oldest + 1) % self.capacity
+        else:
+            self.count += 1
+        position %= self.capacity
+        self.times[position] = time
+        self.indexes[position] = index
+        self.values[position] = value
+
+    def _value(self, index, value):
+        # Bools for plain Nodes, ints for buses
+        return int(value) if self.nodes[index].width > 1 else bool(value)
+
+    def changes(self):
+        # (time, Node, value) for every retained transition, oldest first
+        for k in range(self.count):
+            position = (self.first + k) % self.capacity
+            index = self.indexes[position]
+            yield self.times[position], self.nodes[index], self._value(index, self.values[position])
+
+    def export_vcd(self, path, timescale="1ns", names=None):
+        # Writes the retained history as a Value Change Dump; names default to "<component><id>_<port>"
+        if names is None:
+            names = [f"{node.component.name}{node.component.id}_{node.name}" for node in self.nodes]
+        codes = [_vcd_code(index) for index in range(len(self.nodes))]
+        with open(path, "w") as out:
+            out.write(f"$timescale {timescale} $end\n$scope module circuit $end\n")
+            widths = [node.width for node in self.nodes]
+            for code, name, width in zip(codes, names, widths):
+                out.write(f"$var wire {width} {code} {name.replace(' ', '_')} $end\n")
+            out.write("$upscope $end\n$enddefinitions $end\n")
+            out.write(f"#{self.start_time}\n$dumpvars\n")
+            for index, value in enumerate(self.start_values):
+                out.write(_vcd_value(value, widths[index], codes[index]))
+            out.write("$end\n")
+            current = self.start_time
+            for k in range(self.count):
+                position = (self.first + k) % self.capacity
+                time = self.times[position]
+                if time != current:
+                    out.write(f"#{time}\n")
+                    current = time
+                index = self.indexes[position]
+                out.write(_vcd_value(self.values[position], widths[index], codes[index]))
+
+def _vcd_value(value, width, code):
+    # Scalar changes are "<0|1><code>", vectors "b<binary> <code>"
+    if width > 1:
+        return f"b{int(value):b} {code}\n"
+    return f"{int(value)}{code}\n"
+
+def _vcd_code(index):
+    # Short identifier from the printable ASCII range VCD allows ("!" .. "~")
+    code = ""
+    while True:
+        code += chr(33 + index % 94)
+        index //= 94
+        if not index:
+            return code